@@ -5,3 +5,4 @@ Code used for internal maintenance tasks.
 from .ensembl import *  # noqa
 from .ncbi import *  # noqa
 from .annotation_maint import *  # noqa
+from .slim_cost_model import *  # noqa
@@ -18,6 +18,7 @@ import stdgrimmsim
 from . import ensembl
 from . import ncbi
 from . import annotation_maint
+from . import slim_cost_model
 
 logger = logging.getLogger("maint")
 
@@ -566,5 +567,48 @@ def process_annotations():
     annotation_maint.download_process_annotations()
 
 
+@cli.command()
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.option("--species", default="ZweBerg", show_default=True)
+@click.option("--population-size", type=float, default=5000, show_default=True)
+@click.option(
+    "--length",
+    "lengths",
+    type=float,
+    multiple=True,
+    default=[1e5, 1e6, 5e6],
+    show_default=True,
+    help="A contig length to benchmark (may be repeated).",
+)
+@click.option(
+    "--scaling-factor",
+    "scaling_factors",
+    type=float,
+    multiple=True,
+    default=[1, 2, 5, 10, 20],
+    show_default=True,
+    help="A scaling factor to benchmark (may be repeated).",
+)
+@click.option("--seed", type=int, default=1, show_default=True)
+@click.option("--slim-path", default=None, help="The SLiM executable.")
+def fit_slim_cost_model(
+    output, species, population_size, lengths, scaling_factors, seed, slim_path
+):
+    """
+    Benchmarks SLiM on this machine over a grid of contig lengths and
+    scaling factors, fits a SLiMCostModel to the runtimes and memory use and
+    writes it to OUTPUT, for use with --slim-cost-model.
+    """
+    slim_cost_model.fit_slim_cost_model(
+        output,
+        species_id=species,
+        population_size=population_size,
+        lengths=lengths,
+        scaling_factors=scaling_factors,
+        seed=seed,
+        slim_path=slim_path,
+    )
+
+
 def main():
     cli()
@@ -0,0 +1,112 @@
+"""
+Benchmarking of SLiM on this machine, to fit the SLiMCostModel that
+``slim_scaling_factor="auto"`` (or ``--slim-scaling-factor=auto`` with
+``--slim-cost-model``) uses to choose the scaling factor.
+"""
+
+import itertools
+import json
+import logging
+import time
+import warnings
+
+import numpy as np
+
+import stdgrimmsim
+
+logger = logging.getLogger(__name__)
+
+# The units of the memory use reported by SLiM's community.usage().
+_MEGABYTE = 2**20
+
+
+def _benchmark_dfe():
+    # Mostly neutral mutations, with some weakly deleterious mutations so
+    # that SLiM tracks mutations as it would in a typical simulation.
+    return stdgrimmsim.DFE(
+        id="benchmark",
+        description="Benchmark DFE",
+        long_description="Neutral and gamma distributed deleterious mutations",
+        mutation_types=[
+            stdgrimmsim.MutationType(),
+            stdgrimmsim.MutationType(
+                distribution_type="g", distribution_args=[-0.01, 0.2]
+            ),
+        ],
+        proportions=[0.7, 0.3],
+    )
+
+
+def benchmark_slim(
+    *,
+    species_id="ZweBerg",
+    population_size=5000,
+    lengths=(1e5, 1e6, 5e6),
+    scaling_factors=(1, 2, 5, 10, 20),
+    num_samples=10,
+    burn_in=10,
+    seed=1,
+    slim_path=None,
+):
+    """
+    Runs SLiM for a constant size population over the grid of contig
+    lengths and scaling factors, and returns a tuple of lists (costs,
+    runtimes, memories) of the costs predicted by a
+    :class:`stdgrimmsim.SLiMCostModel` without coefficients, the wall
+    times of the simulations (in seconds) and the peak memory used by SLiM
+    (in bytes), which are passed to :meth:`stdgrimmsim.SLiMCostModel.fit`.
+    """
+    species = stdgrimmsim.get_species(species_id)
+    engine = stdgrimmsim.get_engine("slim")
+    model = stdgrimmsim.PiecewiseConstantSize(population_size)
+    samples = {model.model.populations[0].name: num_samples}
+    cost_model = stdgrimmsim.SLiMCostModel()
+    costs, runtimes, memories = [], [], []
+    for length, Q in itertools.product(lengths, scaling_factors):
+        contig = species.get_contig(length=length)
+        contig.add_dfe(intervals=[[0, contig.length]], DFE=_benchmark_dfe())
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", stdgrimmsim.SLiMScalingFactorWarning)
+            ts = engine.simulate(
+                model,
+                contig,
+                samples,
+                seed=seed,
+                slim_path=slim_path,
+                slim_scaling_factor=Q,
+                slim_burn_in=burn_in,
+                slim_telemetry_interval=10,
+            )
+        runtimes.append(time.perf_counter() - start)
+        telemetry = stdgrimmsim.get_slim_telemetry(ts)
+        memories.append(float(np.max(telemetry.memory_mb)) * _MEGABYTE)
+        costs.append(
+            cost_model.predict(model, contig, scaling_factor=Q, burn_in=burn_in)
+        )
+        logger.info(
+            f"length={length:g} Q={Q:g}: {runtimes[-1]:.3g} seconds, "
+            f"{memories[-1]:.3g} bytes"
+        )
+    return costs, runtimes, memories
+
+
+def fit_slim_cost_model(output, **kwargs):
+    """
+    Benchmarks SLiM with :func:`.benchmark_slim`, fits a
+    :class:`stdgrimmsim.SLiMCostModel` to the runs and writes its
+    coefficients to the JSON file ``output``, which is read by the
+    ``--slim-cost-model`` option. Returns the fitted model.
+    """
+    cost_model = stdgrimmsim.SLiMCostModel.fit(*benchmark_slim(**kwargs))
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "runtime_coefficients": cost_model.runtime_coefficients,
+                "memory_coefficients": cost_model.memory_coefficients,
+            },
+            f,
+            indent=4,
+        )
+    logger.info(f"Wrote the SLiM cost model to {output}")
+    return cost_model
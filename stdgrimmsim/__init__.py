@@ -20,13 +20,17 @@ from .citations import *  # NOQA
 from .engines import *  # NOQA
 from .warning_categories import *  # NOQA
 
-# We import catalog here, but the internal functions
-# defined are not part of the external API.
-from .catalog import *  # NOQA
+# The species in the catalog are loaded on demand by get_species(), and the
+# internal functions defined in the catalog are not part of the external API.
+from . import catalog  # NOQA
 
 from .priors import get_prior  # NOQA
 
 from . import qc  # NOQA
+from . import bed  # NOQA
 
 from .selection import *  # NOQA
 from .slim_engine import *  # NOQA
+from .batch import *  # NOQA
+from .pipeline import *  # NOQA
+from .export import *  # NOQA
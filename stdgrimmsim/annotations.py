@@ -10,6 +10,10 @@ import stdgrimmsim
 
 logger = logging.getLogger(__name__)
 
+# The directory (in the cache directory of an annotation) in which the parsed
+# chromosome annotations are stored.
+_PARSED_ANNOTATION_DIR = "_parsed"
+
 
 @attr.s(kw_only=True)
 class Annotation:
@@ -76,15 +80,82 @@ class Annotation:
         """
         self._cache.download()
 
-    def get_chromosome_annotations(self, id):
+    def _parsed_annotation_dir(self, chrom):
+        return self.cache_path / _PARSED_ANNOTATION_DIR / chrom.id
+
+    def _read_chromosome_annotations(self, chrom):
         """
-        Returns the numpy interval array for the chromosome with the specified id.
+        Returns the arrays of left and right coordinates of the intervals
+        for the specified chromosome, sorted by left coordinate. The interval
+        file is parsed once, and the arrays are stored in the annotation's
+        cache directory, from which they are memory-mapped on later calls.
+        The stored arrays are only used if they were parsed from the download
+        with the annotation's SHA256 checksum.
         """
-        chrom = self.species.genome.get_chromosome(id)
         if not self.is_cached():
             self.download()
+        parsed_dir = self._parsed_annotation_dir(chrom)
+        names = ["left.npy", "right.npy"]
+        arrays = stdgrimmsim.utils.load_parsed(parsed_dir, names, self.intervals_sha256)
+        if arrays is not None:
+            return arrays
         file_path = os.path.join(self.cache_path, self.file_pattern.format(id=chrom.id))
-        ret = np.loadtxt(file_path, dtype="int32")
-        if len(ret) == 0:
+        logger.debug(f"Parsing annotation intervals {file_path}")
+        intervals = np.loadtxt(file_path, dtype="int32", ndmin=2).reshape((-1, 2))
+        intervals = intervals[np.argsort(intervals[:, 0], kind="stable")]
+        left = np.ascontiguousarray(intervals[:, 0])
+        right = np.ascontiguousarray(intervals[:, 1])
+        try:
+            stdgrimmsim.utils.save_parsed(
+                parsed_dir, dict(zip(names, [left, right])), self.intervals_sha256
+            )
+        except OSError as e:
+            logger.warning(f"Couldn't store the parsed annotation {file_path}: {e}")
+        return left, right
+
+    def get_intervals(self, id, left=None, right=None):
+        """
+        Returns the intervals of the annotation on the chromosome with the
+        specified id that overlap ``[left, right)``, clipped to
+        ``[left, right)``, as a numpy array with two columns (the left and
+        right coordinates of the intervals) sorted by left coordinate. The
+        intervals of the annotation must be non-overlapping. The intervals
+        are found by binary search in the memory-mapped annotation, so only
+        the intervals that are returned are read.
+
+        :param str id: The chromosome identifier.
+        :param int left: The left coordinate (inclusive) of the region.
+            Defaults to 0.
+        :param int right: The right coordinate (exclusive) of the region.
+            Defaults to the length of the chromosome.
+        :rtype: numpy.ndarray
+        :return: The intervals in the region.
+        """
+        chrom = self.species.genome.get_chromosome(id)
+        lefts, rights = self._read_chromosome_annotations(chrom)
+        left = 0 if left is None else round(left)
+        right = chrom.length if right is None else round(right)
+        if not 0 <= left < right:
+            raise ValueError(
+                f"Invalid region: left={left} must be non-negative and less "
+                f"than right={right}"
+            )
+        # The intervals are non-overlapping, so the right coordinates are
+        # sorted too.
+        start = np.searchsorted(rights, left, side="right")
+        stop = np.searchsorted(lefts, right, side="left")
+        stop = max(start, stop)
+        intervals = np.column_stack([lefts[start:stop], rights[start:stop]])
+        return np.clip(intervals, left, right).astype("int32")
+
+    def get_chromosome_annotations(self, id):
+        """
+        Returns the numpy interval array for the chromosome with the specified id.
+        The intervals are sorted by left coordinate. See :meth:`.get_intervals`
+        to get the intervals in part of the chromosome.
+        """
+        chrom = self.species.genome.get_chromosome(id)
+        left, right = self._read_chromosome_annotations(chrom)
+        if len(left) == 0:
             raise ValueError(f"No annotations found for {id}")
-        return ret
+        return np.column_stack([left, right])
@@ -0,0 +1,654 @@
+"""
+Infrastructure for running batches of simulations in parallel.
+"""
+
+import collections
+import concurrent.futures
+import csv
+import hashlib
+import json
+import logging
+import os
+
+import attr
+import numpy as np
+
+import stdgrimmsim
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(kw_only=True)
+class SimulationJob:
+    """
+    Class describing a single simulation to be run by :func:`.run_batch`.
+
+    Jobs refer to species, demographic models and engines by their string
+    identifiers, so that they can be cheaply sent to worker processes which
+    then look up the corresponding catalog objects themselves.
+
+    :ivar species: The ID of the species to simulate (see :func:`.get_species`).
+    :vartype species: str
+    :ivar samples: The number of individuals to sample per population,
+        as a dict of the form ``{population_name: num_samples}``.
+    :vartype samples: dict
+    :ivar demographic_model: The ID of the species' demographic model to
+        simulate, or a :class:`.DemographicModel` instance. If None, a
+        constant size model with the species' default population size is used
+        (see :class:`.PiecewiseConstantSize`).
+    :vartype demographic_model: str
+    :ivar contig: Keyword arguments passed to :meth:`.Species.get_contig`,
+        e.g., ``{"chromosome": "1", "right": 1e6}``.
+    :vartype contig: dict
+    :ivar engine: The ID of the simulation engine (see :func:`.get_engine`).
+    :vartype engine: str
+    :ivar engine_kwargs: Further keyword arguments passed to the engine's
+        ``simulate()`` method.
+    :vartype engine_kwargs: dict
+    :ivar seed: The random seed for this job. If None (the default), the
+        seed is derived from the root seed passed to :func:`.run_batch`.
+    :vartype seed: int
+    :ivar output: If not None, the simulated tree sequence is written to this
+        path by the worker process and is not returned in the result.
+    :vartype output: str
+    :ivar provenance: If not None, a provenance record (as a dict) that is
+        added to the tree sequence before it is written to ``output``.
+    :vartype provenance: dict
+    """
+
+    species = attr.ib(type=str)
+    samples = attr.ib(type=dict)
+    demographic_model = attr.ib(default=None)
+    contig = attr.ib(factory=dict)
+    engine = attr.ib(default="msprime", type=str)
+    engine_kwargs = attr.ib(factory=dict)
+    seed = attr.ib(default=None)
+    output = attr.ib(default=None)
+    provenance = attr.ib(default=None)
+
+    def run(self, seed=None):
+        """
+        Runs the simulation described by this job in the current process.
+
+        :param int seed: The random seed to use if this job does not
+            specify its own seed.
+        :return: The simulated tree sequence, or None if the job has
+            an ``output`` path.
+        :rtype: :class:`tskit.TreeSequence`
+        """
+        if self.seed is not None:
+            seed = self.seed
+        species = stdgrimmsim.get_species(self.species)
+        if self.demographic_model is None:
+            model = stdgrimmsim.PiecewiseConstantSize(species.population_size)
+        elif isinstance(self.demographic_model, stdgrimmsim.DemographicModel):
+            model = self.demographic_model
+        else:
+            model = species.get_demographic_model(self.demographic_model)
+        contig = species.get_contig(**self.contig)
+        engine = stdgrimmsim.get_engine(self.engine)
+        ts = engine.simulate(
+            model, contig, self.samples, seed=seed, **self.engine_kwargs
+        )
+        if self.output is not None and ts is not None:
+            if self.provenance is not None:
+                tables = ts.dump_tables()
+                tables.provenances.add_row(json.dumps(self.provenance))
+                ts = tables.tree_sequence()
+            # Write to a temporary file first, so that an interrupted job
+            # never leaves behind a partially written output file.
+            tmp_output = f"{self.output}.tmp{os.getpid()}"
+            ts.dump(tmp_output)
+            os.replace(tmp_output, self.output)
+            ts = None
+        return ts
+
+
+@attr.s(kw_only=True)
+class BatchResult:
+    """
+    The result of a single job run by :func:`.run_batch`.
+
+    :ivar index: The position of the job in the input sequence of jobs.
+    :vartype index: int
+    :ivar job: The job that was run.
+    :vartype job: :class:`.SimulationJob`
+    :ivar seed: The random seed used for the simulation.
+    :vartype seed: int
+    :ivar ts: The simulated tree sequence, or None if the job wrote its
+        output to a file.
+    :vartype ts: :class:`tskit.TreeSequence`
+    """
+
+    index = attr.ib(type=int)
+    job = attr.ib()
+    seed = attr.ib(type=int)
+    ts = attr.ib(default=None)
+
+
+def _seed_sequence_to_int(seed_sequence):
+    # Seeds must be in the range accepted by both msprime and SLiM.
+    return int(seed_sequence.generate_state(1, np.uint64)[0] % (2**31 - 2)) + 1
+
+
+def derive_seeds(seed, num_seeds):
+    """
+    Returns a list of ``num_seeds`` independent random seeds derived from
+    the root ``seed`` using :meth:`numpy.random.SeedSequence.spawn`. The
+    i-th derived seed depends only on ``seed`` and ``i``.
+
+    :param int seed: The root seed. If None, fresh entropy is used.
+    :param int num_seeds: The number of seeds to derive.
+    :rtype: list of int
+    """
+    children = np.random.SeedSequence(seed).spawn(num_seeds)
+    return [_seed_sequence_to_int(child) for child in children]
+
+
+def _iter_seeds(seed):
+    # Yields the same sequence of seeds as derive_seeds(), but lazily, so that
+    # the number of jobs need not be known in advance.
+    seed_sequence = np.random.SeedSequence(seed)
+    while True:
+        yield _seed_sequence_to_int(seed_sequence.spawn(1)[0])
+
+
+def _run_pool(func, args_iter, workers=None, max_pending=None, ordered=False):
+    """
+    Calls ``func(*args)`` for each tuple of ``args`` in ``args_iter``, and
+    yields the return values in the order in which they complete, or in the
+    order of ``args_iter`` if ``ordered`` is True. At most ``max_pending``
+    calls are submitted to the pool at any one time, so that arbitrarily
+    long (or lazy) iterators of arguments can be processed in bounded memory.
+    When ``ordered``, calls that complete before an earlier one still count
+    towards ``max_pending`` until they are yielded. If ``workers`` is 1, the
+    calls are made sequentially in the current process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("The number of workers must be at least 1")
+    if max_pending is None:
+        max_pending = 2 * workers
+    if max_pending < 1:
+        raise ValueError("max_pending must be at least 1")
+
+    if workers == 1:
+        return (func(*args) for args in args_iter)
+    return _pool_results(func, iter(args_iter), workers, max_pending, ordered)
+
+
+def _pool_results(func, args_iter, workers, max_pending, ordered):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    args = next(args_iter, None)
+                    if args is None:
+                        break
+                    pending.append(executor.submit(func, *args))
+                if len(pending) == 0:
+                    break
+                if ordered:
+                    done = [pending[0]]
+                    concurrent.futures.wait(done)
+                else:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                for future in done:
+                    pending.remove(future)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _run_job(index, job, seed):
+    logger.debug(f"Running job {index} with seed {seed}")
+    ts = job.run(seed=seed)
+    return BatchResult(
+        index=index, job=job, seed=seed if job.seed is None else job.seed, ts=ts
+    )
+
+
+def run_batch(jobs, *, workers=None, seed=None, max_pending=None):
+    """
+    Runs the specified simulation jobs using a pool of worker processes, and
+    returns an iterator over the results in the order that the jobs finish.
+
+    The seed of each job that does not specify its own ``seed`` is derived
+    from the root ``seed`` using :meth:`numpy.random.SeedSequence.spawn`,
+    so that the seed of the i-th job depends only on the root seed and
+    ``i``. The results are therefore identical regardless of the number of
+    workers or the order in which the jobs complete.
+
+    Jobs may be given as :class:`.SimulationJob` instances or as dicts of
+    the corresponding keyword arguments. ``jobs`` may be a lazy iterator;
+    only a bounded number of jobs are submitted to the pool at once.
+
+    .. code-block:: python
+
+        jobs = [
+            stdgrimmsim.SimulationJob(
+                species="ZweBerg",
+                demographic_model="BlackForest_1D12",
+                contig={"chromosome": "1", "right": 1e6},
+                samples={"BlackForest": 10},
+            )
+            for _ in range(100)
+        ]
+        for result in stdgrimmsim.run_batch(jobs, workers=4, seed=42):
+            print(result.index, result.seed, result.ts.num_sites)
+
+    :param jobs: The simulations to run.
+    :type jobs: iterable of :class:`.SimulationJob` or dict
+    :param int workers: The number of worker processes. If None, the number
+        of CPUs is used. If 1, the jobs are run sequentially in the current
+        process.
+    :param int seed: The root seed from which the seeds of all jobs are
+        derived. If None, fresh entropy is used.
+    :param int max_pending: The maximum number of jobs that are submitted to
+        the pool but not yet returned. Defaults to twice the number of workers.
+    :return: An iterator over the results of the jobs.
+    :rtype: iterator of :class:`.BatchResult`
+    """
+
+    def job_args():
+        for index, (job, job_seed) in enumerate(zip(jobs, _iter_seeds(seed))):
+            if isinstance(job, dict):
+                job = SimulationJob(**job)
+            yield index, job, job_seed
+
+    return _run_pool(_run_job, job_args(), workers=workers, max_pending=max_pending)
+
+
+def chromosome_output_path(output, chromosome):
+    """
+    Returns the path of the output file for the specified chromosome. If
+    ``output`` contains the placeholder ``{chromosome}``, it is replaced by
+    the chromosome ID; otherwise, the chromosome ID is inserted before the
+    file extension, so that ``sim.trees`` becomes ``sim_1.trees`` for
+    chromosome ``1``.
+
+    :param str output: The output path or pattern.
+    :param str chromosome: The chromosome ID.
+    :rtype: str
+    """
+    output = str(output)
+    if "{chromosome}" in output:
+        return output.replace("{chromosome}", chromosome)
+    root, ext = os.path.splitext(output)
+    return f"{root}_{chromosome}{ext}"
+
+
+def simulate_genome(
+    species,
+    demographic_model,
+    samples,
+    *,
+    chromosomes=None,
+    engine="msprime",
+    seed=None,
+    workers=None,
+    output=None,
+    provenance=None,
+    contig_kwargs=None,
+    engine_kwargs=None,
+):
+    """
+    Simulates several chromosomes of a species concurrently using a pool of
+    worker processes (see :func:`.run_batch`), and returns an iterator over
+    ``(chromosome_id, result)`` pairs in the order that the simulations
+    finish. If ``output`` is None, each result is the simulated tree
+    sequence; otherwise, each tree sequence is written by the worker to the
+    file given by :func:`.chromosome_output_path` and the result is the
+    path of that file.
+
+    Each chromosome is simulated with its own seed, derived from ``seed`` and
+    the position of the chromosome in the species' genome, so the
+    simulation of a given chromosome does not depend on which other
+    chromosomes are simulated alongside it or on the number of workers.
+    The longest chromosomes are started first, to keep the overall running
+    time close to that of the longest chromosome.
+
+    .. code-block:: python
+
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = species.get_demographic_model("BlackForest_1D12")
+        genome = dict(
+            stdgrimmsim.simulate_genome(
+                species, model, {"BlackForest": 10}, seed=1, workers=4
+            )
+        )
+        ts_chrom1 = genome["1"]
+
+    :param species: The species to simulate, or its ID.
+    :type species: :class:`.Species` or str
+    :param demographic_model: The demographic model to simulate, or the ID of
+        one of the species' models. If None, a constant size model with the
+        species' default population size is used.
+    :type demographic_model: :class:`.DemographicModel` or str
+    :param dict samples: The number of individuals to sample per population.
+    :param chromosomes: The IDs of the chromosomes to simulate. Defaults
+        to all autosomes (see :attr:`.Genome.autosomes`).
+    :type chromosomes: list of str
+    :param str engine: The ID of the simulation engine.
+    :param int seed: The root random seed. If None, fresh entropy is used.
+    :param int workers: The number of worker processes. If None, the
+        number of CPUs is used.
+    :param str output: The output path pattern (see
+        :func:`.chromosome_output_path`). If None, the tree sequences are
+        returned.
+    :param dict provenance: A provenance record that is added to each tree
+        sequence written to ``output`` (see :class:`.SimulationJob`).
+    :param dict contig_kwargs: Further keyword arguments passed to
+        :meth:`.Species.get_contig` for each chromosome (e.g., ``genetic_map``).
+    :param dict engine_kwargs: Further keyword arguments passed to the
+        engine's ``simulate()`` method.
+    :rtype: iterator of (str, :class:`tskit.TreeSequence` or str) tuples
+    """
+    if isinstance(species, str):
+        species = stdgrimmsim.get_species(species)
+    genome = species.genome
+    if chromosomes is None:
+        chromosomes = [chrom.id for chrom in genome.autosomes]
+    contig_kwargs = {} if contig_kwargs is None else contig_kwargs
+    for key in ["chromosome", "length", "left", "right"]:
+        if key in contig_kwargs:
+            raise ValueError(f"Cannot specify {key} when simulating a genome")
+    engine_kwargs = {} if engine_kwargs is None else engine_kwargs
+
+    chrom_index = {chrom.id: j for j, chrom in enumerate(genome.chromosomes)}
+    chroms = []
+    for chrom_id in chromosomes:
+        chrom = genome.get_chromosome(chrom_id)
+        if chrom in chroms:
+            raise ValueError(f"Chromosome {chrom.id} specified more than once")
+        chroms.append(chrom)
+    if len(chroms) == 0:
+        raise ValueError("No chromosomes to simulate")
+    seeds = derive_seeds(seed, len(genome.chromosomes))
+
+    jobs = []
+    for chrom in sorted(chroms, key=lambda chrom: -chrom.length):
+        jobs.append(
+            SimulationJob(
+                species=species.id,
+                demographic_model=demographic_model,
+                contig=dict(contig_kwargs, chromosome=chrom.id),
+                samples=samples,
+                engine=engine,
+                engine_kwargs=engine_kwargs,
+                seed=seeds[chrom_index[chrom.id]],
+                output=(
+                    None if output is None else chromosome_output_path(output, chrom.id)
+                ),
+                provenance=provenance,
+            )
+        )
+    return (
+        (
+            result.job.contig["chromosome"],
+            result.ts if output is None else result.job.output,
+        )
+        for result in run_batch(jobs, workers=workers)
+    )
+
+
+# Contig specification keys that take string values; all others are numbers.
+_STRING_CONTIG_KEYS = [
+    "chromosome",
+    "genetic_map",
+    "inclusion_mask",
+    "exclusion_mask",
+    "regions",
+]
+
+
+def _parse_contig_spec(spec):
+    # Parses a contig specification such as "chromosome=1,right=1e6".
+    contig = {}
+    if spec is None or spec.strip() == "":
+        return contig
+    for item in spec.split(","):
+        key, sep, value = item.partition("=")
+        key = key.strip()
+        if sep == "" or key == "":
+            raise ValueError(
+                f"Invalid contig specification '{spec}': expected a comma "
+                "separated list of key=value pairs"
+            )
+        value = value.strip()
+        contig[key] = value if key in _STRING_CONTIG_KEYS else float(value)
+    return contig
+
+
+def _parse_samples(spec):
+    # Parses a sample specification such as "BlackForest:5,Harz:3".
+    samples = stdgrimmsim.utils.parse_population_sample_pairs(
+        [x.strip() for x in spec.split(",")]
+    )
+    if not isinstance(samples, dict):
+        raise ValueError(
+            "Sample specification must be in the form "
+            "<population_name:number_of_samples>"
+        )
+    return samples
+
+
+def _manifest_row_to_job(row, engine):
+    row = {k: v for k, v in row.items() if v is not None and v != ""}
+    if "model" in row:
+        if "demographic_model" in row:
+            raise ValueError("Cannot specify both model and demographic_model")
+        row["demographic_model"] = row.pop("model")
+    for key in ["species", "samples"]:
+        if key not in row:
+            raise ValueError(f"Missing required field '{key}'")
+    contig = row.pop("contig", {})
+    if isinstance(contig, str):
+        contig = _parse_contig_spec(contig)
+    samples = row.pop("samples")
+    if isinstance(samples, str):
+        samples = _parse_samples(samples)
+    engine_kwargs = row.pop("engine_kwargs", {})
+    if isinstance(engine_kwargs, str):
+        engine_kwargs = json.loads(engine_kwargs)
+    seed = row.pop("seed", None)
+    job = SimulationJob(
+        species=row.pop("species"),
+        samples=samples,
+        demographic_model=row.pop("demographic_model", None),
+        contig=contig,
+        engine=row.pop("engine", engine),
+        engine_kwargs=engine_kwargs,
+        seed=None if seed is None else int(seed),
+        output=row.pop("output", None),
+    )
+    if len(row) > 0:
+        raise ValueError(f"Unknown fields {sorted(row.keys())}")
+    return job
+
+
+def read_manifest(path, *, engine="msprime"):
+    """
+    Reads a manifest of simulation jobs from the specified file, and returns
+    the corresponding list of :class:`.SimulationJob` objects.
+
+    The manifest is either in JSON lines format, with one JSON object per
+    line (if the file name ends in ``.jsonl`` or ``.json``, or the first
+    row starts with ``{``), or in tab separated format with a header row.
+    Each row has the fields ``species`` and ``samples``, and optionally
+    ``demographic_model`` (or ``model``), ``contig``, ``engine``,
+    ``engine_kwargs``, ``seed`` and ``output``, as described in
+    :class:`.SimulationJob`. In tab separated files, or as strings in JSON
+    objects, ``samples`` are given as ``population:count`` pairs separated by
+    commas (e.g., ``BlackForest:5,Harz:3``), ``contig`` as ``key=value``
+    pairs separated by commas (e.g., ``chromosome=1,right=1e6``) and
+    ``engine_kwargs`` as a JSON object. Empty rows and rows starting with
+    ``#`` are ignored.
+
+    :param str path: The path of the manifest file.
+    :param str engine: The ID of the simulation engine for rows that do
+        not specify one.
+    :rtype: list of :class:`.SimulationJob`
+    """
+    with open(path) as f:
+        lines = [
+            line
+            for line in f
+            if line.strip() != "" and not line.lstrip().startswith("#")
+        ]
+    is_json = str(path).endswith((".jsonl", ".json")) or (
+        len(lines) > 0 and lines[0].lstrip().startswith("{")
+    )
+    if is_json:
+        rows = []
+        for j, line in enumerate(lines):
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in row {j} of {path}: {e}")
+    else:
+        rows = list(csv.DictReader(lines, delimiter="\t"))
+    jobs = []
+    for j, row in enumerate(rows):
+        try:
+            jobs.append(_manifest_row_to_job(row, engine))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid row {j} of manifest {path}: {e}")
+    return jobs
+
+
+def _job_key(job):
+    # Identifies a manifest row in the journal, so that edited rows are rerun.
+    fields = attr.asdict(job, filter=lambda a, v: a.name != "provenance")
+    if isinstance(job.demographic_model, stdgrimmsim.DemographicModel):
+        fields["demographic_model"] = job.demographic_model.id
+    data = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _read_journal(journal):
+    root_seed = None
+    completed = {}
+    if os.path.exists(journal):
+        with open(journal) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from an interrupted run.
+                    continue
+                if "root_seed" in record:
+                    root_seed = record["root_seed"]
+                else:
+                    completed[record["row"]] = record["key"]
+    return root_seed, completed
+
+
+def _append_journal(f, record):
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def run_manifest(
+    path,
+    *,
+    workers=None,
+    seed=None,
+    journal=None,
+    engine="msprime",
+    provenance=None,
+):
+    """
+    Runs the simulation jobs in the manifest file at ``path`` (see
+    :func:`.read_manifest`) using a pool of worker processes, and returns
+    an iterator over the results of the jobs in the order that they finish.
+    Every row must specify an ``output`` file, to which the tree sequence is
+    written.
+
+    Completed rows are recorded in a journal file, so that if the run is
+    interrupted it can be resumed by calling this function again: rows
+    that are recorded in the journal and whose output file exists are not
+    run again. A row that has been modified since it was completed is run
+    again. Rows that do not specify a ``seed`` get a seed derived from the
+    root ``seed`` and the row's position in the manifest. The root seed is
+    also stored in the journal, so a resumed run uses the same seeds.
+
+    :param str path: The path of the manifest file.
+    :param int workers: The number of worker processes (see
+        :func:`.run_batch`).
+    :param int seed: The root seed. If None, the seed stored in the journal
+        is used, or a new random seed if there is no journal.
+    :param str journal: The path of the journal file. Defaults to the path
+        of the manifest with ``.journal`` appended.
+    :param str engine: The ID of the simulation engine for rows that do
+        not specify one.
+    :param dict provenance: A provenance record added to each output
+        tree sequence.
+    :return: An iterator over the results of the jobs that were run; the
+        ``index`` of each result is the position of the row in the manifest.
+    :rtype: iterator of :class:`.BatchResult`
+    """
+    jobs = read_manifest(path, engine=engine)
+    for j, job in enumerate(jobs):
+        if job.output is None:
+            raise ValueError(f"Row {j} of manifest {path} has no output")
+    outputs = [os.path.abspath(job.output) for job in jobs]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError(f"Manifest {path} has duplicate outputs")
+    if journal is None:
+        journal = f"{path}.journal"
+
+    root_seed, completed = _read_journal(journal)
+    if root_seed is None:
+        root_seed = seed
+        if root_seed is None:
+            root_seed = int(np.random.SeedSequence().generate_state(1)[0])
+    elif seed is not None and seed != root_seed:
+        raise ValueError(
+            f"The seed {seed} differs from the seed {root_seed} stored in the "
+            f"journal {journal}"
+        )
+    seeds = derive_seeds(root_seed, len(jobs))
+
+    todo = []
+    for j, job in enumerate(jobs):
+        if job.seed is None:
+            job.seed = seeds[j]
+        job.provenance = provenance
+        key = _job_key(job)
+        if completed.get(j) == key and os.path.exists(job.output):
+            logger.info(f"Skipping completed row {j} ({job.output})")
+        else:
+            todo.append((j, job, key))
+    logger.info(f"Running {len(todo)} of {len(jobs)} jobs from {path}")
+    results = _run_pool(
+        _run_job,
+        ((j, job, job.seed) for j, job, _ in todo),
+        workers=workers,
+    )
+    keys = {j: key for j, _, key in todo}
+    return _journaled_results(results, journal, root_seed, keys)
+
+
+def _journaled_results(results, journal, root_seed, keys):
+    with open(journal, "a") as f:
+        if f.tell() == 0:
+            _append_journal(f, {"root_seed": root_seed})
+        for result in results:
+            _append_journal(
+                f,
+                {
+                    "row": result.index,
+                    "key": keys[result.index],
+                    "seed": result.seed,
+                    "output": result.job.output,
+                },
+            )
+            yield result
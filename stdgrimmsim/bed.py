@@ -0,0 +1,319 @@
+"""
+Reading of intervals from (optionally gzip-compressed) BED files.
+"""
+
+import collections
+import gzip
+import logging
+import os
+
+import attr
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The number of bytes read from a BED file at a time.
+_CHUNK_SIZE = 1 << 22
+
+_NEWLINE = ord("\n")
+_TAB = ord("\t")
+_SPACE = ord(" ")
+_CARRIAGE_RETURN = ord("\r")
+
+# The maximum number of BED files whose indexes are kept, and the maximum
+# number of chromosomes whose intervals are kept for each (uncompressed) file.
+_MAX_BED_INDEXES = 16
+_MAX_CACHED_CHROMOSOMES = 32
+
+# The indexes of BED files, keyed by the absolute path of the file, from
+# least to most recently used.
+_bed_indexes = collections.OrderedDict()
+
+
+def _is_gzip(path):
+    with open(path, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+
+def _open(path):
+    if _is_gzip(path):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _next_delimiter(delimiters, x, ends):
+    # Returns the position of the first delimiter at or after each position
+    # in x, or the end of the line if there is none in the line.
+    k = np.searchsorted(delimiters, x)
+    d = delimiters[np.minimum(k, len(delimiters) - 1)] if len(delimiters) > 0 else ends
+    return np.where((k < len(delimiters)) & (d < ends), d, ends)
+
+
+def _fixed_width(buf, starts, lengths, width):
+    # Returns the bytes of buf from each of the starts, of the specified
+    # lengths, padded (or truncated) to the specified width.
+    out = np.zeros((len(starts), width), dtype=np.uint8)
+    for j in range(width):
+        in_field = lengths > j
+        out[in_field, j] = buf[starts[in_field] + j]
+    return out
+
+
+def _delimiters(buf):
+    # Returns the sorted positions of the starts of the runs of delimiters
+    # (tabs or spaces) in buf, and of the starts of the fields after them.
+    delimiters = np.flatnonzero((buf == _TAB) | (buf == _SPACE))
+    if len(delimiters) == 0:
+        return delimiters, delimiters
+    gaps = np.diff(delimiters) != 1
+    run_starts = delimiters[np.concatenate([[True], gaps])]
+    field_starts = delimiters[np.concatenate([gaps, [True]])] + 1
+    return run_starts, field_starts
+
+
+def _split_lines(buf):
+    """
+    Splits the buffer ``buf`` of complete lines (ending with a newline) into
+    lines, and returns the positions of the starts, ends (excluding any
+    carriage return) and newlines of the data lines, the end of the first
+    field (or line) of each data line, and the delimiters of the buffer, as
+    returned by :func:`_delimiters`. Fields are separated by runs of tabs or
+    spaces. Empty lines, comments and track and browser lines are skipped.
+    """
+    newlines = np.flatnonzero(buf == _NEWLINE)
+    starts = np.concatenate([[0], newlines[:-1] + 1])
+    ends = newlines - (buf[np.maximum(newlines - 1, 0)] == _CARRIAGE_RETURN)
+    ends = np.maximum(ends, starts)
+    first = buf[starts]
+    keep = (ends > starts) & (first != ord("#"))
+    # Only the lines starting with a "t" or a "b" may be track or browser lines.
+    special = np.flatnonzero(keep & ((first == ord("t")) | (first == ord("b"))))
+    if len(special) > 0:
+        prefix = _fixed_width(buf, starts[special], ends[special] - starts[special], 7)
+        for word in [b"track", b"browser"]:
+            w = np.frombuffer(word, dtype=np.uint8)
+            keep[special[np.all(prefix[:, : len(w)] == w, axis=1)]] = False
+    starts = starts[keep]
+    ends = ends[keep]
+    newlines = newlines[keep]
+    delimiters = _delimiters(buf)
+    first_ends = _next_delimiter(delimiters[0], starts, ends)
+    return starts, ends, newlines, first_ends, delimiters
+
+
+def _parse_integers(buf, starts, ends):
+    """
+    Returns the non-negative integers written in decimal at the positions
+    ``[starts, ends)`` of the buffer ``buf``.
+    """
+    lengths = ends - starts
+    if len(lengths) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if np.any(lengths == 0) or np.any(lengths > 18):
+        raise ValueError("Invalid coordinate in BED file")
+    value = np.zeros(len(starts), dtype=np.int64)
+    for j in range(np.max(lengths)):
+        # The numbers with a j-th digit.
+        index = np.flatnonzero(lengths > j)
+        digits = buf[starts[index] + j].astype(np.int64) - ord("0")
+        if np.any((digits < 0) | (digits > 9)):
+            raise ValueError("Invalid coordinate in BED file")
+        value[index] = value[index] * 10 + digits
+    return value
+
+
+def _parse_intervals(buf, lines=None):
+    """
+    Returns the intervals of the data lines in the buffer ``buf`` of complete
+    lines, as an array of int64 with two columns. The lines may be given, as
+    returned by :func:`_split_lines`.
+    """
+    if lines is None:
+        lines = _split_lines(buf)
+    starts, ends, _, first_ends, (run_starts, field_starts) = lines
+    left_starts = _next_delimiter(field_starts, first_ends, ends)
+    left_ends = _next_delimiter(run_starts, left_starts, ends)
+    right_starts = _next_delimiter(field_starts, left_ends, ends)
+    right_ends = _next_delimiter(run_starts, right_starts, ends)
+    if np.any(right_starts >= ends):
+        raise ValueError(
+            "BED files must have at least three columns (chrom, left, right), "
+            "separated by tabs or spaces"
+        )
+    left = _parse_integers(buf, left_starts, left_ends)
+    right = _parse_integers(buf, right_starts, right_ends)
+    return np.column_stack([left, right])
+
+
+def _chunks(f):
+    # Yields the offset and contents of successive chunks of complete lines
+    # of the file f.
+    offset = 0
+    remainder = b""
+    while True:
+        data = f.read(_CHUNK_SIZE)
+        if len(data) == 0:
+            break
+        data = remainder + data
+        end = data.rfind(b"\n") + 1
+        remainder = data[end:]
+        if end > 0:
+            yield offset, data[:end]
+            offset += end
+    if len(remainder) > 0:
+        yield offset, remainder + b"\n"
+
+
+@attr.s(kw_only=True)
+class BedIndex:
+    """
+    Index of the lines of a BED file by chromosome, which is built by
+    :func:`.get_bed_index`.
+
+    Seeking in a gzip-compressed file decompresses it from the start, so
+    the lines of a compressed file cannot be read one chromosome at a time.
+    Instead, the intervals of all chromosomes of a compressed file are parsed
+    while it is indexed, and kept with the index. For an uncompressed file,
+    only the lines of a chromosome are read when its intervals are requested,
+    and the intervals of the most recently used chromosomes are kept.
+
+    :ivar str path: The path to the BED file.
+    :ivar blocks: The byte offsets ``[start, end)`` of the (uncompressed)
+        runs of consecutive lines of each chromosome, keyed by chromosome name,
+        in the order in which the chromosomes first appear in the file.
+    :vartype blocks: dict
+    :ivar bool compressed: Whether the BED file is gzip-compressed.
+    """
+
+    path = attr.ib()
+    blocks = attr.ib(factory=dict)
+    compressed = attr.ib(default=False, type=bool)
+    _intervals = attr.ib(factory=collections.OrderedDict)
+
+    @classmethod
+    def build(cls, path):
+        """
+        Builds the index of the BED file ``path`` by streaming through it
+        once, a chunk at a time. If the file is gzip-compressed, the
+        intervals of all chromosomes are parsed at the same time.
+        """
+        compressed = _is_gzip(path)
+        blocks = {}
+        intervals = {}
+        last_chrom = None
+        with _open(path) as f:
+            for offset, data in _chunks(f):
+                buf = np.frombuffer(data, dtype=np.uint8)
+                lines = _split_lines(buf)
+                starts, _, newlines, first_ends, _ = lines
+                if len(starts) == 0:
+                    continue
+                if compressed:
+                    chunk_intervals = _parse_intervals(buf, lines)
+                lengths = first_ends - starts
+                names = _fixed_width(buf, starts, lengths, np.max(lengths))
+                names = names.view(f"S{names.shape[1]}").ravel()
+                # The lines at which a new run of lines of a chromosome starts.
+                run_starts = np.flatnonzero(np.append(True, names[1:] != names[:-1]))
+                run_ends = np.append(run_starts[1:], len(starts)) - 1
+                for j, k in zip(run_starts, run_ends):
+                    chrom = names[j].decode()
+                    start = offset + int(starts[j])
+                    end = offset + int(newlines[k]) + 1
+                    if chrom == last_chrom:
+                        blocks[chrom][-1][1] = end
+                    else:
+                        blocks.setdefault(chrom, []).append([start, end])
+                    last_chrom = chrom
+                    if compressed:
+                        intervals.setdefault(chrom, []).append(
+                            chunk_intervals[j : k + 1]
+                        )
+        logger.debug(f"Indexed {len(blocks)} chromosomes in BED file {path}")
+        intervals = collections.OrderedDict(
+            (chrom, np.concatenate(arrays)) for chrom, arrays in intervals.items()
+        )
+        return cls(path=path, blocks=blocks, compressed=compressed, intervals=intervals)
+
+    @property
+    def chromosomes(self):
+        """
+        The names of the chromosomes in the BED file, in order of appearance.
+        """
+        return list(self.blocks.keys())
+
+    def _read_blocks(self, blocks):
+        intervals = [np.zeros((0, 2), dtype=np.int64)]
+        with _open(self.path) as f:
+            for start, end in sorted(blocks):
+                f.seek(start)
+                data = f.read(end - start)
+                if not data.endswith(b"\n"):
+                    # The last line of the file may not end with a newline.
+                    data += b"\n"
+                intervals.append(_parse_intervals(np.frombuffer(data, dtype=np.uint8)))
+        return np.concatenate(intervals)
+
+    def get_intervals(self, chrom=None):
+        """
+        Returns the intervals of the lines of the specified chromosome, in
+        the order in which they appear in the BED file, as an array of int64
+        with two columns (the left and right coordinates). For an uncompressed
+        file, only the lines of this chromosome are read and parsed, and the
+        result is cached. If ``chrom`` is None, returns the intervals of all
+        lines of the file.
+
+        :param str chrom: The name of the chromosome, which must match the
+            name in the BED file exactly.
+        :rtype: numpy.ndarray
+        """
+        if chrom is None:
+            blocks = [block for blocks in self.blocks.values() for block in blocks]
+            return self._read_blocks(blocks)
+        if self.compressed:
+            if chrom not in self._intervals:
+                return np.zeros((0, 2), dtype=np.int64)
+        elif chrom in self._intervals:
+            self._intervals.move_to_end(chrom)
+        else:
+            self._intervals[chrom] = self._read_blocks(self.blocks.get(chrom, []))
+            while len(self._intervals) > _MAX_CACHED_CHROMOSOMES:
+                self._intervals.popitem(last=False)
+        return self._intervals[chrom].copy()
+
+
+def get_bed_index(path):
+    """
+    Returns the :class:`.BedIndex` of the BED file ``path``, which may be
+    gzip-compressed. The index is built the first time it is used, and
+    rebuilt if the file changes. The indexes of the most recently used
+    files are kept in memory, see :func:`.clear_bed_cache`.
+
+    :param str path: The path to the BED file.
+    :rtype: :class:`.BedIndex`
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    if path not in _bed_indexes or _bed_indexes[path][0] != signature:
+        _bed_indexes[path] = (signature, BedIndex.build(path))
+        while len(_bed_indexes) > _MAX_BED_INDEXES:
+            _bed_indexes.popitem(last=False)
+    _bed_indexes.move_to_end(path)
+    return _bed_indexes[path][1]
+
+
+def clear_bed_cache():
+    """
+    Discards the indexes (and cached intervals) of all BED files.
+    """
+    _bed_indexes.clear()
+
+
+def read_bed(path, chrom):
+    """
+    Returns the intervals of the chromosome ``chrom`` in the BED file ``path``
+    (columns specify chrom, left, right, and additional columns are ignored)
+    as an array of int64 with two columns. See :meth:`.BedIndex.get_intervals`.
+    """
+    return get_bed_index(path).get_intervals(chrom)
@@ -1,7 +1,10 @@
 """
-Cache handling for downloaded data.
+Cache handling for downloaded data and simulation results.
 """
 
+import contextlib
+import dataclasses
+import hashlib
 import pathlib
 import logging
 import os
@@ -11,9 +14,23 @@ import warnings
 
 import appdirs
 import attr
+import msprime
+import numpy as np
+import tskit
 
+import stdgrimmsim
 from . import utils
 
+# fcntl is from the standard library, but it's not available on Windows,
+# where the result cache falls back to not locking.
+_fcntl_module_available = False
+try:
+    import fcntl
+
+    _fcntl_module_available = True
+except ImportError:
+    pass
+
 logger = logging.getLogger(__name__)
 
 _cache_dir = None
@@ -51,6 +68,53 @@ def get_cache_dir():
 
 set_cache_dir()
 
+_scratch_dir = None
+
+
+def _default_scratch_dir():
+    # /dev/shm is memory backed on Linux, which avoids writing short-lived
+    # files to a (possibly networked) disk.
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK | os.X_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+def set_scratch_dir(scratch_dir=None):
+    """
+    The scratch_dir is the directory in which stdgrimmsim writes the
+    short-lived files of a simulation, such as the SLiM script and the tree
+    sequence written by SLiM, which are removed when the simulation finishes.
+    If the specified scratch_dir is not None, this value is converted to a
+    pathlib.Path instance, which is used as the scratch directory. If
+    scratch_dir is None (the default), the scratch directory is set either
+    from the environment variable `STDPOPSIM_SCRATCH` if it exists, or set to
+    the memory-backed ``/dev/shm`` if it is a writable directory, or otherwise
+    to the default temporary directory (see :func:`tempfile.gettempdir`).
+
+    No checks for existance, writability, etc. are performed on a specified
+    scratch_dir by this function.
+    """
+    if scratch_dir is None:
+        scratch_dir = os.environ.get("STDPOPSIM_SCRATCH", None)
+    if scratch_dir is None:
+        scratch_dir = _default_scratch_dir()
+    global _scratch_dir
+    _scratch_dir = pathlib.Path(scratch_dir)
+    logger.debug(f"Set scratch_dir to {_scratch_dir}")
+
+
+def get_scratch_dir():
+    """
+    Returns the directory in which stdgrimmsim writes the temporary files of
+    simulations as a pathlib.Path instance. See :func:`.set_scratch_dir` for
+    how this value can be set.
+    """
+    return _scratch_dir
+
+
+set_scratch_dir()
+
 
 @attr.s(kw_only=True)
 class CachedData:
@@ -176,3 +240,338 @@ class CachedData:
             # Write out the checksum.
             with open(self.sha256_file, "w") as f:
                 print(self.sha256, file=f)
+
+
+def _hash_update(h, obj):
+    """
+    Updates the hash object ``h`` with a stable representation of ``obj``,
+    which must be built from basic Python types, numpy arrays, attrs classes
+    and dataclasses (such as the msprime demography classes). Raises a
+    TypeError for any other kind of object.
+    """
+    if obj is None or isinstance(obj, (bool, int, str)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, float):
+        h.update(f"float:{obj.hex()};".encode())
+    elif isinstance(obj, np.generic):
+        _hash_update(h, obj.item())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"ndarray:{obj.dtype.str}:{obj.shape};".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}:{len(obj)};".encode())
+        for value in obj:
+            _hash_update(h, value)
+    elif isinstance(obj, (set, frozenset)):
+        h.update(f"set:{len(obj)};".encode())
+        for value in sorted(_stable_hash(value) for value in obj):
+            h.update(value.encode())
+    elif isinstance(obj, dict):
+        h.update(f"dict:{len(obj)};".encode())
+        for key, value in sorted(obj.items(), key=lambda item: _stable_hash(item[0])):
+            _hash_update(h, key)
+            _hash_update(h, value)
+    elif isinstance(obj, stdgrimmsim.Species):
+        # Species are identified by their ID, as the species definition only
+        # affects simulations through the other parameters, except for the
+        # life history used by the SLiM engine.
+        h.update(f"Species:{obj.id};".encode())
+        _hash_update(h, obj.separate_sexes)
+    elif isinstance(obj, stdgrimmsim.GeneticMap):
+        # The rates are in the contig's recombination map.
+        h.update(f"GeneticMap:{obj.species.id}/{obj.id};".encode())
+    elif isinstance(obj, msprime.RateMap):
+        h.update(b"RateMap;")
+        _hash_update(h, obj.position)
+        _hash_update(h, obj.rate)
+    elif attr.has(type(obj)):
+        h.update(f"{type(obj).__qualname__};".encode())
+        for field in attr.fields(type(obj)):
+            _hash_update(h, field.name)
+            _hash_update(h, getattr(obj, field.name))
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        h.update(f"{type(obj).__qualname__};".encode())
+        for field in dataclasses.fields(obj):
+            value = getattr(obj, field.name)
+            # The msprime demographic events refer back to their Demography.
+            if isinstance(value, msprime.Demography):
+                continue
+            _hash_update(h, field.name)
+            _hash_update(h, value)
+    else:
+        raise TypeError(f"Cannot compute a stable hash of {type(obj)}")
+
+
+def _stable_hash(obj):
+    """
+    Returns the hex SHA256 digest of a stable representation of ``obj``,
+    which does not depend on the process or on object identities. See
+    :func:`_hash_update` for the supported types.
+    """
+    h = hashlib.sha256()
+    _hash_update(h, obj)
+    return h.hexdigest()
+
+
+@attr.s(kw_only=True)
+class ResultCache:
+    """
+    A cache of simulated tree sequences, keyed by a hash of all the inputs
+    of the simulation. See :func:`.enable_result_cache`.
+
+    The cache is safe to use from several processes at once: results are
+    written to a temporary file and atomically moved into place, and
+    eviction is serialised with a lock file. When the total size of the
+    cached results exceeds ``max_size``, the least recently used results
+    are removed.
+
+    :ivar path: The directory in which the results are stored.
+    :vartype path: pathlib.Path
+    :ivar max_size: The maximum total size of the cached results, in bytes.
+    :vartype max_size: int
+    """
+
+    path = attr.ib(converter=pathlib.Path)
+    max_size = attr.ib(default=2**30, type=int)
+
+    @max_size.validator
+    def _check_max_size(self, attribute, value):
+        if value < 0:
+            raise ValueError("max_size must be non-negative")
+
+    def key(
+        self,
+        *,
+        engine,
+        version,
+        demographic_model,
+        contig,
+        samples,
+        seed,
+        params=None,
+    ):
+        """
+        Returns the key under which the result of a simulation with the
+        specified inputs is stored, or None if the result should not be
+        cached. Results are only cached if the seed is specified, as
+        otherwise each simulation is expected to differ.
+
+        :param str engine: The ID of the simulation engine.
+        :param str version: The version of the simulation engine.
+        :param demographic_model: The demographic model.
+        :type demographic_model: :class:`.DemographicModel`
+        :param contig: The contig.
+        :type contig: :class:`.Contig`
+        :param samples: The samples, as passed to the engine.
+        :param int seed: The random seed.
+        :param dict params: Further engine specific parameters that affect
+            the result of the simulation.
+        :rtype: str
+        """
+        if seed is None:
+            return None
+        inputs = {
+            "stdgrimmsim": stdgrimmsim.__version__,
+            "engine": engine,
+            "version": version,
+            "demography": demographic_model.model,
+            "contig": contig,
+            "samples": samples,
+            "seed": int(seed),
+            "params": {} if params is None else params,
+        }
+        try:
+            return _stable_hash(inputs)
+        except TypeError as e:
+            logger.debug(f"Not caching simulation result: {e}")
+            return None
+
+    def _path(self, key):
+        return self.path / key[:2] / f"{key}.trees"
+
+    def get(self, key):
+        """
+        Returns the tree sequence stored under the specified key, or None
+        if there is no such result.
+
+        :param str key: The key returned by :meth:`.key`.
+        :rtype: :class:`tskit.TreeSequence`
+        """
+        if key is None:
+            return None
+        path = self._path(key)
+        try:
+            ts = tskit.load(path)
+        except FileNotFoundError:
+            return None
+        except (tskit.FileFormatError, OSError) as e:
+            logger.warning(f"Removing unreadable cached result {path}: {e}")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        # Mark the result as recently used.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        logger.info(f"Loaded cached simulation result {path}")
+        return ts
+
+    def put(self, key, ts):
+        """
+        Stores the tree sequence under the specified key, then evicts
+        results as needed to keep the cache within ``max_size``.
+
+        :param str key: The key returned by :meth:`.key`.
+        :param ts: The tree sequence.
+        :type ts: :class:`tskit.TreeSequence`
+        """
+        if key is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{key}.tmp{os.getpid()}"
+        try:
+            ts.dump(tmp_path)
+            self.put_file(key, tmp_path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+
+    def get_file(self, key):
+        """
+        Returns the path of the file stored under the specified key, and
+        marks it as recently used, or returns None if there is no such file.
+
+        :param str key: The key.
+        :rtype: pathlib.Path
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put_file(self, key, filename):
+        """
+        Moves the file ``filename``, which must be on the same file system as
+        the cache, into the cache under the specified key, then evicts files
+        as needed to keep the cache within ``max_size``. Returns the path of
+        the stored file, or None if it was evicted, because it is larger than
+        ``max_size`` on its own.
+
+        :param str key: The key.
+        :param str filename: The file to store.
+        :rtype: pathlib.Path
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(filename, path)
+        logger.debug(f"Stored {path} in the cache")
+        self._evict()
+        return path if path.exists() else None
+
+    @contextlib.contextmanager
+    def _lock(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / ".lock", "a") as f:
+            if _fcntl_module_available:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if _fcntl_module_available:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _entries(self):
+        entries = []
+        for path in self.path.glob("*/*.trees"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    @property
+    def size(self):
+        """
+        The total size of the cached results, in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        with self._lock():
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                logger.debug(f"Evicting cached simulation result {path}")
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                total -= size
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        with self._lock():
+            for _, _, path in self._entries():
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+
+_result_cache = None
+
+
+def enable_result_cache(path=None, *, max_size=2**30):
+    """
+    Enables caching of simulation results. When enabled, the result of each
+    simulation run with a specified seed is stored, and
+    :meth:`.Engine.simulate` returns the stored result instead of running
+    the same simulation again. Simulations are considered the same if they
+    use the same demographic model, contig (including rate maps, masks and
+    DFEs), samples, engine, engine version, engine parameters and seed.
+
+    The result cache can also be enabled by setting the environment
+    variable ``STDPOPSIM_RESULT_CACHE`` to the path of the cache directory,
+    which also enables it in worker processes.
+
+    :param str path: The directory in which to store the results. Defaults
+        to the ``results`` directory in the cache directory (see
+        :func:`.get_cache_dir`).
+    :param int max_size: The maximum total size of the stored results in
+        bytes (default 1 GiB). The least recently used results are removed
+        when this is exceeded.
+    :return: The result cache.
+    :rtype: :class:`.ResultCache`
+    """
+    global _result_cache
+    if path is None:
+        path = get_cache_dir() / "results"
+    _result_cache = ResultCache(path=path, max_size=max_size)
+    logger.info(f"Enabled result cache in {_result_cache.path}")
+    return _result_cache
+
+
+def disable_result_cache():
+    """
+    Disables caching of simulation results. Results that have already been
+    stored are not removed.
+    """
+    global _result_cache
+    _result_cache = None
+
+
+def get_result_cache():
+    """
+    Returns the result cache if it is enabled (see
+    :func:`.enable_result_cache`), or None otherwise.
+
+    :rtype: :class:`.ResultCache`
+    """
+    return _result_cache
+
+
+if os.environ.get("STDPOPSIM_RESULT_CACHE"):
+    enable_result_cache(os.environ["STDPOPSIM_RESULT_CACHE"])
@@ -1,8 +1,52 @@
+import ast
+import functools
+import importlib
 import pathlib
 
-# Import all species definitions in the catalog.
+# The species definitions in the catalog are not imported here, but on demand
+# by stdgrimmsim.get_species(), so that importing stdgrimmsim does not build
+# every species. Note that ``from stdgrimmsim.catalog import *`` still imports
+# all of them.
 __all__ = []
-for path in pathlib.Path(__path__[0]).glob("*"):
+for path in sorted(pathlib.Path(__path__[0]).glob("*")):
     module_name = path.parts[-1]
     if module_name[0].isupper():
         __all__.append(module_name)
+
+
+def _load_species(species_id):
+    """
+    Imports the catalog definitions for the specified species, which
+    registers the species and its demographic models, DFEs etc.
+    """
+    importlib.import_module(f"{__name__}.{species_id}")
+
+
+@functools.lru_cache(maxsize=None)
+def _species_index():
+    """
+    Returns a dict mapping the ID of each species in the catalog to its
+    name. The names are read from the species definitions without importing
+    them, so this is cheap. Species whose definition does not have a literal
+    name are omitted.
+    """
+    index = {}
+    for species_id in __all__:
+        path = pathlib.Path(__path__[0]) / species_id / "species.py"
+        try:
+            tree = ast.parse(path.read_text())
+        except (OSError, SyntaxError):
+            continue
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Call)
+                and getattr(node.func, "attr", None) == "Species"
+            ):
+                kwargs = {
+                    kw.arg: kw.value.value
+                    for kw in node.keywords
+                    if isinstance(kw.value, ast.Constant)
+                }
+                if kwargs.get("id") == species_id and "name" in kwargs:
+                    index[species_id] = kwargs["name"]
+    return index
@@ -143,10 +143,10 @@ def get_models_help(species_id, model_id):
 
         models_text += indent + "Populations:\n"
 
-        for population in model.populations:
+        for population in model.population_metadata:
             if population.allow_samples:
                 models_text += indent * 2
-                models_text += f"{population.name}: {population.description}\n"
+                models_text += f"{population.id}: {population.description}\n"
         models_text += "\n"
 
     return models_text
@@ -346,10 +346,18 @@ def write_output(ts, args):
     """
     Adds provenance information to the specified tree sequence (ensuring that the
     output is reproducible) and write the resulting tree sequence to output.
+    If the output format is "genotypes", the genotypes are instead written
+    to the output directory, with the provenance recorded in the metadata.
     """
+    provenance = get_provenance_dict()
+    if getattr(args, "format", "trees") == "genotypes":
+        if args.output is None:
+            exit("An output directory must be specified to write genotypes.")
+        logger.debug(f"Writing genotypes to {args.output}")
+        stdgrimmsim.write_genotypes(ts, args.output, provenance=provenance)
+        return
     tables = ts.dump_tables()
     logger.debug("Updating provenance")
-    provenance = get_provenance_dict()
     tables.provenances.add_row(json.dumps(provenance))
     ts = tables.tree_sequence()
     if args.output is None:
@@ -532,19 +540,43 @@ def add_simulate_species_parser(parser, species):
     for chrom in species.genome.chromosomes:
         choices.append(chrom.id)
         all_choices.extend([chrom.id] + chrom.synonyms)
+
+    def chromosome_type(value):
+        # A single chromosome, "all", or a comma separated list of chromosomes.
+        if value != "all":
+            for chrom_id in value.split(","):
+                if chrom_id not in all_choices:
+                    raise argparse.ArgumentTypeError(
+                        f"invalid choice: '{chrom_id}' "
+                        f"(choose from {', '.join(choices)}, or 'all')"
+                    )
+        return value
+
     species_parser.add_argument(
         "-c",
         "--chromosome",
-        choices=all_choices,
+        type=chromosome_type,
         metavar="",
         default=None,
         help=(
             f"Simulate a specific chromosome. If no chromosome is given, "
             f"simulate a generic contig of given length, specified using --length. "
+            f"Several chromosomes can be simulated in parallel by giving a "
+            f"comma separated list, or 'all' for all autosomes; each chromosome "
+            f"is then written to its own output file (see --output). "
             f"Options: {', '.join(choices)}. "
             f"Default=None."
         ),
     )
+    species_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=(
+            "The number of worker processes used when simulating several "
+            "chromosomes. Defaults to the number of CPUs."
+        ),
+    )
 
     species_parser.add_argument(
         "-L",
@@ -660,6 +692,9 @@ def add_simulate_species_parser(parser, species):
     bed_help = (
         "A bed file specifing the intervals where selection (given a DFE) is simulated. "
         "Non-overlapping intervals belonging to the same chromosome are required. "
+        "The file may be gzip-compressed, and its columns (chrom, left, right) "
+        "may be separated by tabs or spaces; only the lines of the simulated "
+        "chromosome are used. "
         "If no interval is specified, "
         "selection is simulated across the entire contig. "
         "See also --dfe-interval and --dfe-annotation."
@@ -702,7 +737,20 @@ def add_simulate_species_parser(parser, species):
         "--output",
         help=(
             "Where to write the output tree sequence file. Defaults to "
-            "stdout if not specified"
+            "stdout if not specified. When simulating several chromosomes, "
+            "the chromosome ID replaces '{chromosome}' in the file name, or "
+            "is otherwise inserted before the file extension."
+        ),
+    )
+    species_parser.add_argument(
+        "--format",
+        choices=["trees", "genotypes"],
+        default="trees",
+        help=(
+            "The output format. 'trees' writes a tskit tree sequence file; "
+            "'genotypes' writes a directory of memory-mappable numpy arrays "
+            "with the bit-packed haplotypes, site positions and sample "
+            "populations (see stdgrimmsim.load_genotypes). Default='trees'."
         ),
     )
 
@@ -748,6 +796,9 @@ def add_simulate_species_parser(parser, species):
                 "engine."
             )
 
+        if args.format == "genotypes" and args.output is None:
+            exit("An output directory must be specified to write genotypes.")
+
         samples = stdgrimmsim.utils.parse_population_sample_pairs(args.samples)
         if isinstance(samples, list):
             # TODO: For back-compatibility with deprecated positional sample
@@ -756,6 +807,12 @@ def add_simulate_species_parser(parser, species):
         else:
             assert isinstance(samples, dict)
 
+        if args.chromosome is not None and (
+            args.chromosome == "all" or "," in args.chromosome
+        ):
+            run_genome_simulation(args, model, samples, qc_complete)
+            return
+
         contig = species.get_contig(
             args.chromosome,
             genetic_map=args.genetic_map,
@@ -814,10 +871,25 @@ def add_simulate_species_parser(parser, species):
                         "selected. Please only use one."
                     )
                 annot = species.get_annotations(args.dfe_annotation)
-                intervals = annot.get_chromosome_annotations(args.chromosome)
+                _, left, right = contig.coordinates
+                intervals = annot.get_intervals(args.chromosome, left, right)
                 intervals_summary_str = f"{annot.id} elements on {args.chromosome}"
             if args.dfe_bed_file is not None:
-                intervals = np.loadtxt(args.dfe_bed_file, usecols=[1, 2], dtype="int")
+                bed_index = stdgrimmsim.bed.get_bed_index(args.dfe_bed_file)
+                bed_chrom = args.chromosome
+                if bed_chrom is not None and bed_chrom not in bed_index.chromosomes:
+                    # The bed file may use another name for the chromosome.
+                    chrom = species.genome.get_chromosome(bed_chrom)
+                    for name in [chrom.id] + chrom.synonyms:
+                        if name in bed_index.chromosomes:
+                            bed_chrom = name
+                            break
+                intervals = bed_index.get_intervals(bed_chrom)
+                if len(intervals) == 0:
+                    exit(
+                        f"No intervals found for chromosome {args.chromosome} "
+                        f"in the DFE bed file {args.dfe_bed_file}."
+                    )
                 left = np.min(intervals)
                 right = np.max(intervals)
                 intervals_summary_str = f"[{left}, {right})"
@@ -846,19 +918,7 @@ def add_simulate_species_parser(parser, species):
             seed=args.seed,
         )
         if not qc_complete:
-            warnings.warn(
-                stdgrimmsim.QCMissingWarning(
-                    f"{model.id} has not been QCed. Use at your own risk! "
-                    "Demographic models that have not undergone stdgrimmsim's "
-                    "Quality Control procedure may contain implementation "
-                    "errors, leading to differences between simulations "
-                    "and the model described in the original publication. "
-                    "More information about the QC process can be found in "
-                    "the developer documentation. "
-                    "https://popsim-consortium.github.io/stdgrimmsim-docs/"
-                    "latest/development.html#demographic-model-review-process"
-                )
-            )
+            warn_qc_missing(model)
 
         # extract simulate() parameters from CLI args
         accepted_params = inspect.signature(engine.simulate).parameters.keys()
@@ -876,9 +936,108 @@ def add_simulate_species_parser(parser, species):
         if args.bibtex_file is not None:
             write_bibtex(engine, model, contig, species, args.bibtex_file, dfe)
 
+    def run_genome_simulation(args, model, samples, qc_complete):
+        # Simulates several chromosomes in parallel, one output file each.
+        unsupported = {
+            "--length": args.length,
+            "--length-multiplier": args.length_multiplier,
+            "--left": args.left,
+            "--right": args.right,
+            "--dfe": args.dfe,
+            "--dfe-interval": args.dfe_interval,
+            "--dfe-bed-file": args.dfe_bed_file,
+            "--dfe-annotation": args.dfe_annotation,
+        }
+        for option, value in unsupported.items():
+            if value is not None:
+                exit(f"Option {option} cannot be used with multiple chromosomes.")
+        if args.output is None:
+            exit("An output file must be specified with multiple chromosomes.")
+        if args.chromosome == "all":
+            chromosomes = [chrom.id for chrom in species.genome.autosomes]
+        else:
+            chromosomes = args.chromosome.split(",")
+        contig_kwargs = dict(
+            genetic_map=args.genetic_map,
+            inclusion_mask=args.inclusion_mask,
+            exclusion_mask=args.exclusion_mask,
+            mutation_rate=model.mutation_rate,
+            recombination_rate=model.recombination_rate,
+        )
+        engine = stdgrimmsim.get_engine(args.engine)
+        logger.info(
+            f"Running simulation model {model.id} for {species.id} on "
+            f"chromosomes {', '.join(chromosomes)} using {engine.id}."
+        )
+        for chrom_id in chromosomes:
+            contig = species.get_contig(chrom_id, **contig_kwargs)
+            write_simulation_summary(
+                engine=engine,
+                model=model,
+                contig=contig,
+                samples=samples,
+                dfe=None,
+                dfe_interval=None,
+                seed=args.seed,
+            )
+        if not qc_complete:
+            warn_qc_missing(model)
+
+        accepted_params = inspect.signature(engine.simulate).parameters.keys()
+        engine_kwargs = {
+            k: v
+            for k, v in vars(args).items()
+            if k in accepted_params
+            and k not in ["demographic_model", "contig", "samples", "seed"]
+        }
+        # Tree sequences are written by the workers, so that they aren't
+        # sent back to this process. Genotypes are written here.
+        write_trees = getattr(args, "format", "trees") == "trees"
+        results = stdgrimmsim.simulate_genome(
+            species,
+            model,
+            samples,
+            chromosomes=chromosomes,
+            engine=engine.id,
+            seed=args.seed,
+            workers=args.workers,
+            output=args.output if write_trees else None,
+            provenance=get_provenance_dict() if write_trees else None,
+            contig_kwargs=contig_kwargs,
+            engine_kwargs=engine_kwargs,
+        )
+        for chrom_id, result in results:
+            if not write_trees and result is not None:
+                output = stdgrimmsim.chromosome_output_path(args.output, chrom_id)
+                write_output(
+                    result, argparse.Namespace(**dict(vars(args), output=output))
+                )
+
+        summarise_usage()
+        if qc_complete:
+            write_citations(engine, model, contig, species, None)
+        if args.bibtex_file is not None:
+            write_bibtex(engine, model, contig, species, args.bibtex_file, None)
+
     species_parser.set_defaults(runner=run_simulation)
 
 
+def warn_qc_missing(model):
+    warnings.warn(
+        stdgrimmsim.QCMissingWarning(
+            f"{model.id} has not been QCed. Use at your own risk! "
+            "Demographic models that have not undergone stdgrimmsim's "
+            "Quality Control procedure may contain implementation "
+            "errors, leading to differences between simulations "
+            "and the model described in the original publication. "
+            "More information about the QC process can be found in "
+            "the developer documentation. "
+            "https://popsim-consortium.github.io/stdgrimmsim-docs/"
+            "latest/development.html#demographic-model-review-process"
+        )
+    )
+
+
 def write_simulation_summary(
     engine, model, contig, samples, dfe, dfe_interval, seed=None
 ):
@@ -954,6 +1113,10 @@ def write_simulation_summary(
     logger.warning(dry_run_text)
 
 
+def add_species_parser_by_id(parser, species_id):
+    add_simulate_species_parser(parser, get_species_wrapper(species_id))
+
+
 def run_download_genetic_maps(args):
     species_names = [args.species]
     if args.species is None:
@@ -970,7 +1133,29 @@ def run_download_genetic_maps(args):
             genetic_map.download()
 
 
-def stdgrimmsim_cli_parser():
+def run_batch_manifest(args):
+    try:
+        results = stdgrimmsim.run_manifest(
+            args.manifest,
+            workers=args.workers,
+            seed=args.seed,
+            journal=args.journal,
+            engine=args.engine,
+            provenance=get_provenance_dict(),
+        )
+        for result in results:
+            logger.info(
+                f"Completed row {result.index} with seed {result.seed}: "
+                f"{result.job.output}"
+            )
+    except (OSError, ValueError) as e:
+        exit(str(e))
+    summarise_usage()
+
+
+def _top_level_parser(**kwargs):
+    # Returns the parser of the options that come before the subcommand.
+    # The keyword arguments are passed to argparse.ArgumentParser.
     class QuietAction(argparse.Action):
         def __call__(self, parser, namespace, values, option_string=None):
             namespace.verbose = 0
@@ -979,7 +1164,8 @@ def stdgrimmsim_cli_parser():
         description=(
             "Command line interface for stdgrimmsim - "
             "German folklore population genetic simulations."
-        )
+        ),
+        **kwargs,
     )
     top_parser.add_argument(
         "-V",
@@ -1017,6 +1203,20 @@ def stdgrimmsim_cli_parser():
         ),
     )
 
+    top_parser.add_argument(
+        "--scratch-dir",
+        type=str,
+        default=None,
+        help=(
+            "Set the directory for the temporary files of simulations, such "
+            "as the output of SLiM, to the specified value. "
+            "Note that this can also be set using the environment variable "
+            "STDPOPSIM_SCRATCH. If both the environment variable and this "
+            "option are set, the option takes precedence. "
+            f"Default: {stdgrimmsim.get_scratch_dir()}"
+        ),
+    )
+
     top_parser.add_argument(
         "-e",
         "--engine",
@@ -1063,6 +1263,15 @@ def stdgrimmsim_cli_parser():
         help="Change to the specified simulation MODEL at generation T. "
         "This option may provided multiple times.",
     )
+    msprime_parser.add_argument(
+        "--msprime-skip-masked",
+        action="store_true",
+        default=False,
+        help="Don't simulate the ancestry of the intervals removed by the "
+        "inclusion or exclusion mask. The unmasked intervals are simulated "
+        "end to end, with the recombination rate of each masked gap "
+        "concentrated at a single base pair.",
+    )
 
     def slim_exec(path):
         # Hack to set the SLIM environment variable at parse time,
@@ -1070,6 +1279,27 @@ def stdgrimmsim_cli_parser():
         os.environ["SLIM"] = path
         return path
 
+    def scaling_factor(value):
+        if value == "auto":
+            return value
+        return float(value)
+
+    def memory_size(value):
+        # A number of bytes, optionally with a K, M, G or T suffix.
+        units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+        value = value.strip().upper().removesuffix("B")
+        if value[-1:] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+
+    def cost_model(path):
+        # A JSON file with the coefficients of a SLiMCostModel.
+        try:
+            with open(path) as f:
+                return stdgrimmsim.SLiMCostModel(**json.load(f))
+        except OSError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
     slim_parser = top_parser.add_argument_group("SLiM specific parameters")
     slim_parser.add_argument(
         "--slim-path",
@@ -1088,11 +1318,39 @@ def stdgrimmsim_cli_parser():
         "--slim-scaling-factor",
         metavar="Q",
         default=1,
-        type=float,
+        type=scaling_factor,
         help="Rescale model parameters by Q to speed up simulation. "
         "See SLiM manual: `5.5 Rescaling population sizes to "
-        "improve simulation performance`. "
-        "[default=%(default)s].",
+        "improve simulation performance`. If 'auto', use the smallest Q "
+        "for which the predicted runtime and memory use are within "
+        "--slim-max-runtime and --slim-max-memory, as predicted by "
+        "--slim-cost-model [default=%(default)s].",
+    )
+    slim_parser.add_argument(
+        "--slim-cost-model",
+        metavar="FILE",
+        default=None,
+        type=cost_model,
+        help="A JSON file with the runtime_coefficients and memory_coefficients "
+        "of a SLiMCostModel fitted to benchmark runs, which is required by "
+        "--slim-scaling-factor=auto. It is written by running "
+        "`python -m maintenance fit-slim-cost-model FILE` from a stdgrimmsim "
+        "source checkout, which benchmarks SLiM on this machine.",
+    )
+    slim_parser.add_argument(
+        "--slim-max-runtime",
+        metavar="SECONDS",
+        default=None,
+        type=float,
+        help="The maximum predicted runtime with --slim-scaling-factor=auto.",
+    )
+    slim_parser.add_argument(
+        "--slim-max-memory",
+        metavar="SIZE",
+        default=None,
+        type=memory_size,
+        help="The maximum predicted memory use with --slim-scaling-factor=auto, "
+        "in bytes or with a K, M, G or T suffix (e.g. 4G).",
     )
     slim_parser.add_argument(
         "--slim-burn-in",
@@ -1102,12 +1360,75 @@ def stdgrimmsim_cli_parser():
         help="Length of the burn-in phase, in units of N generations "
         "[default=%(default)s].",
     )
+    slim_parser.add_argument(
+        "--slim-checkpoint-seed",
+        metavar="SEED",
+        default=None,
+        type=int,
+        help="Run the burn-in once with this seed, save its final state in the "
+        "cache directory, and start later simulations with the same parameters "
+        "from the saved state. Such simulations share their ancestry from "
+        "before the end of the burn-in.",
+    )
+    slim_parser.add_argument(
+        "--slim-msprime-burn-in",
+        action="store_true",
+        default=False,
+        help="Instead of a burn-in, start SLiM from a population simulated "
+        "with msprime under the first epoch of the demographic model, "
+        "carrying the non-neutral mutations of the DFEs.",
+    )
+    slim_parser.add_argument(
+        "--slim-telemetry-interval",
+        type=int,
+        default=None,
+        metavar="TICKS",
+        help="Record the wall time, population sizes, number of segregating "
+        "mutations and memory usage of SLiM every TICKS ticks, in the "
+        "top-level metadata of the output tree sequence.",
+    )
+
+    return top_parser
+
+
+def _get_subcommand(arg_list=None):
+    """
+    Returns the subcommand in the list of arguments (defaulting to
+    ``sys.argv``), or None if there is none, by parsing the options that
+    come before it.
+    """
+    parser = _top_level_parser(add_help=False, exit_on_error=False)
+    parser.add_argument("subcommand", nargs="?")
+    parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    try:
+        args, _ = parser.parse_known_args(arg_list)
+    except argparse.ArgumentError:
+        # The full parser reports the error.
+        return None
+    return args.subcommand
 
+
+def stdgrimmsim_cli_parser(species_ids=None):
+    """
+    Returns the parser of the command line interface.
+
+    Building the parser of the subcommand of a species loads the species and
+    formats its help text, so this is only done for the species in
+    ``species_ids`` (defaulting to all species). The subcommands of the other
+    species are listed in the help, but don't accept any arguments.
+    """
+    top_parser = _top_level_parser()
     subparsers = top_parser.add_subparsers(dest="subcommand")
     subparsers.required = True
 
-    for species in stdgrimmsim.all_species():
-        add_simulate_species_parser(subparsers, species)
+    # The names listed in the top-level help come from the catalog index.
+    for species_id, species_name in stdgrimmsim.species._species_names().items():
+        if species_ids is None or species_id in species_ids:
+            add_species_parser_by_id(subparsers, species_id)
+        else:
+            subparsers.add_parser(
+                species_id, help=f"Run simulations for {species_name}."
+            )
 
     download_maps_parser = subparsers.add_parser(
         "download-genetic-maps",
@@ -1139,6 +1460,50 @@ def stdgrimmsim_cli_parser():
 
     download_maps_parser.set_defaults(runner=run_download_genetic_maps)
 
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run a batch of simulations listed in a manifest file",
+        description=(
+            "Run the simulations listed in a manifest file using a pool of "
+            "worker processes. The manifest is either a JSON lines file or a "
+            "tab separated file with a header row, with one simulation per row "
+            "and the fields species, samples (e.g. 'BlackForest:5,Harz:3'), "
+            "output, and optionally model, contig (e.g. "
+            "'chromosome=1,right=1e6' or 'length=1e5'), engine, engine_kwargs "
+            "and seed. Completed rows are recorded in a journal file, so that "
+            "an interrupted batch can be resumed by running the same command "
+            "again. Rows without a seed get a seed derived from --seed and "
+            "their position in the manifest."
+        ),
+    )
+    batch_parser.add_argument("manifest", help="The manifest file.")
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="The number of worker processes. Defaults to the number of CPUs.",
+    )
+    batch_parser.add_argument(
+        "-s",
+        "--seed",
+        type=int,
+        default=None,
+        help=(
+            "The root random seed. If not specified, the seed stored in the "
+            "journal is used, or a new seed is generated."
+        ),
+    )
+    batch_parser.add_argument(
+        "-j",
+        "--journal",
+        default=None,
+        help=(
+            "The journal file recording completed rows. Defaults to the "
+            "manifest file name with '.journal' appended."
+        ),
+    )
+    batch_parser.set_defaults(runner=run_batch_manifest)
+
     return top_parser
 
 
@@ -1149,9 +1514,12 @@ def run(args):
 
 
 def stdgrimmsim_main(arg_list=None):
-    parser = stdgrimmsim_cli_parser()
+    # Only the parser of the species given on the command line is built.
+    parser = stdgrimmsim_cli_parser(species_ids=[_get_subcommand(arg_list)])
     args = parser.parse_args(arg_list)
     setup_logging(args)
     if args.cache_dir is not None:
         stdgrimmsim.set_cache_dir(args.cache_dir)
+    if args.scratch_dir is not None:
+        stdgrimmsim.set_scratch_dir(args.scratch_dir)
     run(args)
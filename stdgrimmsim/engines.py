@@ -1,3 +1,4 @@
+import dataclasses
 import logging
 import warnings
 
@@ -79,6 +80,10 @@ class Engine:
         Simulates the model for the specified contig and samples. ``demographic_model``,
         ``contig``, and ``samples`` must be specified.
 
+        If the result cache is enabled (see :func:`.enable_result_cache`) and
+        ``seed`` is specified, a previously stored result of the same
+        simulation is returned without running the simulation again.
+
         :param demographic_model: The demographic model to simulate.
         :type demographic_model: :class:`.DemographicModel`
         :param contig: The contig, defining the length, mutation rate,
@@ -96,6 +101,49 @@ class Engine:
         """
         raise NotImplementedError()
 
+    def simulate_replicates(
+        self,
+        demographic_model,
+        contig,
+        samples,
+        *,
+        num_replicates,
+        seed=None,
+        **kwargs,
+    ):
+        """
+        Returns an iterator over ``num_replicates`` independent simulations of
+        the model for the specified contig and samples. Each replicate is
+        yielded as soon as it is available, so only one tree sequence needs
+        to be held in memory at a time.
+
+        The default implementation calls :meth:`.simulate` once per replicate,
+        with a seed for each replicate derived from ``seed``. Engines may
+        override this to share setup costs between replicates.
+
+        :param num_replicates: The number of replicates to simulate.
+        :type num_replicates: int
+        :param seed: The seed for the random number generator. The seeds of
+            the individual replicates are derived from this value.
+        :type seed: int
+        :param \\**kwargs: Further arguments passed to :meth:`.simulate`.
+        :return: An iterator over succinct tree sequences.
+        :rtype: iterator of :class:`tskit.trees.TreeSequence`
+        """
+        self._check_num_replicates(num_replicates)
+        rng = np.random.default_rng(seed)
+        seeds = rng.integers(1, 2**31 - 1, size=num_replicates)
+        return (
+            self.simulate(
+                demographic_model,
+                contig,
+                samples,
+                seed=int(replicate_seed),
+                **kwargs,
+            )
+            for replicate_seed in seeds
+        )
+
     def get_version(self):
         """
         Returns the version of the engine.
@@ -104,6 +152,37 @@ class Engine:
         """
         raise NotImplementedError()
 
+    def _get_cache_key(
+        self, demographic_model, contig, samples, seed, params, **version_kwargs
+    ):
+        """
+        Returns the (cache, key) pair used to look up and store the result
+        of a simulation in the result cache (see :func:`.enable_result_cache`),
+        or (None, None) if the result cache is disabled or the result should
+        not be cached. The ``params`` are the engine specific parameters that
+        affect the result, and ``version_kwargs`` are passed to
+        :meth:`.get_version`.
+        """
+        cache = stdgrimmsim.get_result_cache()
+        if cache is None:
+            return None, None
+        key = cache.key(
+            engine=self.id,
+            version=self.get_version(**version_kwargs),
+            demographic_model=demographic_model,
+            contig=contig,
+            samples=samples,
+            seed=seed,
+            params=params,
+        )
+        if key is None:
+            return None, None
+        return cache, key
+
+    def _check_num_replicates(self, num_replicates):
+        if int(num_replicates) != num_replicates or num_replicates < 1:
+            raise ValueError("num_replicates must be a positive integer")
+
     def _warn_mutation_rate_mismatch(self, contig, demographic_model):
         if demographic_model.mutation_rate is not None and not math.isclose(
             demographic_model.mutation_rate, contig.mutation_rate
@@ -135,6 +214,296 @@ class Engine:
             )
 
 
+def _single_site_coordinate(contig, single_site_id):
+    """
+    Returns the coordinate of the single site with the specified id (see
+    :meth:`.Contig.add_single_site`).
+    """
+    dfe_index = [i for i, d in enumerate(contig.dfe_list) if d.id == single_site_id]
+    if len(dfe_index) != 1:
+        raise ValueError(
+            f"The single site with id '{single_site_id}' must exist and be "
+            f"uniquely labelled, but there are {len(dfe_index)} DFEs with this "
+            f"id on {contig}."
+        )
+    intervals = contig.interval_list[dfe_index[0]]
+    if intervals.shape[0] != 1 or intervals[0, 1] - intervals[0, 0] != 1:
+        raise ValueError(
+            f"The id '{single_site_id}' refers to a DFE with intervals "
+            f"{intervals}, not to a single site."
+        )
+    return intervals[0, 0]
+
+
+def _sweep_ancestry_models(demographic_model, contig, extended_events):
+    """
+    Returns the list of msprime ancestry models that simulate the selective
+    sweep described by the extended events, which must be those returned by
+    :func:`.selective_sweep` for a hard sweep with a dominance coefficient of
+    0.5, in a model with a single population of constant size over the
+    period of the sweep. Otherwise, a ValueError is raised.
+
+    The mutation arises at the frequency ``1 / (ploidy * N)`` at the time of
+    the mutation, and its frequency then follows a deterministic sweep. If
+    ``min_freq_at_end`` is not set, the sweep must be complete by
+    ``end_generation_ago``, and the mutation fixes after the expected
+    duration of the sweep. If ``min_freq_at_end`` is set, the frequency
+    expected at ``end_generation_ago`` (or fixation, if earlier) must be at
+    least ``min_freq_at_end``, and the sweep ends at this frequency.
+    """
+    draws = []
+    fitness_changes = []
+    conditions = []
+    for ee in extended_events:
+        if isinstance(ee, stdgrimmsim.DrawMutation):
+            draws.append(ee)
+        elif isinstance(ee, stdgrimmsim.ChangeMutationFitness):
+            fitness_changes.append(ee)
+        elif isinstance(ee, stdgrimmsim.ConditionOnAlleleFrequency):
+            conditions.append(ee)
+        else:
+            raise ValueError(f"Unknown extended event type {type(ee)}")
+    if len(draws) != 1 or len(fitness_changes) != 1:
+        raise ValueError(
+            "The msprime engine only supports the extended events of a single "
+            "selective sweep (see selective_sweep()); use the SLiM engine "
+            "for other extended events."
+        )
+    draw = draws[0]
+    sweep = fitness_changes[0]
+    if any(
+        ee.single_site_id != draw.single_site_id for ee in fitness_changes + conditions
+    ):
+        raise ValueError(
+            "The msprime engine only supports extended events at a single site."
+        )
+    if float(sweep.start_time) != float(draw.time):
+        raise ValueError(
+            "The msprime engine only supports hard sweeps, in which the "
+            "mutation is beneficial from the time it arises; use the SLiM "
+            "engine for sweeps from standing variation."
+        )
+    if sweep.dominance_coeff != 0.5:
+        raise ValueError(
+            "The msprime engine only supports sweeps with a dominance "
+            "coefficient of 0.5; use the SLiM engine for other values."
+        )
+    if sweep.selection_coeff <= 0:
+        raise ValueError(
+            "The msprime engine only supports sweeps with a positive "
+            "selection coefficient."
+        )
+    end_time = float(sweep.end_time)
+    end_frequency = None
+    for condition in conditions:
+        if condition.op == ">" and condition.allele_frequency == 0:
+            # The mutation is not lost, which is always true in msprime.
+            continue
+        if (
+            condition.op == ">="
+            and float(condition.start_time) == end_time
+            and float(condition.end_time) == end_time
+            and end_frequency is None
+        ):
+            end_frequency = condition.allele_frequency
+            continue
+        raise ValueError(
+            "The msprime engine only supports conditioning on the allele "
+            "frequency at the end of a sweep; use the SLiM engine for other "
+            "allele frequency conditions."
+        )
+
+    populations = demographic_model.model.populations
+    if len(populations) != 1:
+        raise ValueError(
+            "The msprime engine only supports sweeps in demographic models "
+            "with a single population; use the SLiM engine for models with "
+            f"{len(populations)} populations."
+        )
+    if draw.population != populations[0].name:
+        raise ValueError(
+            f"The population {draw.population} of the sweep is not in the "
+            f"demographic model {demographic_model.id}."
+        )
+    start_time = float(draw.time)
+    epochs = demographic_model.model.debug().epochs
+    # The epoch in which the mutation arises.
+    epoch = [e for e in epochs if e.start_time < start_time <= e.end_time][0]
+    pop = epoch.populations[0]
+    N = pop.start_size
+    start_frequency = 1 / (contig.ploidy * N)
+    max_frequency = 1 - start_frequency
+    s = sweep.selection_coeff
+
+    def logit(p):
+        return math.log(p / (1 - p))
+
+    # The frequency of the mutation grows logistically at rate s / 2 (the
+    # fitness of heterozygotes is 1 + s / 2), so the sweep reaches frequency
+    # p after (2 / s) * (logit(p) - logit(start_frequency)) generations.
+    def duration(p):
+        return (2 / s) * (logit(p) - logit(start_frequency))
+
+    if end_frequency is None:
+        if duration(max_frequency) > start_time - end_time:
+            raise ValueError(
+                "The sweep is not expected to be complete by "
+                f"{end_time} generations ago, so the msprime engine can't "
+                "simulate it unless min_freq_at_end is set."
+            )
+        end_frequency = max_frequency
+    else:
+        min_frequency = min(end_frequency, max_frequency)
+        if duration(min_frequency) > start_time - end_time:
+            raise ValueError(
+                "The sweep is not expected to reach the frequency "
+                f"min_freq_at_end={end_frequency} by {end_time} generations "
+                f"ago, having started {start_time} generations ago, so the "
+                "msprime engine can't simulate it."
+            )
+        # The frequency expected at the end time, if the sweep isn't complete.
+        x = logit(start_frequency) + s / 2 * (start_time - end_time)
+        end_frequency = min(1 / (1 + math.exp(-x)), max_frequency)
+    if end_frequency < max_frequency:
+        sweep_end_time = end_time
+    else:
+        sweep_end_time = start_time - duration(max_frequency)
+    if epoch.start_time > sweep_end_time or pop.growth_rate != 0:
+        raise ValueError(
+            "The msprime engine only supports sweeps during which the "
+            "population size is constant, but the size of "
+            f"{populations[0].name} changes between {start_time} and "
+            f"{sweep_end_time} generations ago."
+        )
+    return [
+        msprime.StandardCoalescent(duration=sweep_end_time),
+        msprime.SweepGenicSelection(
+            position=_single_site_coordinate(contig, draw.single_site_id),
+            start_frequency=start_frequency,
+            end_frequency=end_frequency,
+            s=sweep.selection_coeff,
+            dt=1 / (40 * N),
+        ),
+        msprime.StandardCoalescent(),
+    ]
+
+
+def _model_name(model):
+    """
+    Returns the name of the specified msprime model, which is either a string
+    (e.g. "dtwf") or an instance of :class:`msprime.AncestryModel`.
+    """
+    if isinstance(model, msprime.AncestryModel):
+        return model.name
+    return model
+
+
+def _unmasked_intervals(contig):
+    """
+    Returns the sorted, disjoint intervals of the contig that are kept after
+    applying its masks and that have a known recombination rate, with
+    adjacent intervals merged.
+    """
+    rm = contig.recombination_map
+    intervals = np.column_stack(
+        [rm.left[rm.non_missing], rm.right[rm.non_missing]]
+    ).astype(int)
+    if contig.inclusion_mask is not None:
+        outside = stdgrimmsim.utils.mask_intervals(
+            intervals, np.asarray(contig.inclusion_mask, dtype=int)
+        )
+        intervals = stdgrimmsim.utils.mask_intervals(intervals, outside)
+    if contig.exclusion_mask is not None:
+        intervals = stdgrimmsim.utils.mask_intervals(
+            intervals, np.asarray(contig.exclusion_mask, dtype=int)
+        )
+    if intervals.shape[0] > 0:
+        # Merge intervals that touch.
+        starts = np.append(True, intervals[1:, 0] != intervals[:-1, 1])
+        ends = np.append(starts[1:], True)
+        intervals = np.column_stack([intervals[starts, 0], intervals[ends, 1]])
+    return intervals
+
+
+@attr.s(kw_only=True)
+class _CollapsedMasks:
+    """
+    A map between the coordinates of a contig and those of a shorter
+    sequence, in which the unmasked ``intervals`` are placed end to end and
+    each masked gap between them is collapsed to a single base pair, which
+    carries the recombination rate mass of the whole gap. Masked flanks are
+    removed. The ancestry of the unmasked intervals has the same distribution
+    when simulated on the shorter sequence with the collapsed recombination
+    map, but the masked gaps add little work.
+    """
+
+    intervals = attr.ib()
+    sequence_length = attr.ib()
+    # The start and end of each interval in the collapsed coordinates.
+    collapsed = attr.ib()
+
+    @classmethod
+    def from_contig(cls, contig):
+        intervals = _unmasked_intervals(contig)
+        lengths = intervals[:, 1] - intervals[:, 0]
+        starts = np.append(0, np.cumsum(lengths[:-1] + 1))
+        return cls(
+            intervals=intervals,
+            sequence_length=contig.length,
+            collapsed=np.column_stack([starts, starts + lengths]),
+        )
+
+    def recombination_map(self, recombination_map):
+        """
+        Returns the recombination map in the collapsed coordinates.
+        """
+        rm = recombination_map
+        position = rm.position
+        j = np.searchsorted(self.intervals[:, 0], position, side="right") - 1
+        inside = (j >= 0) & (position > self.intervals[np.maximum(j, 0), 0])
+        inside &= position < self.intervals[np.maximum(j, 0), 1]
+        # The breakpoints, in the contig's coordinates, of the collapsed map.
+        left = np.union1d(self.intervals.ravel(), position[inside])
+        rate = rm.rate[np.searchsorted(position, left[:-1], side="right") - 1]
+        gap = np.isin(left[:-1], self.intervals[:-1, 1])
+        mass = rm.get_cumulative_mass(self.intervals[:, 0])
+        mass -= np.append(0, rm.get_cumulative_mass(self.intervals[:-1, 1]))
+        rate[gap] = mass[1:]
+        return msprime.RateMap(position=self.to_collapsed(left), rate=rate)
+
+    def to_collapsed(self, x):
+        return np.interp(x, self.intervals.ravel(), self.collapsed.ravel())
+
+    def from_collapsed(self, x):
+        return np.interp(x, self.collapsed.ravel(), self.intervals.ravel())
+
+    def expand(self, ts):
+        """
+        Returns the tree sequence simulated in the collapsed coordinates with
+        the coordinates of the contig.
+        """
+        tables = ts.dump_tables()
+        tables.sequence_length = self.sequence_length
+        # The map is increasing, so the tables remain sorted.
+        for table in [tables.edges, tables.migrations]:
+            table.left = self.from_collapsed(table.left)
+            table.right = self.from_collapsed(table.right)
+        tables.sites.position = self.from_collapsed(tables.sites.position)
+        return tables.tree_sequence()
+
+    def mutation_map(self, rate):
+        """
+        Returns the map of the specified mutation rate in the unmasked
+        intervals, which is zero elsewhere.
+        """
+        position = np.unique(
+            np.concatenate([[0], self.intervals.ravel(), [self.sequence_length]])
+        )
+        j = np.searchsorted(self.intervals[:, 0], position[:-1], side="right") - 1
+        inside = (j >= 0) & (position[:-1] < self.intervals[np.maximum(j, 0), 1])
+        return msprime.RateMap(position=position, rate=np.where(inside, rate, 0))
+
+
 class _MsprimeEngine(Engine):
     id = "msprime"  #:
     description = "Msprime coalescent simulator"  #:
@@ -173,18 +542,18 @@ class _MsprimeEngine(Engine):
     def _convert_model_spec(self, model_str, model_changes):
         """
         Convert the specified model specification into a form suitable
-        for sim_ancestry. The model param is a string or None. The
-        model_changes is either None or list of (time, model_str) tuples.
-        Also return the appropriate extra citations.
+        for sim_ancestry. The model param is a string, an instance of
+        :class:`msprime.AncestryModel` or None. The model_changes is either
+        None or list of (time, model) tuples. Also return the appropriate
+        extra citations.
         """
         citations = []
         if model_str is None:
             model_str = "hudson"
         else:
-            if model_str not in self.model_class_map:
+            if _model_name(model_str) not in self.model_class_map:
                 raise ValueError(f"Unrecognised model '{model_str}'")
-            if model_str in self.model_citations:
-                citations.extend(self.model_citations[model_str])
+            citations.extend(self.model_citations.get(_model_name(model_str), []))
 
         if model_changes is None:
             model = model_str
@@ -193,52 +562,59 @@ class _MsprimeEngine(Engine):
             last_t = 0
             last_model = model_str
             for t, model in model_changes:
-                if model not in self.supported_models:
+                if _model_name(model) not in self.supported_models:
                     raise ValueError(f"Unrecognised model '{model}'")
-                if model in self.model_citations:
-                    citations.extend(self.model_citations[model])
+                citations.extend(self.model_citations.get(_model_name(model), []))
                 duration = t - last_t
-                model_list.append(self.model_class_map[last_model](duration=duration))
+                model_list.append(self._model_instance(last_model, duration))
                 last_model = model
                 last_t = t
-            model_list.append(self.model_class_map[last_model](duration=None))
+            model_list.append(self._model_instance(last_model, None))
             model = model_list
 
         return model, citations
 
-    def simulate(
+    def _model_instance(self, model, duration):
+        # Returns the msprime model with the specified name (or a copy of
+        # the specified msprime model) that runs for the specified duration.
+        if isinstance(model, msprime.AncestryModel):
+            return dataclasses.replace(model, duration=duration)
+        return self.model_class_map[model](duration=duration)
+
+    def _setup_simulation(
         self,
         demographic_model,
         contig,
         samples,
-        *,
-        seed=None,
-        msprime_model=None,
-        msprime_change_model=None,
-        dry_run=False,
-        **kwargs,
+        seed,
+        msprime_model,
+        msprime_change_model,
+        extended_events,
+        msprime_skip_masked,
+        kwargs,
     ):
         """
-        Simulate the demographic model using msprime.
-        See :meth:`.Engine.simulate()` for definitions of parameters defined
-        for all engines.
-
-        :param msprime_model: The msprime simulation model to be used.
-            One of ``hudson``, ``dtwf``, ``smc``, or ``smc_prime``.
-            See msprime API documentation for details.
-        :type msprime_model: str
-        :param msprime_change_model: A list of (time, model) tuples, which
-            changes the simulation model to the new model at the time specified.
-        :type msprime_change_model: list of (float, str) tuples
-        :param dry_run: If True, ``end_time=0`` is passed to :meth:`msprime.simulate()`
-            to initialise the simulation and then immediately return.
-        :type dry_run: bool
-        :param \\**kwargs: Further arguments passed to :meth:`msprime.sim_ancestry()`
+        Does the work shared by :meth:`.simulate` and
+        :meth:`.simulate_replicates`: validates the inputs and returns
+        a tuple (seed, kwargs, collapsed), with the keyword arguments that
+        are passed to :meth:`msprime.sim_ancestry()`, and the
+        :class:`._CollapsedMasks` that the ancestry is simulated with, or
+        None.
         """
-
         model, citations = self._convert_model_spec(msprime_model, msprime_change_model)
         self.citations.extend(citations)
-
+        if extended_events is not None:
+            if (
+                _model_name(msprime_model) not in (None, "hudson")
+                or msprime_change_model
+            ):
+                raise ValueError(
+                    "Extended events can only be simulated by the msprime "
+                    "engine with the hudson model."
+                )
+            model = _sweep_ancestry_models(demographic_model, contig, extended_events)
+
+        kwargs = dict(kwargs)
         if "random_seed" in kwargs.keys():
             if seed is None:
                 seed = kwargs["random_seed"]
@@ -267,9 +643,6 @@ class _MsprimeEngine(Engine):
         self._warn_mutation_rate_mismatch(contig, demographic_model)
         self._warn_recombination_rate_mismatch(contig, demographic_model)
 
-        rng = np.random.default_rng(seed)
-        seeds = rng.integers(1, 2**31 - 1, size=2)
-
         # if bacterial_recombination=True then "recombination_rate"
         # is implemented by msprime as gene conversion rate
         # (which must be constant)
@@ -290,34 +663,228 @@ class _MsprimeEngine(Engine):
                 rate=recombination_map.rate * (1 - gc_frac),
             )
 
-        ts = msprime.sim_ancestry(
+        collapsed = None
+        has_mask = contig.inclusion_mask is not None or contig.exclusion_mask is not None
+        models = [msprime_model] + [m for _, m in msprime_change_model or []]
+        # The models may be given by name or as msprime model instances.
+        model_names = [_model_name(m) for m in models]
+        if msprime_skip_masked and has_mask:
+            if "dtwf" in model_names:
+                raise ValueError("msprime_skip_masked can't be used with the dtwf model")
+            if gc_rate is not None:
+                raise ValueError(
+                    "msprime_skip_masked can't be used with gene conversion"
+                )
+            if extended_events is not None:
+                raise ValueError(
+                    "msprime_skip_masked can't be used with extended events"
+                )
+        elif contig.regions is not None:
+            # The ancestry between the regions of a contig is skipped unless
+            # it can't be.
+            msprime_skip_masked = (
+                "dtwf" not in model_names and gc_rate is None and extended_events is None
+            )
+            if not msprime_skip_masked:
+                logger.debug("Simulating the ancestry between the contig's regions")
+        if msprime_skip_masked and has_mask:
+            collapsed = _CollapsedMasks.from_contig(contig)
+            if collapsed.intervals.shape[0] == 0:
+                collapsed = None
+            else:
+                recombination_map = collapsed.recombination_map(recombination_map)
+
+        ancestry_kwargs = dict(
             samples=sample_sets,
             recombination_rate=recombination_map,
             gene_conversion_rate=gc_rate,
             gene_conversion_tract_length=contig.gene_conversion_length,
             demography=demographic_model.model,
             ploidy=contig.ploidy,
-            random_seed=seeds[0],
             model=model,
-            end_time=0 if dry_run else None,
             **kwargs,
         )
+        return seed, ancestry_kwargs, collapsed
+
+    def _mutate_and_mask(self, ts, contig, seed, dry_run=False, collapsed=None):
+        rate = contig.mutation_rate
+        if collapsed is not None:
+            ts = collapsed.expand(ts)
+            rate = collapsed.mutation_map(rate)
         ts = msprime.sim_mutations(
             ts,
             end_time=0 if dry_run else None,
-            random_seed=seeds[1],
-            rate=contig.mutation_rate,
+            random_seed=seed,
+            rate=rate,
         )
 
         if contig.inclusion_mask is not None:
             ts = stdgrimmsim.utils.mask_tree_sequence(ts, contig.inclusion_mask, False)
         if contig.exclusion_mask is not None:
             ts = stdgrimmsim.utils.mask_tree_sequence(ts, contig.exclusion_mask, True)
+        return ts
+
+    def simulate(
+        self,
+        demographic_model,
+        contig,
+        samples,
+        *,
+        seed=None,
+        msprime_model=None,
+        msprime_change_model=None,
+        extended_events=None,
+        msprime_skip_masked=False,
+        dry_run=False,
+        **kwargs,
+    ):
+        """
+        Simulate the demographic model using msprime.
+        See :meth:`.Engine.simulate()` for definitions of parameters defined
+        for all engines.
+
+        :param msprime_model: The msprime simulation model to be used.
+            One of ``hudson``, ``dtwf``, ``smc``, or ``smc_prime``, or an
+            instance of the corresponding :class:`msprime.AncestryModel`.
+            See msprime API documentation for details.
+        :type msprime_model: str
+        :param msprime_change_model: A list of (time, model) tuples, which
+            changes the simulation model to the new model at the time specified.
+        :type msprime_change_model: list of (float, str) tuples
+        :param extended_events: The extended events of a selective sweep,
+            produced by :func:`.selective_sweep`. Only hard sweeps with a
+            dominance coefficient of 0.5, in demographic models with a single
+            population whose size is constant during the sweep, are
+            supported, and the sweep is simulated with
+            :class:`msprime.SweepGenicSelection`. Without
+            ``min_freq_at_end``, the sweep is complete: the mutation fixes
+            after the expected duration of a deterministic sweep from the
+            time it arises. With ``min_freq_at_end``, the sweep ends at
+            ``end_generation_ago`` with exactly this frequency. Unlike the
+            SLiM engine, the beneficial mutation is not included in the
+            tree sequence. A ValueError is raised for other extended events,
+            which can be simulated with the SLiM engine.
+        :type extended_events: list
+        :param msprime_skip_masked: If True, the ancestry of the intervals
+            removed by the contig's inclusion or exclusion mask is not
+            simulated. The unmasked intervals are simulated end to end, with
+            each masked gap between them replaced by a single base pair that
+            has the recombination rate of the whole gap, and then moved back
+            to their coordinates, and mutations are only added in the
+            unmasked intervals. The masked tree sequence has the same
+            distribution as without this option (for the hudson and SMC
+            models), but heavily masked contigs are much faster to simulate.
+            This can't be used with the dtwf model, gene conversion or
+            extended events. This is the default for contigs with
+            :attr:`.Contig.regions`, where it is possible.
+        :type msprime_skip_masked: bool
+        :param dry_run: If True, ``end_time=0`` is passed to :meth:`msprime.simulate()`
+            to initialise the simulation and then immediately return.
+        :type dry_run: bool
+        :param \\**kwargs: Further arguments passed to :meth:`msprime.sim_ancestry()`
+        """
+        seed, ancestry_kwargs, collapsed = self._setup_simulation(
+            demographic_model,
+            contig,
+            samples,
+            seed,
+            msprime_model,
+            msprime_change_model,
+            extended_events,
+            msprime_skip_masked,
+            kwargs,
+        )
+        cache, cache_key = None, None
+        if not dry_run:
+            cache, cache_key = self._get_cache_key(
+                demographic_model,
+                contig,
+                samples,
+                seed,
+                dict(
+                    msprime_model=msprime_model,
+                    msprime_change_model=msprime_change_model,
+                    extended_events=extended_events,
+                    msprime_skip_masked=msprime_skip_masked,
+                    **kwargs,
+                ),
+            )
+            ts = cache.get(cache_key) if cache is not None else None
+            if ts is not None:
+                return ts
+        rng = np.random.default_rng(seed)
+        seeds = rng.integers(1, 2**31 - 1, size=2)
+
+        ts = msprime.sim_ancestry(
+            random_seed=seeds[0],
+            end_time=0 if dry_run else None,
+            **ancestry_kwargs,
+        )
+        ts = self._mutate_and_mask(
+            ts, contig, seeds[1], dry_run=dry_run, collapsed=collapsed
+        )
 
         if dry_run:
             ts = None
+        elif cache is not None:
+            cache.put(cache_key, ts)
         return ts
 
+    def simulate_replicates(
+        self,
+        demographic_model,
+        contig,
+        samples,
+        *,
+        num_replicates,
+        seed=None,
+        msprime_model=None,
+        msprime_change_model=None,
+        extended_events=None,
+        msprime_skip_masked=False,
+        **kwargs,
+    ):
+        """
+        Returns an iterator over ``num_replicates`` independent simulations
+        of the demographic model using msprime.
+        See :meth:`.Engine.simulate_replicates()` and :meth:`.simulate()` for
+        definitions of the parameters.
+
+        The inputs are validated and the simulation is set up only once,
+        and the replicates are generated by a single call to
+        :meth:`msprime.sim_ancestry()` with ``num_replicates`` set. Each
+        replicate has mutations added and masks applied before it is
+        yielded. The first replicate is identical to the result of
+        :meth:`.simulate()` called with the same ``seed``.
+        """
+        self._check_num_replicates(num_replicates)
+        seed, ancestry_kwargs, collapsed = self._setup_simulation(
+            demographic_model,
+            contig,
+            samples,
+            seed,
+            msprime_model,
+            msprime_change_model,
+            extended_events,
+            msprime_skip_masked,
+            kwargs,
+        )
+        rng = np.random.default_rng(seed)
+        seeds = rng.integers(1, 2**31 - 1, size=2)
+        mutation_seeds = np.append(
+            seeds[1], rng.integers(1, 2**31 - 1, size=num_replicates - 1)
+        )
+
+        replicates = msprime.sim_ancestry(
+            random_seed=seeds[0],
+            num_replicates=num_replicates,
+            **ancestry_kwargs,
+        )
+        return (
+            self._mutate_and_mask(ts, contig, mutation_seed, collapsed=collapsed)
+            for ts, mutation_seed in zip(replicates, mutation_seeds)
+        )
+
     def get_version(self):
         return msprime.__version__
 
@@ -0,0 +1,160 @@
+"""
+Export of simulated genotypes to compact, memory-mapped arrays.
+"""
+
+import json
+import logging
+import os
+
+import attr
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HAPLOTYPES_FILE = "haplotypes.npy"
+_POSITIONS_FILE = "positions.npy"
+_POPULATIONS_FILE = "populations.npy"
+_METADATA_FILE = "metadata.json"
+
+
+@attr.s(kw_only=True)
+class GenotypeArrays:
+    """
+    Class representing the genotypes written by :func:`.write_genotypes`.
+    The arrays are memory-mapped from disk, so they can be larger than the
+    available memory.
+
+    :ivar haplotypes: The bit-packed haplotypes, a ``uint8`` array with one
+        row per site and ``ceil(num_samples / 8)`` columns. Bit ``j`` of a
+        row (in big-endian bit order, see :func:`numpy.packbits`) is set if
+        sample node ``j`` carries a derived allele at the site.
+    :vartype haplotypes: numpy.ndarray
+    :ivar positions: The positions of the sites.
+    :vartype positions: numpy.ndarray
+    :ivar populations: The population index of each sample node.
+    :vartype populations: numpy.ndarray
+    :ivar metadata: Further information, including the number of samples
+        (``num_samples``), the names of the populations
+        (``population_names``) and the ``sequence_length``.
+    :vartype metadata: dict
+    """
+
+    haplotypes = attr.ib()
+    positions = attr.ib()
+    populations = attr.ib()
+    metadata = attr.ib(factory=dict)
+
+    @property
+    def num_sites(self):
+        return self.haplotypes.shape[0]
+
+    @property
+    def num_samples(self):
+        return self.metadata["num_samples"]
+
+    def genotype_matrix(self, left=0, right=None):
+        """
+        Returns the unpacked ``(num_sites, num_samples)`` genotype matrix of
+        zeros and ones for the sites with index ``left <= j < right``.
+
+        :param int left: The index of the first site.
+        :param int right: The index after the last site. Defaults to the
+            number of sites.
+        :rtype: numpy.ndarray
+        """
+        return np.unpackbits(self.haplotypes[left:right], axis=1, count=self.num_samples)
+
+
+def write_genotypes(ts, path, *, chunk_size=10000, provenance=None):
+    """
+    Writes the genotypes of the samples of the specified tree sequence to the
+    directory ``path`` as compact numpy arrays, without materialising the
+    full genotype matrix. The variants are streamed from the tree sequence
+    into memory-mapped ``.npy`` files ``chunk_size`` sites at a time, so peak
+    memory is independent of the number of sites. The files written are
+    ``haplotypes.npy`` (bit-packed haplotypes), ``positions.npy`` (site
+    positions), ``populations.npy`` (population index of each sample node)
+    and ``metadata.json``. See :class:`.GenotypeArrays` for details.
+
+    Haplotypes are stored as one bit per sample, so sites with more than
+    one derived allele are recorded as carrying a derived allele or not.
+
+    :param ts: The tree sequence.
+    :type ts: :class:`tskit.TreeSequence`
+    :param str path: The directory to write to. It is created if needed.
+    :param int chunk_size: The number of sites processed at a time.
+    :param dict provenance: Provenance information to record in the
+        metadata.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    os.makedirs(path, exist_ok=True)
+    num_sites = ts.num_sites
+    num_samples = ts.num_samples
+    num_bytes = (num_samples + 7) // 8
+
+    haplotypes = np.lib.format.open_memmap(
+        os.path.join(path, _HAPLOTYPES_FILE),
+        mode="w+",
+        dtype=np.uint8,
+        shape=(num_sites, num_bytes),
+    )
+    position_dtype = np.int64 if ts.discrete_genome else np.float64
+    positions = np.lib.format.open_memmap(
+        os.path.join(path, _POSITIONS_FILE),
+        mode="w+",
+        dtype=position_dtype,
+        shape=(num_sites,),
+    )
+    positions[:] = ts.sites_position
+    chunk = np.zeros((min(chunk_size, max(num_sites, 1)), num_samples), dtype=bool)
+    start = 0
+    for j, variant in enumerate(ts.variants(copy=False)):
+        k = j - start
+        np.greater(variant.genotypes, 0, out=chunk[k])
+        if k == chunk.shape[0] - 1:
+            haplotypes[start : j + 1] = np.packbits(chunk, axis=1)
+            start = j + 1
+    if start < num_sites:
+        haplotypes[start:] = np.packbits(chunk[: num_sites - start], axis=1)
+    haplotypes.flush()
+    positions.flush()
+    del haplotypes, positions
+
+    populations = ts.nodes_population[ts.samples()].astype(np.int32)
+    np.save(os.path.join(path, _POPULATIONS_FILE), populations)
+
+    population_names = []
+    for pop in ts.populations():
+        name = pop.metadata.get("name") if isinstance(pop.metadata, dict) else None
+        population_names.append(name)
+    metadata = {
+        "num_sites": num_sites,
+        "num_samples": num_samples,
+        "sequence_length": ts.sequence_length,
+        "population_names": population_names,
+    }
+    if provenance is not None:
+        metadata["provenance"] = provenance
+    with open(os.path.join(path, _METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+    logger.debug(f"Wrote {num_sites} sites for {num_samples} samples to {path}")
+
+
+def load_genotypes(path):
+    """
+    Loads the genotypes written by :func:`.write_genotypes` from the
+    directory ``path``. The arrays are memory-mapped rather than read into
+    memory.
+
+    :param str path: The directory that the genotypes were written to.
+    :rtype: :class:`.GenotypeArrays`
+    """
+    with open(os.path.join(path, _METADATA_FILE)) as f:
+        metadata = json.load(f)
+    return GenotypeArrays(
+        haplotypes=np.load(os.path.join(path, _HAPLOTYPES_FILE), mmap_mode="r"),
+        positions=np.load(os.path.join(path, _POSITIONS_FILE), mmap_mode="r"),
+        populations=np.load(os.path.join(path, _POPULATIONS_FILE)),
+        metadata=metadata,
+    )
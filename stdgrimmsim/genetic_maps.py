@@ -2,6 +2,7 @@
 Infrastructure for managing genetic maps.
 """
 
+import logging
 import warnings
 
 import msprime
@@ -9,6 +10,45 @@ import numpy as np
 
 import stdgrimmsim
 
+logger = logging.getLogger(__name__)
+
+# The directory (in the cache directory of a map) in which the parsed
+# chromosome maps are stored.
+_PARSED_MAP_DIR = "_parsed"
+
+
+def _slice_rate_map(position, rate, left=None, right=None):
+    """
+    Returns the same map as ``msprime.RateMap(position=position,
+    rate=rate).slice(left, right)``, but finds the rows of ``position`` and
+    ``rate`` in the slice by binary search, so that only these rows of the
+    (possibly memory-mapped) arrays are read.
+    """
+    sequence_length = position[-1]
+    left = 0 if left is None else left
+    right = sequence_length if right is None else right
+    if not (0 <= left < right <= sequence_length):
+        raise KeyError(f"Invalid slice: left={left}, right={right}")
+    i = np.searchsorted(position, left, side="right") - 1
+    j = np.searchsorted(position, right, side="left") + 1
+    position = np.array(position[i:j])
+    rate = np.array(rate[i : j - 1])
+    position[0] = left
+    position[-1] = right
+    if left != 0:
+        if np.isnan(rate[0]):
+            position[0] = 0
+        else:
+            rate = np.insert(rate, 0, np.nan)
+            position = np.insert(position, 0, 0)
+    if right != sequence_length:
+        if np.isnan(rate[-1]):
+            position[-1] = sequence_length
+        else:
+            rate = np.append(rate, np.nan)
+            position = np.append(position, sequence_length)
+    return msprime.RateMap(position=position, rate=rate)
+
 
 # TODO change this to use attrs
 class GeneticMap:
@@ -83,13 +123,62 @@ class GeneticMap:
         """
         self._cache.download()
 
-    def get_chromosome_map(self, id):
+    def _parsed_map_dir(self, chrom):
+        return self.map_cache_dir / _PARSED_MAP_DIR / chrom.id
+
+    def _read_chromosome_map(self, chrom, map_file):
+        """
+        Returns the arrays of positions and rates of the map for the specified
+        chromosome, extended to the end of the chromosome. The HapMap file is
+        parsed once, and the arrays are stored in the map's cache directory,
+        from which they are memory-mapped on later calls. The stored arrays
+        are only used if they were parsed from the download with the map's
+        SHA256 checksum.
+        """
+        parsed_dir = self._parsed_map_dir(chrom)
+        names = ["position.npy", "rate.npy"]
+        # The extension of the map depends on the length of the chromosome.
+        checksum = f"{self.sha256} {chrom.length}"
+        arrays = stdgrimmsim.utils.load_parsed(parsed_dir, names, checksum)
+        if arrays is not None:
+            return arrays
+        logger.debug(f"Parsing genetic map {map_file}")
+        genetic_map = msprime.RateMap.read_hapmap(
+            map_file,
+            rate_col=2,
+            # TODO: set the sequence length. Unfortunately, some of our
+            # maps are shorter than our chromosomes, so this will fail.
+            # sequence_length=chrom.length
+        )
+        position = genetic_map.position
+        rate = genetic_map.rate
+        if genetic_map.sequence_length < chrom.length:
+            # Extend map to the end of the chromosome.
+            position = np.append(position, chrom.length)
+            rate = np.append(rate, 0)
+        try:
+            stdgrimmsim.utils.save_parsed(
+                parsed_dir, dict(zip(names, [position, rate])), checksum
+            )
+        except OSError as e:
+            logger.warning(f"Couldn't store the parsed genetic map {map_file}: {e}")
+        return position, rate
+
+    def get_chromosome_map(self, id, *, left=None, right=None):
         """
         Returns the genetic map for the chromosome with the specified ``id``.
+        If ``left`` or ``right`` are specified, the map is sliced to the
+        interval ``[left, right)``, and has missing rates elsewhere (see
+        :meth:`msprime.RateMap.slice`); this only reads the part of the map
+        in the interval.
 
         :param str id: The chromosome identifier.
              A complete list of chromosome IDs for each species can be found in the
              "Genome" subsection for the species in the :ref:`sec_catalog`.
+        :param float left: The left coordinate (inclusive) of the slice.
+            Defaults to 0.
+        :param float right: The right coordinate (exclusive) of the slice.
+            Defaults to the length of the map.
         :rtype: :class:`msprime.RateMap`
         :return: A :class:`msprime.RateMap` object.
         """
@@ -102,31 +191,23 @@ class GeneticMap:
         # needs to be redownloaded.
         map_file = self.map_cache_dir / self.file_pattern.format(id=chrom.id)
         if map_file.exists():
-            genetic_map = msprime.RateMap.read_hapmap(
-                map_file,
-                rate_col=2,
-                # TODO: set the sequence length. Unfortunately, some of our
-                # maps are shorter than our chromosomes, so this will fail.
-                # sequence_length=chrom.length
-            )
+            position, rate = self._read_chromosome_map(chrom, map_file)
         else:
             warnings.warn(
                 "Genetic map not found for chromosome: '{}'"
                 " on map: '{}', substituting a flat map with chromosome "
                 "recombination rate {}".format(id, self.id, chrom.recombination_rate)
             )
-            genetic_map = msprime.RateMap.uniform(chrom.length, chrom.recombination_rate)
-        map_length = genetic_map.sequence_length
-        if map_length < chrom.length:
-            # Extend map to the end of the chromosome.
-            positions = np.append(genetic_map.position, chrom.length)
-            rates = np.append(genetic_map.rate, 0)
-            genetic_map = msprime.RateMap(position=positions, rate=rates)
-        elif map_length > chrom.length:
+            position = np.array([0, chrom.length], dtype=float)
+            rate = np.array([chrom.recombination_rate])
+        map_length = position[-1]
+        if map_length > chrom.length:
             # TODO: consider making this an error, and deprecating genetic maps
             # that do not match the assembly.
             warnings.warn(
                 f"Genetic map has length {map_length}, which is longer than"
                 f" chromosome length {chrom.length}. The latter will be used."
             )
-        return genetic_map
+        if left is None and right is None:
+            return msprime.RateMap(position=position, rate=rate)
+        return _slice_rate_map(position, rate, left, right)
@@ -14,6 +14,10 @@ import stdgrimmsim
 
 logger = logging.getLogger(__name__)
 
+# Lower-cased IDs of the sex chromosomes and organelle genomes, which are not
+# (yet) supported in simulations.
+_NON_AUTOSOMAL_IDS = ["x", "y", "m", "mt", "chrx", "chry", "chrm"]
+
 
 def _uniform_rate_map(left, right, length, rate):
     """
@@ -197,6 +201,19 @@ class Genome:
             mean_recombination_rate += cont
         return mean_recombination_rate
 
+    @property
+    def autosomes(self):
+        """
+        The list of autosomal chromosomes, i.e., excluding sex chromosomes and
+        mitochondrial genomes.
+        """
+        return [
+            chrom
+            for chrom in self.chromosomes
+            if chrom.id.lower() not in _NON_AUTOSOMAL_IDS
+            and "mito" not in chrom.id.lower()
+        ]
+
     @property
     def mean_mutation_rate(self):
         """
@@ -312,6 +329,12 @@ class Contig:
     :vartype coordinates: tuple
     :ivar species: The species this contig represents a portion of the genome of.
     :vartype species: .Species
+    :ivar regions: The disjoint target regions of the chromosome that are
+        simulated, as an array of (left_position, right_position) intervals
+        in ascending order, or None. Genomes are masked to the regions, and
+        the msprime engine only simulates the ancestry of the regions; see
+        :meth:`.split_regions` to obtain a tree sequence for each region.
+    :vartype regions: numpy.ndarray
 
     .. note::
         To run stdgrimmsim simulations with alternative, user-specified mutation,
@@ -343,6 +366,7 @@ class Contig:
     interval_list = attr.ib(factory=list)
     coordinates = attr.ib(default=None, type=tuple)
     species = attr.ib(default=None, kw_only=True)
+    regions = attr.ib(default=None, kw_only=True)
 
     def __attrs_post_init__(self):
         if self.coordinates is None:
@@ -429,12 +453,13 @@ class Contig:
         exclusion_mask=None,
         left=None,
         right=None,
+        regions=None,
     ):
         """
         Build a Contig for a species.
         """
         # TODO: add non-autosomal support
-        non_autosomal_lower = ["x", "y", "m", "mt", "chrx", "chry", "chrm"]
+        non_autosomal_lower = _NON_AUTOSOMAL_IDS
         if chromosome is not None and chromosome.lower() in non_autosomal_lower:
             warnings.warn(
                 stdgrimmsim.NonAutosomalWarning(
@@ -473,6 +498,8 @@ class Contig:
                 raise ValueError("Cannot use length multiplier for generic contig")
             if inclusion_mask is not None or exclusion_mask is not None:
                 raise ValueError("Cannot use mask with generic contig")
+            if regions is not None:
+                raise ValueError("Cannot use regions with generic contig")
             if length is None:
                 raise ValueError("Must specify sequence length of generic contig")
             L_tot = 0
@@ -534,6 +561,20 @@ class Contig:
                 )
 
             chrom = species.genome.get_chromosome(chromosome)
+            if regions is not None:
+                if length_multiplier != 1:
+                    raise ValueError("Cannot use length multiplier with regions")
+                if isinstance(regions, str):
+                    regions = stdgrimmsim.utils.read_bed(regions, chromosome)
+                regions = np.array(regions).astype(int).reshape((-1, 2))
+                if regions.shape[0] == 0:
+                    raise ValueError("Must specify at least one region")
+                stdgrimmsim.utils._check_intervals_validity(regions, 0, chrom.length)
+                # By default, the contig spans the regions.
+                if left is None:
+                    left = regions[0, 0]
+                if right is None:
+                    right = regions[-1, 1]
             if left is None:
                 left = 0
             else:
@@ -579,8 +620,7 @@ class Contig:
                     raise ValueError("Cannot use recombination rate with genetic map")
                 logger.debug(f"Getting genetic map for {chrom.id} from {genetic_map}")
                 gm = species.get_genetic_map(genetic_map)
-                recomb_map = gm.get_chromosome_map(chrom.id)
-                recomb_map = recomb_map.slice(left=left, right=right)
+                recomb_map = gm.get_chromosome_map(chrom.id, left=left, right=right)
 
             inclusion_intervals = None
             exclusion_intervals = None
@@ -608,6 +648,16 @@ class Contig:
                 exclusion_intervals = stdgrimmsim.utils.clip_intervals(
                     exclusion_intervals, left, right
                 )
+            if regions is not None:
+                regions = stdgrimmsim.utils.clip_intervals(regions, left, right)
+                if inclusion_intervals is None:
+                    inclusion_intervals = regions
+                else:
+                    # Keep the parts of the regions inside the inclusion mask.
+                    inclusion_intervals = stdgrimmsim.utils.mask_intervals(
+                        regions,
+                        stdgrimmsim.utils.mask_intervals(regions, inclusion_intervals),
+                    )
 
             if mutation_rate is None:
                 mutation_rate = chrom.mutation_rate
@@ -638,6 +688,7 @@ class Contig:
                 coordinates=(chromosome, left, right),
                 ploidy=ploidy,
                 species=species,
+                regions=regions,
             )
 
         if contig.gene_conversion_length is not None:
@@ -677,6 +728,58 @@ class Contig:
         else:
             return f"{chromosome}:{left}-{right}"
 
+    def split_regions(self, ts, *, trim=False):
+        """
+        Yields the portion of the tree sequence ``ts`` (simulated for this
+        contig) in each of the contig's :attr:`.regions` in turn, as would be
+        obtained by :meth:`tskit.TreeSequence.keep_intervals`. The tables of
+        ``ts`` are only copied once, so this is much faster than calling
+        ``keep_intervals`` for each of many regions.
+
+        :param ts: The tree sequence simulated for this contig.
+        :type ts: :class:`tskit.TreeSequence`
+        :param bool trim: If True, the coordinates of each tree sequence are
+            shifted to start at the left end of its region, as by
+            :meth:`tskit.TreeSequence.trim`.
+        :rtype: iterator
+        :return: An iterator over the tree sequences of the regions.
+        """
+        if self.regions is None:
+            raise ValueError("The contig has no regions to split by")
+        tables = ts.dump_tables()
+        edges = tables.edges.copy()
+        migrations = tables.migrations.copy()
+        sites = tables.sites.copy()
+        mutations = tables.mutations.copy()
+        for table in [tables.edges, tables.migrations, tables.sites, tables.mutations]:
+            table.clear()
+        # The sites are sorted by position and the mutations by site, so the
+        # sites and mutations of each region are contiguous rows.
+        site_bounds = np.searchsorted(sites.position, self.regions).astype(np.int32)
+        mutation_bounds = np.searchsorted(mutations.site, site_bounds).astype(np.int32)
+        for (left, right), (s0, s1), (m0, m1) in zip(
+            self.regions, site_bounds, mutation_bounds
+        ):
+            region_tables = tables.copy()
+            for table, region_table in [
+                (edges, region_tables.edges),
+                (migrations, region_tables.migrations),
+            ]:
+                keep = np.logical_and(table.left < right, table.right > left)
+                region_table.replace_with(table[keep])
+                region_table.left = np.maximum(region_table.left, left)
+                region_table.right = np.minimum(region_table.right, right)
+            region_tables.sites.replace_with(sites[s0:s1])
+            region_tables.mutations.replace_with(mutations[m0:m1])
+            region_tables.mutations.site -= s0
+            parent = region_tables.mutations.parent
+            region_tables.mutations.parent = np.where(parent == -1, -1, parent - m0)
+            region_tables.simplify(record_provenance=False)
+            region_ts = region_tables.tree_sequence()
+            if trim:
+                region_ts = region_ts.trim()
+            yield region_ts
+
     def dfe_breakpoints(self, *, relative_coordinates=None):
         """
         Returns two things: the sorted vector of endpoints of all intervals across
@@ -112,41 +112,95 @@ class DemographicModel:
             assert population_configurations is not None
             assert populations is not None
             assert len(populations) == len(population_configurations)
-            population_configurations = copy.deepcopy(population_configurations)
-            # Merge the information from the populations into the msprime
-            # Demography.
-            for pop, pop_config in zip(populations, population_configurations):
-                if pop_config.metadata is None:
-                    pop_config.metadata = {}
-                if pop.id != "" and not pop.id.startswith("qc_"):
-                    pop_config.metadata["name"] = pop.id
-                    pop_config.metadata["description"] = pop.description
-            # This will become a Demes model in the future - for now it's an
-            # msprime model.
-            self.model = msprime.Demography.from_old_style(
-                population_configurations=population_configurations,
-                demographic_events=demographic_events,
-                migration_matrix=migration_matrix,
-                population_map=population_id_map,
-            )
-            for msp_pop, local_pop in zip(self.model.populations, populations):
-                # We use the "allow_samples" attribute in the CLI and else where
-                # so we monkey patch this into the msprime Populations for the
-                # moment.
-                msp_pop.allow_samples = True
-                if local_pop.sampling_time is not None:
-                    msp_pop.default_sampling_time = local_pop.sampling_time
-                else:
-                    msp_pop.allow_samples = False
+            # Building the msprime Demography is comparatively expensive, and
+            # most models in the catalog are never simulated, so we defer it
+            # until the model is first used.
+            self._model = None
+            self._old_style_model = {
+                "populations": populations,
+                "population_configurations": population_configurations,
+                "demographic_events": demographic_events,
+                "migration_matrix": migration_matrix,
+                "population_id_map": population_id_map,
+            }
+            self._population_metadata = []
+            for j, pop in enumerate(populations):
+                # These match the names and descriptions of the populations
+                # in the msprime Demography; see _build_model().
+                name, description = f"pop_{j}", ""
+                if self._is_named(pop):
+                    name, description = pop.id, pop.description
+                self._population_metadata.append(
+                    Population(
+                        id=name,
+                        description=description,
+                        sampling_time=pop.sampling_time,
+                    )
+                )
         else:
             assert population_configurations is None
             assert population_id_map is None
             assert populations is None
-            self.model = copy.deepcopy(model)
+            self._old_style_model = None
+            self._population_metadata = None
+            self._model = copy.deepcopy(model)
             # See note above. We allow samples in all populations for now.
-            for pop in self.model.populations:
+            for pop in self._model.populations:
                 pop.allow_samples = True
 
+    @staticmethod
+    def _is_named(population):
+        return population.id != "" and not population.id.startswith("qc_")
+
+    def _build_model(self):
+        populations = self._old_style_model["populations"]
+        population_configurations = copy.deepcopy(
+            self._old_style_model["population_configurations"]
+        )
+        # Merge the information from the populations into the msprime
+        # Demography.
+        for pop, pop_config in zip(populations, population_configurations):
+            if pop_config.metadata is None:
+                pop_config.metadata = {}
+            if self._is_named(pop):
+                pop_config.metadata["name"] = pop.id
+                pop_config.metadata["description"] = pop.description
+        # This will become a Demes model in the future - for now it's an
+        # msprime model.
+        model = msprime.Demography.from_old_style(
+            population_configurations=population_configurations,
+            demographic_events=self._old_style_model["demographic_events"],
+            migration_matrix=self._old_style_model["migration_matrix"],
+            population_map=self._old_style_model["population_id_map"],
+        )
+        for msp_pop, local_pop in zip(model.populations, populations):
+            # We use the "allow_samples" attribute in the CLI and else where
+            # so we monkey patch this into the msprime Populations for the
+            # moment.
+            msp_pop.allow_samples = True
+            if local_pop.sampling_time is not None:
+                msp_pop.default_sampling_time = local_pop.sampling_time
+            else:
+                msp_pop.allow_samples = False
+        return model
+
+    @property
+    def model(self):
+        """
+        The :class:`msprime.Demography` describing this model. For models
+        defined with old-style population configurations, this is built
+        the first time it is accessed.
+        """
+        if self._model is None:
+            self._model = self._build_model()
+            self._old_style_model = None
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._old_style_model = None
+
     def __str__(self):
         long_desc_lines = [
             line.strip()
@@ -170,13 +224,37 @@ class DemographicModel:
     def populations(self):
         return self.model.populations
 
+    @property
+    def population_metadata(self):
+        """
+        A list of :class:`.Population` objects describing the populations of
+        this model, in the same order as :attr:`.populations`. The ``id`` of
+        each is the name of the corresponding msprime population. Unlike
+        :attr:`.populations`, this does not require the msprime Demography
+        to be built.
+        """
+        if self._model is None:
+            return self._population_metadata
+        return [
+            Population(
+                id=pop.name,
+                description=pop.description,
+                # msprime leaves the default sampling time of populations
+                # as None, which means sampling at time 0.
+                sampling_time=(
+                    (pop.default_sampling_time or 0) if pop.allow_samples else None
+                ),
+            )
+            for pop in self._model.populations
+        ]
+
     @property
     def num_populations(self):
-        return self.model.num_populations
+        return len(self.population_metadata)
 
     @property
     def num_sampling_populations(self):
-        return sum(int(pop.allow_samples) for pop in self.populations)
+        return sum(int(pop.allow_samples) for pop in self.population_metadata)
 
     def register_qc(self, qc_model):
         """
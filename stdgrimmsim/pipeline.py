@@ -0,0 +1,242 @@
+"""
+Generation of simulated training data from the species parameter priors.
+"""
+
+import csv
+import logging
+import os
+
+import attr
+import numpy as np
+
+import stdgrimmsim
+from . import batch
+
+logger = logging.getLogger(__name__)
+
+#: The prior parameters, in the order in which they are written to
+#: parameter tables.
+PRIOR_PARAMETERS = [
+    "generation_time",
+    "population_size",
+    "mutation_rate",
+    "recombination_rate",
+]
+
+
+def site_frequency_spectrum(ts):
+    """
+    The default feature extracted from each simulated replicate: the
+    unnormalised, polarised site frequency spectrum of all samples.
+
+    :param ts: The simulated tree sequence.
+    :type ts: :class:`tskit.TreeSequence`
+    :rtype: numpy.ndarray
+    """
+    return ts.allele_frequency_spectrum(
+        mode="site", polarised=True, span_normalise=False
+    )
+
+
+@attr.s(kw_only=True)
+class TrainingExample:
+    """
+    A single simulated replicate produced by :func:`.training_examples`.
+
+    :ivar index: The index of this example within the run.
+    :vartype index: int
+    :ivar seed: The random seed used for the simulation.
+    :vartype seed: int
+    :ivar params: The parameter values drawn from the prior, keyed by
+        parameter name (see :meth:`.PriorConfig.sample`).
+    :vartype params: dict
+    :ivar features: The features extracted from the simulated tree sequence.
+    :vartype features: numpy.ndarray
+    """
+
+    index = attr.ib(type=int)
+    seed = attr.ib(type=int)
+    params = attr.ib(type=dict)
+    features = attr.ib()
+
+
+def _simulate_example(
+    index, seed, params, species_id, num_samples, contig, feature, engine, engine_kwargs
+):
+    species = stdgrimmsim.get_species(species_id)
+    model = stdgrimmsim.PiecewiseConstantSize(params["population_size"])
+    model.generation_time = params["generation_time"]
+    contig = species.get_contig(
+        **contig,
+        mutation_rate=params["mutation_rate"],
+        recombination_rate=params["recombination_rate"],
+    )
+    ts = stdgrimmsim.get_engine(engine).simulate(
+        model,
+        contig,
+        {model.model.populations[0].name: num_samples},
+        seed=seed,
+        **engine_kwargs,
+    )
+    # Only the features are sent back to the parent process.
+    features = np.asarray(feature(ts))
+    return TrainingExample(index=index, seed=seed, params=params, features=features)
+
+
+def _example_args(prior, num_examples, seed, *args):
+    # Each example gets its own child of the root SeedSequence, which is split
+    # into independent streams for the parameter draw and the simulation.
+    root = np.random.SeedSequence(seed)
+    for index in range(num_examples):
+        param_seed, sim_seed = root.spawn(1)[0].spawn(2)
+        rng = np.random.default_rng(param_seed)
+        params = {k: float(v) for k, v in prior.sample(rng).items()}
+        yield (index, batch._seed_sequence_to_int(sim_seed), params) + args
+
+
+def training_examples(
+    species_id,
+    num_examples,
+    num_samples,
+    *,
+    contig=None,
+    feature=None,
+    prior=None,
+    seed=None,
+    engine="msprime",
+    engine_kwargs=None,
+    workers=1,
+    max_pending=None,
+):
+    """
+    Returns an iterator over simulated training examples for the specified
+    species. For each example, the species parameters are drawn from the
+    prior, a constant size demographic model and a contig are built with
+    those values, the simulation is run and the ``feature`` function is
+    applied to the resulting tree sequence. Only the extracted features are
+    kept, and at most ``max_pending`` examples are simulated or waiting to be
+    yielded at any one time, so memory use is bounded.
+
+    The parameter draws and simulation seed of each example depend only on
+    ``seed`` and the index of the example, and examples are yielded in index
+    order, so the output does not depend on the number of workers.
+
+    .. code-block:: python
+
+        examples = stdgrimmsim.training_examples(
+            "ZweBerg", 1000, 10, contig={"length": 1e6}, seed=1, workers=4
+        )
+        for example in examples:
+            print(example.params["population_size"], example.features)
+
+    :param str species_id: The ID of the species.
+    :param int num_examples: The number of examples to simulate.
+    :param int num_samples: The number of individuals to sample.
+    :param dict contig: Keyword arguments passed to
+        :meth:`.Species.get_contig`. The mutation and recombination rates
+        are always taken from the prior. Defaults to a generic contig of
+        length 1 Mb.
+    :param feature: A function mapping a :class:`tskit.TreeSequence` to a
+        numpy array. This must be a module level function when using more
+        than one worker. Defaults to :func:`.site_frequency_spectrum`.
+    :param prior: The prior from which to draw the parameters. Defaults
+        to the species' prior (see :func:`.get_prior`).
+    :type prior: :class:`.PriorConfig`
+    :param int seed: The root random seed. If None, fresh entropy is used.
+    :param str engine: The ID of the simulation engine.
+    :param dict engine_kwargs: Further keyword arguments passed to the
+        engine's ``simulate()`` method.
+    :param int workers: The number of worker processes (see
+        :func:`.run_batch`).
+    :param int max_pending: The maximum number of examples that are
+        simulated or have been simulated but not yet yielded, because an
+        earlier example is still running. Defaults to twice the number of
+        workers.
+    :rtype: iterator of :class:`.TrainingExample`
+    """
+    if num_examples < 0:
+        raise ValueError("num_examples must be non-negative")
+    if prior is None:
+        prior = stdgrimmsim.get_prior(species_id)
+    contig = {"length": 1e6} if contig is None else dict(contig)
+    for key in ["mutation_rate", "recombination_rate"]:
+        if key in contig:
+            raise ValueError(f"Cannot specify {key}; it is drawn from the prior")
+    feature = site_frequency_spectrum if feature is None else feature
+    engine_kwargs = {} if engine_kwargs is None else engine_kwargs
+    args = _example_args(
+        prior,
+        num_examples,
+        seed,
+        species_id,
+        num_samples,
+        contig,
+        feature,
+        engine,
+        engine_kwargs,
+    )
+    # The examples are simulated in a window of max_pending consecutive
+    # indexes, so the examples that finish ahead of a slower one are bounded.
+    return batch._run_pool(
+        _simulate_example,
+        args,
+        workers=workers,
+        max_pending=max_pending,
+        ordered=True,
+    )
+
+
+def _write_shard(output_dir, shard_index, examples):
+    stem = os.path.join(output_dir, f"shard_{shard_index:05d}")
+    features_path = stem + ".npz"
+    params_path = stem + ".tsv"
+    np.savez(
+        features_path,
+        index=np.array([ex.index for ex in examples], dtype=np.int64),
+        features=np.stack([ex.features for ex in examples]),
+    )
+    with open(params_path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["index", "seed"] + PRIOR_PARAMETERS)
+        for ex in examples:
+            writer.writerow(
+                [ex.index, ex.seed] + [repr(ex.params[k]) for k in PRIOR_PARAMETERS]
+            )
+    logger.info(f"Wrote {len(examples)} examples to {features_path}")
+    return features_path, params_path
+
+
+def write_training_shards(
+    output_dir, species_id, num_examples, num_samples, *, shard_size=1000, **kwargs
+):
+    """
+    Simulates training examples with :func:`.training_examples` and writes
+    them to ``output_dir`` in shards of at most ``shard_size`` examples. For
+    each shard ``shard_NNNNN``, the features are written to
+    ``shard_NNNNN.npz`` (arrays ``index`` and ``features``, where
+    ``features[j]`` is the feature array of example ``index[j]``), and the
+    parameters are written to ``shard_NNNNN.tsv``, with one row per example
+    in the same order. Each shard is written as soon as it is complete.
+
+    :param str output_dir: The directory to write the shards to. It is
+        created if it does not exist.
+    :param int shard_size: The maximum number of examples per shard
+        (default 1000).
+    :param \\**kwargs: Further arguments passed to :func:`.training_examples`.
+    :return: The (features, parameters) file paths of each shard.
+    :rtype: list of tuple
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+    os.makedirs(output_dir, exist_ok=True)
+    examples = training_examples(species_id, num_examples, num_samples, **kwargs)
+    shards = []
+    buffer = []
+    for example in examples:
+        buffer.append(example)
+        if len(buffer) == shard_size:
+            shards.append(_write_shard(output_dir, len(shards), buffer))
+            buffer = []
+    if len(buffer) > 0:
+        shards.append(_write_shard(output_dir, len(shards), buffer))
+    return shards
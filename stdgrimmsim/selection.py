@@ -49,9 +49,10 @@ def validate_time_range(start_time, end_time):
 class ExtendedEvent(object):
     """
     ExtendedEvent is analogous to msprime.DemographicEvent, but is used here
-    for explicitly manipulating mutations. Currently, these are only used by
-    the SLiM engine. Times are all in units of generations before the present,
-    just like for msprime.DemographicEvent.
+    for explicitly manipulating mutations. These are used by the SLiM engine,
+    and the msprime engine supports those of some selective sweeps (see
+    :func:`selective_sweep`). Times are all in units of generations before the
+    present, just like for msprime.DemographicEvent.
     """
 
     pass
@@ -243,6 +244,12 @@ def selective_sweep(
     be rejected and the simulation may take an infeasibly long time to
     complete.
 
+    The msprime engine can also simulate hard sweeps (where
+    `start_generation_ago` is `mutation_generation_ago`) with a dominance
+    coefficient of `0.5` in models with a single population, using
+    :class:`msprime.SweepGenicSelection` rather than rejection sampling. See
+    :meth:`_MsprimeEngine.simulate` for details.
+
     :param str single_site_id: The string ID of the single site at which to introduce
         the mutation, see :meth:`Contig.add_single_site`.
     :param int population: The name of the population in which the mutation is
@@ -40,9 +40,12 @@ How backwards-time demographic events are mapped to forwards-time SLiM code:
 
 import os
 import sys
+import asyncio
 import copy
+import csv
 import string
 import tempfile
+import time
 import subprocess
 import functools
 import itertools
@@ -51,9 +54,11 @@ import random
 import textwrap
 import logging
 import warnings
+import threading
 import collections
 
 import stdgrimmsim
+import attr
 import numpy as np
 import msprime
 import pyslim
@@ -81,9 +86,20 @@ _slim_upper = """
     // `5.5 Rescaling population sizes to improve simulation performance`.
     defineConstant("Q", $scaling_factor);
 
-    defineConstant("burn_in", $burn_in);
+    if (!exists("burn_in"))
+        defineConstant("burn_in", $burn_in);
     defineConstant("generation_time", $generation_time);
-    defineConstant("trees_file", "$trees_file");
+    if (!exists("trees_file"))
+        defineConstant("trees_file", "$trees_file");
+    // Shared burn-in checkpoint: with checkpoint="save", the burn-in is run
+    // and its final state saved to checkpoint_file, and with
+    // checkpoint="load", the simulation starts from the saved state.
+    // With checkpoint="seed", checkpoint_file holds an initial state made
+    // with msprime, which is loaded in the first tick instead of a burn-in.
+    if (!exists("checkpoint"))
+        defineConstant("checkpoint", "");
+    if (!exists("checkpoint_file"))
+        defineConstant("checkpoint_file", "");
     defineConstant("pop_names", $pop_names);
 
     _recombination_rates = $recombination_rates;
@@ -169,11 +185,38 @@ function (integer)time_to_tick(numeric t) {
 
 // Output tree sequence file and end the simulation.
 function (void)end(void) {
+    if (exists("telemetry")) {
+        if ((community.tick - 1) % telemetry_interval != 0)
+            telemetry.logRow();
+    }
     sim.treeSeqOutput(trees_file, metadata=metadata);
     sim.simulationFinished();
 }
 
 
+// Set the migration rates of the first epoch.
+function (void)set_initial_migration_rates(void) {
+    i = 0;
+    for (j in 0:(num_populations-1)) {
+        for (k in 0:(num_populations-1)) {
+            if (j==k | N[i,j] < 1 | N[i,k] < 1) {
+                next;
+            }
+
+            m = Q * migration_matrices[k,j,i];
+            p = sim.subpopulations[j];
+            dbg("p"+j+".setMigrationRates("+k+", "+m+");");
+            p.setMigrationRates(k, m);
+        }
+    }
+}
+
+// Save the state at the end of the shared burn-in and end the simulation.
+function (void)save_checkpoint(void) {
+    sim.treeSeqOutput(checkpoint_file, metadata=metadata);
+    sim.simulationFinished();
+}
+
 // Add `mut_type` mutation at `pos`, to a single individual in `pop`.
 function (void)add_mut(object$ mut_type, object$ pop, integer$ pos) {
    targets = sample(pop.haplosomes, 1);
@@ -253,6 +296,9 @@ function (void)restore(void) {
 
 _slim_main = """
 1 early() {
+    // The script blocks defined in this script, as opposed to registered.
+    script_block_ids = community.allScriptBlocks.id;
+
     // save/restore bookkeeping
     sim.setValue("n_restores", 0);
     sim.setValue("n_saves", 0);
@@ -278,19 +324,7 @@ _slim_main = """
     }
 
     // Initial migration rates.
-    i = 0;
-    for (j in 0:(num_populations-1)) {
-        for (k in 0:(num_populations-1)) {
-            if (j==k | N[i,j] < 1 | N[i,k] < 1) {
-                next;
-            }
-
-            m = Q * migration_matrices[k,j,i];
-            p = sim.subpopulations[j];
-            dbg("p"+j+".setMigrationRates("+k+", "+m+");");
-            p.setMigrationRates(k, m);
-        }
-    }
+    set_initial_migration_rates();
 
     // The end of the burn-in is the starting tick, and corresponds to
     // tick G_start. All remaining events are relative to this tick.
@@ -554,7 +588,25 @@ _slim_main = """
 
     community.registerLateEvent(NULL, "{dbg(self.source); end();}", G_end, G_end);
 
-    if (G_start > community.tick) {
+    // Until the tick before the first registered event, the simulation only
+    // depends on the first epoch, so this is where the burn-in checkpoint
+    // is saved. Mutation callbacks apply at all times and are ignored.
+    sb = community.allScriptBlocks;
+    sb = sb[match(sb.id, script_block_ids) < 0];
+    sb = sb[sb.type != "mutation"];
+    defineConstant("G_checkpoint", min(c(G_start, sb.start)) - 1);
+    if (checkpoint == "save") {
+        if (G_checkpoint < 1) {
+            dbg("No burn-in to save.");
+            sim.simulationFinished();
+        } else {
+            community.registerLateEvent(NULL,
+                "{dbg(self.source); save_checkpoint();}",
+                G_checkpoint, G_checkpoint);
+        }
+    }
+
+    if (G_start > community.tick & checkpoint != "load") {
         dbg("Starting burn-in...");
     }
 
@@ -563,6 +615,23 @@ _slim_main = """
     }
 }
 
+1 late() {
+    if (checkpoint == "load" | checkpoint == "seed") {
+        sim.readFromPopulationFile(checkpoint_file);
+        G_load = 1;
+        if (checkpoint == "load") {
+            G_load = G_checkpoint;
+        }
+        if (community.tick != G_load) {
+            err("The "+checkpoint+" state is from tick "+community.tick+
+                ", but tick "+G_load+" was expected.");
+        }
+        dbg("Loaded the "+checkpoint+" state at tick "+community.tick);
+        // Migration rates are not saved with the population state.
+        set_initial_migration_rates();
+    }
+}
+
 """
 
 _slim_logfile = """
@@ -588,6 +657,40 @@ _slim_logfile = """
 """
 
 
+_slim_telemetry = """
+// Optional telemetry, written to telemetry_file every $interval ticks
+// and in the final tick. Population sizes are as simulated (i.e. divided by
+// the scaling factor), and the number of mutations only counts those
+// simulated by SLiM.
+1 early() {
+    if (!exists("telemetry_file"))
+        defineConstant("telemetry_file", "");
+    if (telemetry_file != "") {
+        defineConstant("telemetry_interval", $interval);
+        defineConstant("telemetry_start", clock("mono"));
+        defineConstant("telemetry", community.createLogFile(
+            telemetry_file, logInterval=NULL));
+        telemetry.addTick();
+        telemetry.addCustomColumn("elapsed", "clock('mono') - telemetry_start;");
+        for (i in seqAlong(pop_names)) {
+            telemetry.addCustomColumn("size_" + pop_names[i],
+                "sum(sim.subpopulations[sim.subpopulations.id == " + i +
+                "].individualCount);");
+        }
+        telemetry.addCustomColumn("num_mutations", "size(sim.mutations);");
+        telemetry.addCustomColumn("memory_mb", "community.usage();");
+    }
+}
+
+1: late() {
+    if (telemetry_file != "") {
+        if ((community.tick - 1) % telemetry_interval == 0)
+            telemetry.logRow();
+    }
+}
+"""
+
+
 _slim_debug_output = """
 
 ///
@@ -751,7 +854,17 @@ _raw_stdgrimmsim_top_level_schema = {
                         "end_time": {"type": "number"},
                     },
                 },
-            }
+            },
+            "slim_telemetry": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "values": {"type": "array"},
+                    },
+                },
+            },
         },
     }
 }
@@ -847,10 +960,11 @@ def _dfe_to_mtypes(contig):
     return dfe_to_mtypes
 
 
-def _add_dfes_to_metadata(ts, contig):
+def _add_dfes_to_metadata(ts, contig, telemetry=None):
     """
     Adds the DFEs to the top-level metadata of a tree sequence using
-    information in the `contig`.
+    information in the `contig`, along with the SLiM telemetry record array
+    (see :func:`.get_slim_telemetry`), if it is not None.
     """
 
     def _get_json(obj):
@@ -875,12 +989,385 @@ def _add_dfes_to_metadata(ts, contig):
             }
             dfes[i]["mutation_types"][j].update(add)
     new_metadata = {"stdgrimmsim": {"DFEs": dfes}}
+    if telemetry is not None:
+        # A list rather than a dict, to keep the columns in order.
+        new_metadata["stdgrimmsim"]["slim_telemetry"] = [
+            {"name": name, "values": telemetry[name].tolist()}
+            for name in telemetry.dtype.names
+        ]
     metadata.update(new_metadata)
     tables.metadata_schema = tskit.MetadataSchema(schema)
     tables.metadata = metadata
     return tables.tree_sequence()
 
 
+def _read_slim_telemetry(filename):
+    """
+    Returns the telemetry written by SLiM to the specified CSV file as a
+    record array (see :func:`.get_slim_telemetry`).
+    """
+    with open(filename, newline="") as f:
+        rows = list(csv.reader(f))
+    header, rows = rows[0], rows[1:]
+    columns = {}
+    for j, name in enumerate(header):
+        dtype = np.float64 if name in ("elapsed", "memory_mb") else np.int64
+        columns[name] = np.array([row[j] for row in rows], dtype=dtype)
+        if name == "elapsed":
+            columns["wall_time"] = np.diff(columns[name], prepend=0)
+    return np.rec.fromarrays(list(columns.values()), names=list(columns.keys()))
+
+
+def get_slim_telemetry(ts):
+    """
+    Returns the telemetry recorded by the SLiM engine during the simulation
+    that produced the specified tree sequence, when run with
+    ``slim_telemetry_interval`` (see :meth:`_SLiMEngine.simulate`), or None
+    if no telemetry was recorded. This is a :class:`numpy.recarray` with one
+    row for every ``slim_telemetry_interval`` ticks, and a final row for
+    the last tick, and the following fields:
+
+    - ``tick``: the SLiM tick.
+    - ``elapsed``: the wall time, in seconds, since the start of the first
+      tick.
+    - ``wall_time``: the wall time, in seconds, since the previous row.
+    - ``size_<name>``: the number of individuals in population ``<name>``,
+      as simulated by SLiM (i.e., divided by the scaling factor).
+    - ``num_mutations``: the number of segregating mutations in SLiM.
+      Neutral mutations are added after the simulation, so aren't counted.
+    - ``memory_mb``: the memory usage of SLiM, in megabytes, as reported by
+      ``community.usage()``. This includes the tree sequence tables
+      recorded since the last simplification.
+
+    :param ts: A tree sequence simulated with the SLiM engine.
+    :type ts: :class:`tskit.TreeSequence`
+    :rtype: numpy.recarray
+    """
+    metadata = ts.metadata if isinstance(ts.metadata, dict) else {}
+    telemetry = metadata.get("stdgrimmsim", {}).get("slim_telemetry")
+    if telemetry is None:
+        return None
+    return np.rec.fromarrays(
+        [np.array(column["values"]) for column in telemetry],
+        names=[column["name"] for column in telemetry],
+    )
+
+
+def _slim_mutation_ids(tables):
+    """
+    Returns the SLiM mutation ids in the derived states of the mutations in
+    the specified table collection, as a tuple ``(ids, offset)``, where the
+    ids of mutation ``j`` are ``ids[offset[j]:offset[j + 1]]``. Derived states
+    are comma-separated lists of (non-negative) SLiM mutation ids, which are
+    parsed directly from the ragged ``derived_state`` column.
+    """
+    chars = tables.mutations.derived_state.view(np.uint8)
+    state_offset = tables.mutations.derived_state_offset
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    # An id starts at a digit that does not follow a digit in the same
+    # derived state.
+    is_start = is_digit.copy()
+    is_start[1:] &= ~is_digit[:-1]
+    first = state_offset[:-1][state_offset[:-1] < len(chars)]
+    is_start[first] = is_digit[first]
+    position = np.flatnonzero(is_digit)
+    token = np.cumsum(is_start)[position] - 1
+    token_length = np.bincount(token)
+    token_first = np.concatenate(([0], np.cumsum(token_length)[:-1]))
+    ids = np.zeros(len(token_length), dtype=np.int64)
+    if len(ids) > 0:
+        # The power of ten of each digit is the number of digits after it.
+        exponent = (
+            token_length[token] - 1 - (np.arange(len(position)) - token_first[token])
+        )
+        values = (chars[position] - ord("0")).astype(np.int64) * np.int64(10) ** exponent
+        ids = np.add.reduceat(values, token_first)
+    row = np.searchsorted(state_offset, np.flatnonzero(is_start), side="right") - 1
+    offset = np.concatenate(
+        ([0], np.cumsum(np.bincount(row, minlength=len(state_offset) - 1)))
+    )
+    return ids, offset
+
+
+def _max_slim_mutation_id(tables):
+    """
+    Returns the largest SLiM mutation id in the derived states of the
+    mutations in the specified table collection, or -1 if there are none.
+    """
+    ids, _ = _slim_mutation_ids(tables)
+    return int(np.max(ids)) if len(ids) > 0 else -1
+
+
+# The size in bytes of each entry in the "mutation_list" of SLiM mutation
+# metadata (mutation_type int32, selection_coeff float32, subpopulation int32,
+# slim_time int32, nucleotide int8), which starts with the mutation type.
+_SLIM_MUTATION_METADATA_SIZE = 17
+
+
+def _set_slim_mutation_types(tables, mutation_type, first_id):
+    """
+    Sets the SLiM mutation type of the mutations with SLiM ids
+    ``first_id + j`` to ``mutation_type[j]``, wherever they appear in the
+    (possibly stacked) derived states and metadata of the mutation table.
+    """
+    _set_slim_mutation_metadata(tables, 0, mutation_type.astype("<i4"), first_id)
+
+
+def _set_slim_selection_coeffs(tables, selection_coeff, first_id):
+    """
+    Sets the selection coefficient of the mutations with SLiM ids
+    ``first_id + j`` to ``selection_coeff[j]``, as for
+    :func:`_set_slim_mutation_types`.
+    """
+    _set_slim_mutation_metadata(tables, 4, selection_coeff.astype("<f4"), first_id)
+
+
+def _set_slim_mutation_metadata(tables, field_offset, values, first_id):
+    # Sets the 4-byte field at field_offset in the metadata entries of the
+    # mutations with SLiM ids first_id + j to values[j].
+    ids, offset = _slim_mutation_ids(tables)
+    num_ids = np.diff(offset)
+    metadata_offset = tables.mutations.metadata_offset.astype(np.int64)
+    if np.any(np.diff(metadata_offset) != _SLIM_MUTATION_METADATA_SIZE * num_ids):
+        raise ValueError("Mutation metadata does not match the SLiM mutation ids")
+    row = np.repeat(np.arange(len(num_ids)), num_ids)
+    index = np.flatnonzero((ids >= first_id) & (ids < first_id + len(values)))
+    start = (
+        metadata_offset[row[index]]
+        + _SLIM_MUTATION_METADATA_SIZE * (index - offset[row[index]])
+        + field_offset
+    )
+    field = values[ids[index] - first_id].view(np.uint8)
+    metadata = tables.mutations.metadata.view(np.uint8).copy()
+    metadata[start[:, np.newaxis] + np.arange(4)] = field.reshape(-1, 4)
+    columns = tables.mutations.asdict()
+    del columns["metadata_schema"]
+    columns["metadata"] = metadata.view(np.int8)
+    tables.mutations.set_columns(**columns)
+
+
+def _add_neutral_mutations(
+    ts, breaks, labels, mutation_types, next_id, seed, start_time=None, end_time=None
+):
+    """
+    Adds neutral SLiM mutations of several mutation types to ``ts`` with a
+    single call to :func:`msprime.sim_mutations`, and returns the resulting
+    tree sequence together with the next unused SLiM mutation id.
+
+    The interval ``[breaks[k], breaks[k + 1])`` has label ``labels[k]``, and
+    ``mutation_types[i]`` is a tuple ``(type_ids, rates)`` giving the SLiM
+    mutation type ids and mutation rates of the neutral mutations in the
+    intervals labelled ``i`` (a label of -1 has no mutations). Since
+    independent Poisson processes are equivalent to a single process with
+    the summed rate in which each event picks its type in proportion to the
+    rates, the mutations are placed with the total rate, and the type of
+    each new mutation is then drawn and written into its metadata.
+    """
+    total_rates = np.array([np.sum(rates) for _, rates in mutation_types] + [0])
+    if np.all(total_rates == 0):
+        return ts, next_id
+    type_ids = np.concatenate([ids for ids, _ in mutation_types]).astype(np.int32)
+    rng = np.random.default_rng(seed)
+    num_mutations = ts.num_mutations
+    # Use msprime.SLiMMutationModel rather than msprime.JC69 for neutral DFEs.
+    # This ensures that there will be a 'selection_coef' key in the mutation
+    # metadata (so the mutation metadata structure will be consistent across
+    # the tree sequence).
+    # TODO: set stacking policy to "l" when supported
+    ts = msprime.sim_mutations(
+        ts,
+        rate=msprime.RateMap(position=breaks, rate=total_rates[labels]),
+        model=msprime.SLiMMutationModel(type=int(type_ids[0]), next_id=next_id),
+        start_time=start_time,
+        end_time=end_time,
+        keep=True,
+        random_seed=int(rng.integers(1, 2**32)),
+    )
+    # The new mutations are given consecutive SLiM ids from next_id.
+    num_new = ts.num_mutations - num_mutations
+    if num_new > 0 and np.any(type_ids != type_ids[0]):
+        tables = ts.dump_tables()
+        ids, offset = _slim_mutation_ids(tables)
+        # Each new id is the last one in the derived state of the mutation
+        # that introduced it.
+        last = offset[1:][offset[1:] > offset[:-1]] - 1
+        is_new = ids[last] >= next_id
+        new_ids = ids[last][is_new] - next_id
+        rows = np.flatnonzero(offset[1:] > offset[:-1])[is_new]
+        position = tables.sites.position[tables.mutations.site[rows]]
+        label = labels[np.searchsorted(breaks, position, side="right") - 1]
+        mutation_type = np.zeros(num_new, dtype=np.int32)
+        u = rng.random(len(new_ids))
+        for i, (ids_i, rates_i) in enumerate(mutation_types):
+            in_label = label == i
+            if not np.any(in_label):
+                continue
+            cumulative = np.cumsum(rates_i) / np.sum(rates_i)
+            choice = np.searchsorted(cumulative, u[in_label], side="right")
+            choice = np.minimum(choice, len(ids_i) - 1)
+            mutation_type[new_ids[in_label]] = np.asarray(ids_i)[choice]
+        _set_slim_mutation_types(tables, mutation_type, next_id)
+        ts = tables.tree_sequence()
+    return ts, next_id + num_new
+
+
+def _draw_selection_coeffs(mutation_type, scaling_factor, size, rng):
+    """
+    Draws ``size`` selection coefficients from the distribution of the
+    :class:`.MutationType`, with its parameters rescaled by the scaling factor
+    as they are in the SLiM script.
+    """
+    distribution_type = mutation_type.distribution_type
+    if distribution_type not in ("f", "e", "g", "n", "w"):
+        raise ValueError(
+            "Cannot draw selection coefficients for the initial state from a "
+            f"distribution of type '{distribution_type}'; this is only possible "
+            "for the 'f', 'e', 'g', 'n' and 'w' distribution types."
+        )
+    args = [float(arg) for arg in mutation_type.distribution_args]
+    for k in mutation_type.Q_scaled_index:
+        args[k] *= scaling_factor
+    if distribution_type == "f":
+        return np.full(size, args[0])
+    elif distribution_type == "e":
+        return np.sign(args[0]) * rng.exponential(abs(args[0]), size)
+    elif distribution_type == "g":
+        mean, shape = args
+        return np.sign(mean) * rng.gamma(shape, abs(mean) / shape, size)
+    elif distribution_type == "n":
+        return rng.normal(args[0], args[1], size)
+    else:
+        assert distribution_type == "w"
+        return args[0] * rng.weibull(args[1], size)
+
+
+def _slim_epochs(demographic_model):
+    """
+    Returns the epochs of the demographic model, oldest first, as in
+    :func:`slim_makescript`, and a boolean array that is False for the
+    populations that are not present in each epoch of the SLiM simulation,
+    because they are created by a later split.
+    """
+    dd = demographic_model.model.debug()
+    epochs = sorted(dd.epochs, key=lambda e: e.start_time, reverse=True)
+    present = np.ones((len(epochs), dd.num_populations), dtype=bool)
+    for i, epoch in enumerate(epochs):
+        for de in epoch.demographic_events:
+            if isinstance(de, msprime.demography.LineageMovementEvent):
+                for lm in de._as_lineage_movements():
+                    if lm.proportion >= 1:
+                        present[: i + 1, lm.source] = False
+    return epochs, present
+
+
+def _slim_initial_epoch(demographic_model, contig):
+    """
+    Returns the population sizes and migration matrix of the first epoch of
+    the SLiM simulation of the demographic model, before rescaling. As in
+    :func:`slim_makescript`, the sizes are in diploid individuals.
+    """
+    epochs, present = _slim_epochs(demographic_model)
+    sizes = np.array([pop.end_size * contig.ploidy / 2 for pop in epochs[0].populations])
+    sizes[~present[0]] = 0
+    migration_matrix = np.array(epochs[0].migration_matrix)
+    migration_matrix[~present[0], :] = 0
+    migration_matrix[:, ~present[0]] = 0
+    return sizes, migration_matrix
+
+
+def _msprime_initial_state(demographic_model, contig, scaling_factor, seed):
+    """
+    Returns a tree sequence with the population at the start of the SLiM
+    simulation, for SLiM to load (see ``slim_msprime_burn_in``) instead of
+    running a burn-in. The genealogy is simulated with msprime under the
+    first epoch of the demographic model, rescaled as in the SLiM script,
+    and the mutations that SLiM would simulate (those of the non-neutral
+    mutation types) are placed on it with selection coefficients drawn from
+    their distributions. The tree sequence is annotated by
+    :func:`pyslim.annotate` as the state at the end of the first tick.
+    """
+    Q = scaling_factor
+    rng = np.random.default_rng(seed)
+    sizes, migration_matrix = _slim_initial_epoch(demographic_model, contig)
+    # SLiM rounds half-integer population sizes up.
+    sizes = np.floor(sizes / Q + 0.5).astype(int)
+    if np.all(sizes == 0):
+        raise ValueError("No populations with non-zero size in the first epoch.")
+    demography = msprime.Demography()
+    for pop, size in zip(demographic_model.model.populations, sizes):
+        demography.add_population(name=pop.name, initial_size=size)
+    demography.migration_matrix[:] = Q * migration_matrix
+    rates, _ = msprime_rm_to_slim_rm(contig.recombination_map)
+    if Q != 1:
+        rates = (1 - (1 - 2 * rates) ** Q) / 2
+    ts = msprime.sim_ancestry(
+        samples=[
+            msprime.SampleSet(size, population=j, ploidy=2)
+            for j, size in enumerate(sizes)
+            if size > 0
+        ],
+        demography=demography,
+        recombination_rate=msprime.RateMap(
+            position=contig.recombination_map.position, rate=rates
+        ),
+        random_seed=int(rng.integers(1, 2**32)),
+    )
+
+    # Each non-neutral mutation type gets its own pass, so that the SLiM ids
+    # of the new mutations of each type are consecutive.
+    breaks, dfe_labels = contig.dfe_breakpoints()  # beware -1 labels
+    dfe_mtypes = _dfe_to_mtypes(contig)
+    next_id = 0
+    for i, d, _ in _enum_dfe_and_intervals(contig):
+        for prop, (mid_list, mt) in zip(d.proportions, dfe_mtypes[i]):
+            if mt.is_neutral or prop == 0:
+                continue
+            mutation_types = [([], [])] * len(contig.dfe_list)
+            mutation_types[i] = ([mid_list[0]], [Q * prop * contig.mutation_rate])
+            ts, new_next_id = _add_neutral_mutations(
+                ts,
+                breaks,
+                dfe_labels,
+                mutation_types,
+                next_id,
+                seed=rng.integers(1, 2**32),
+            )
+            s = _draw_selection_coeffs(mt, Q, new_next_id - next_id, rng)
+            tables = ts.dump_tables()
+            _set_slim_selection_coeffs(tables, s, next_id)
+            if mt.dominance_coeff_list is not None:
+                # As in the mutation callback of the SLiM script.
+                k = np.searchsorted(mt.dominance_coeff_breaks, s, side="right")
+                _set_slim_mutation_types(tables, np.array(mid_list[1:])[k], next_id)
+            ts = tables.tree_sequence()
+            next_id = new_next_id
+
+    tables = pyslim.annotate(
+        ts, model_type="WF", tick=1, stage="late", annotate_mutations=False
+    ).dump_tables()
+    metadata = tables.metadata
+    metadata["SLiM"]["separate_sexes"] = contig.species.separate_sexes
+    tables.metadata = metadata
+    for j, pop in enumerate(tables.populations):
+        md = None
+        if sizes[j] > 0:
+            md = pop.metadata
+            md["name"] = demography.populations[j].name
+        tables.populations[j] = pop.replace(metadata=md)
+    if contig.species.separate_sexes:
+        sexes = rng.integers(0, 2, size=tables.individuals.num_rows)
+        individual_metadata = []
+        for ind, sex in zip(tables.individuals, sexes):
+            md = ind.metadata
+            md["sex"] = int(sex)
+            individual_metadata.append(md)
+        schema = tables.individuals.metadata_schema
+        tables.individuals.packset_metadata(
+            [schema.validate_and_encode_row(md) for md in individual_metadata]
+        )
+    return tables.tree_sequence()
+
+
 def msprime_rm_to_slim_rm(recombination_map):
     """
     Convert recombination map from start position coords to end position coords.
@@ -922,6 +1409,7 @@ def slim_makescript(
     slim_rate_map,
     logfile=None,
     logfile_interval=1,
+    telemetry_interval=None,
 ):
 
     pop_names = [pop.name for pop in demographic_model.model.populations]
@@ -937,16 +1425,16 @@ def slim_makescript(
     # This collapses the time deltas used in HomSap/AmericanAdmixture_4B18,
     # and calculates times for GenerationAfter objects.
     def fix_time(event):
-        for attr in ("time", "start_time", "end_time"):
-            if not hasattr(event, attr):
+        for name in ("time", "start_time", "end_time"):
+            if not hasattr(event, name):
                 continue
-            t = getattr(event, attr)
+            t = getattr(event, name)
             t_rounded = round(float(t) / scaling_factor) * scaling_factor
             if isinstance(t, stdgrimmsim.GenerationAfter):
                 t_rounded -= scaling_factor
             if t_rounded < 0:
-                raise ValueError(f"Bad {attr}: {getattr(event, attr)}")
-            setattr(event, attr, t_rounded)
+                raise ValueError(f"Bad {name}: {getattr(event, name)}")
+            setattr(event, name, t_rounded)
 
     for event in demographic_events:
         fix_time(event)
@@ -1531,15 +2019,500 @@ def slim_makescript(
                 loginterval=logfile_interval,
             )
         )
+    if telemetry_interval is not None:
+        printsc(string.Template(_slim_telemetry).substitute(interval=telemetry_interval))
     printsc(_slim_debug_output)
 
     return epochs[0]
 
 
+def _slim_script_key(
+    demographic_model,
+    contig,
+    sample_sets,
+    extended_events,
+    scaling_factor,
+    logfile,
+    logfile_interval,
+    telemetry_interval,
+):
+    """
+    Returns a key identifying the script that :func:`slim_makescript` writes
+    for the specified inputs, other than the ``trees_file`` and ``burn_in``,
+    which are passed to SLiM as defines. Returns None if the inputs can't be
+    hashed. The scaling factor is part of the key, because event times are
+    rounded to multiples of it when the script is written.
+    """
+    try:
+        return stdgrimmsim.cache._stable_hash(
+            [
+                stdgrimmsim.__version__,
+                demographic_model.id,
+                demographic_model.description,
+                [str(citation) for citation in demographic_model.citations],
+                demographic_model.generation_time,
+                [pop.name for pop in demographic_model.populations],
+                demographic_model.model,
+                contig,
+                contig.species.separate_sexes,
+                sample_sets,
+                extended_events,
+                scaling_factor,
+                None if logfile is None else str(logfile),
+                logfile_interval,
+                telemetry_interval,
+            ]
+        )
+    except TypeError:
+        return None
+
+
+def _scratch_tempdir(prefix):
+    """
+    Returns a new temporary directory in the scratch directory (see
+    :func:`.get_scratch_dir`).
+    """
+    scratch_dir = stdgrimmsim.get_scratch_dir()
+    os.makedirs(scratch_dir, exist_ok=True)
+    return tempfile.TemporaryDirectory(
+        prefix=prefix, dir=scratch_dir, ignore_cleanup_errors=True
+    )
+
+
+class _ScriptCache:
+    """
+    The SLiM scripts written by this process, so that simulations that only
+    differ in the seed, burn-in or output file can reuse a script rather
+    than generating it again. Up to ``max_scripts`` scripts are kept in a
+    temporary directory, together with the recapitation epoch returned by
+    :func:`slim_makescript` and any warnings it issued.
+    """
+
+    def __init__(self, max_scripts=32):
+        self.max_scripts = max_scripts
+        self._pid = None
+        self._tempdir = None
+        self._scripts = collections.OrderedDict()
+        # The number of simulations using each script, which must not be
+        # removed until SLiM has run.
+        self._in_use = collections.Counter()
+
+    def clear(self):
+        if self._tempdir is not None and self._pid == os.getpid():
+            self._tempdir.cleanup()
+        self._pid = None
+        self._tempdir = None
+        self._scripts.clear()
+        self._in_use.clear()
+
+    def get(self, key, make_script):
+        """
+        Returns the filename and recapitation epoch of the script with the
+        specified key, calling ``make_script(script_file)`` to write it if it
+        is not in the cache.
+        """
+        if self._pid != os.getpid():
+            # Don't share the directory with a forked parent process.
+            self._pid = os.getpid()
+            self._tempdir = _scratch_tempdir("stdgrimmsim_scripts_")
+            self._scripts.clear()
+            self._in_use.clear()
+        if key in self._scripts:
+            self._scripts.move_to_end(key)
+            script_filename, recap_epoch, caught = self._scripts[key]
+        else:
+            script_filename = os.path.join(self._tempdir.name, f"{key}.slim")
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                with open(script_filename, "w", encoding="utf-8") as script_file:
+                    recap_epoch = make_script(script_file)
+            self._scripts[key] = (script_filename, recap_epoch, caught)
+            while len(self._scripts) > self.max_scripts:
+                old_filename, _, _ = self._scripts.popitem(last=False)[1]
+                if self._in_use[old_filename] == 0:
+                    os.unlink(old_filename)
+        for w in caught:
+            warnings.warn(w.message)
+        return script_filename, recap_epoch
+
+    @contextlib.contextmanager
+    def use(self, key, make_script):
+        """
+        A context manager version of :meth:`.get`, which ensures that the
+        script is not removed from the cache directory until it exits.
+        """
+        script_filename, recap_epoch = self.get(key, make_script)
+        self._in_use[script_filename] += 1
+        try:
+            yield script_filename, recap_epoch
+        finally:
+            self._in_use[script_filename] -= 1
+            if self._in_use[script_filename] == 0:
+                del self._in_use[script_filename]
+                in_cache = any(v[0] == script_filename for v in self._scripts.values())
+                if not in_cache and os.path.exists(script_filename):
+                    os.unlink(script_filename)
+
+
+_script_cache = _ScriptCache()
+
+# The maximum total size of the burn-in checkpoints saved in the cache
+# directory, in bytes.
+_slim_checkpoint_max_size = 2**30
+
+
+def _checkpoint_cache():
+    return stdgrimmsim.ResultCache(
+        path=stdgrimmsim.get_cache_dir() / "slim_checkpoints",
+        max_size=_slim_checkpoint_max_size,
+    )
+
+
+def set_slim_checkpoint_max_size(max_size):
+    """
+    Sets the maximum total size of the burn-in checkpoints saved in the cache
+    directory by the SLiM engine's ``slim_checkpoint_seed`` option (default
+    1 GiB). When a checkpoint is saved and the total size of the saved
+    checkpoints exceeds this, the least recently used checkpoints are removed.
+
+    :param int max_size: The maximum total size of the checkpoints, in bytes.
+    """
+    global _slim_checkpoint_max_size
+    if max_size < 0:
+        raise ValueError("max_size must be non-negative")
+    _slim_checkpoint_max_size = max_size
+
+
+def clear_slim_checkpoints():
+    """
+    Removes all burn-in checkpoints saved in the cache directory by the SLiM
+    engine's ``slim_checkpoint_seed`` option.
+    """
+    _checkpoint_cache().clear()
+
+
+# The maximum length of a line of SLiM output read by SLiMRunner.
+_SLIM_OUTPUT_LINE_LIMIT = 2**24
+
+
+def _run_until_complete(coro):
+    """
+    Runs a coroutine that never suspends (that is, never awaits anything
+    that isn't immediately available) and returns its result. This lets the
+    synchronous and asynchronous code paths share one implementation without
+    needing an event loop for the former.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError("Coroutine was suspended")
+
+
+@functools.lru_cache(maxsize=None)
+def _slim_version(slim_path):
+    # Each SLiM executable is only run once to find its version, as this is
+    # needed for every simulation.
+    s = subprocess.check_output([slim_path, "-v"])
+    return s.split()[2].decode("ascii").rstrip(",")
+
+
 class SLiMException(Exception):
     pass
 
 
+@attr.s(kw_only=True)
+class SLiMCost:
+    """
+    The cost of a SLiM simulation, as predicted by :meth:`.SLiMCostModel.predict`,
+    together with the quantities that the prediction is based on.
+
+    :ivar scaling_factor: The scaling factor of the simulation.
+    :vartype scaling_factor: float
+    :ivar burn_in: The length of the burn-in, in units of N generations.
+    :vartype burn_in: float
+    :ivar ticks: The number of SLiM ticks, including the burn-in.
+    :vartype ticks: float
+    :ivar individual_ticks: The number of individuals alive in each tick,
+        summed over ticks.
+    :vartype individual_ticks: float
+    :ivar genome_events: The expected number of recombination and (non-neutral)
+        mutation events in all genomes, summed over ticks.
+    :vartype genome_events: float
+    :ivar peak_individuals: The largest number of individuals alive at once.
+    :vartype peak_individuals: float
+    :ivar peak_load: The square of ``peak_individuals``, times the expected
+        number of recombination and mutation events per genome per tick.
+        The size of the tree sequence tables and of the set of segregating
+        mutations kept by SLiM grow as this does.
+    :vartype peak_load: float
+    :ivar runtime: The predicted runtime, in seconds (None if the cost model
+        has no runtime coefficients).
+    :vartype runtime: float
+    :ivar memory: The predicted peak memory use, in bytes (None if the cost
+        model has no memory coefficients).
+    :vartype memory: float
+    """
+
+    scaling_factor = attr.ib(type=float)
+    burn_in = attr.ib(type=float)
+    ticks = attr.ib(type=float)
+    individual_ticks = attr.ib(type=float)
+    genome_events = attr.ib(type=float)
+    peak_individuals = attr.ib(type=float)
+    peak_load = attr.ib(type=float)
+    runtime = attr.ib(type=float, default=None)
+    memory = attr.ib(type=float, default=None)
+
+    def _runtime_features(self):
+        return np.array([1, self.ticks, self.individual_ticks, self.genome_events])
+
+    def _memory_features(self):
+        return np.array([1, self.peak_individuals, self.peak_load])
+
+
+def _nonnegative_lstsq(X, y):
+    # Least squares with non-negative coefficients, by dropping the most
+    # negative coefficient until there are none left.
+    active = np.ones(X.shape[1], dtype=bool)
+    coefficients = np.zeros(X.shape[1])
+    while np.any(active):
+        solution = np.linalg.lstsq(X[:, active], y, rcond=None)[0]
+        if np.all(solution >= 0):
+            coefficients[active] = solution
+            break
+        active[np.flatnonzero(active)[np.argmin(solution)]] = False
+    return coefficients
+
+
+@attr.s(kw_only=True)
+class SLiMCostModel:
+    """
+    A model of the runtime and peak memory use of SLiM simulations, used to
+    choose the scaling factor automatically (see the ``slim_scaling_factor``
+    parameter of :meth:`_SLiMEngine.simulate`).
+
+    The runtime is predicted as a linear function of the number of ticks,
+    the number of individual-ticks and the number of recombination and
+    mutation events (see :class:`.SLiMCost`), and the memory as a linear
+    function of the peak number of individuals and the peak load. These are
+    computed from the epochs of the demographic model, rescaled as in the
+    SLiM script, the recombination map of the contig and the rates of the
+    mutations simulated by SLiM. The coefficients depend on the machine and
+    the version of SLiM, so there are no default values: they are obtained
+    with :meth:`.fit` from benchmark runs. A model without coefficients only
+    computes the quantities that the predictions are based on.
+
+    :ivar runtime_coefficients: The runtime, in seconds, of a simulation,
+        and per tick, per individual-tick and per genome event.
+    :vartype runtime_coefficients: list
+    :ivar memory_coefficients: The memory use, in bytes, of a simulation,
+        and per peak individual and per unit of peak load.
+    :vartype memory_coefficients: list
+    """
+
+    runtime_coefficients = attr.ib(default=None)
+    memory_coefficients = attr.ib(default=None)
+
+    @runtime_coefficients.validator
+    def _check_runtime_coefficients(self, attribute, value):
+        if value is not None and len(value) != 4:
+            raise ValueError("runtime_coefficients must have 4 values")
+
+    @memory_coefficients.validator
+    def _check_memory_coefficients(self, attribute, value):
+        if value is not None and len(value) != 3:
+            raise ValueError("memory_coefficients must have 3 values")
+
+    def predict(self, demographic_model, contig, *, scaling_factor=1, burn_in=10):
+        """
+        Predicts the cost of simulating the demographic model on the contig
+        with SLiM. The predicted runtime (or memory use) is None if the
+        model has no runtime (or memory) coefficients.
+
+        :param demographic_model: The demographic model.
+        :type demographic_model: :class:`.DemographicModel`
+        :param contig: The contig.
+        :type contig: :class:`.Contig`
+        :param float scaling_factor: The scaling factor.
+        :param float burn_in: The length of the burn-in, in units of N
+            generations.
+        :rtype: :class:`.SLiMCost`
+        """
+        Q = scaling_factor
+        epochs, present = _slim_epochs(demographic_model)
+        scale = contig.ploidy / 2 * present
+        start_sizes = np.array([[p.start_size for p in e.populations] for e in epochs])
+        end_sizes = np.array([[p.end_size for p in e.populations] for e in epochs])
+        growth_rates = np.array([[p.growth_rate for p in e.populations] for e in epochs])
+        start_sizes = start_sizes * scale / Q
+        end_sizes = end_sizes * scale / Q
+
+        # The first epoch is only simulated during the burn-in.
+        burn_in_ticks = round(burn_in * np.max(end_sizes[0]))
+        ticks = burn_in_ticks
+        individual_ticks = burn_in_ticks * np.sum(end_sizes[0])
+        for i, epoch in enumerate(epochs[1:], 1):
+            duration = (epoch.end_time - epoch.start_time) / Q
+            ticks += duration
+            for j, r in enumerate(growth_rates[i]):
+                if r == 0:
+                    individual_ticks += end_sizes[i, j] * duration
+                else:
+                    individual_ticks += (start_sizes[i, j] - end_sizes[i, j]) / (r * Q)
+        peak_individuals = np.max(np.sum(np.maximum(start_sizes, end_sizes), axis=1))
+
+        recombination_map = contig.recombination_map
+        recombination_rate = np.nan_to_num(recombination_map.rate)
+        events = np.sum(recombination_rate * recombination_map.span)
+        ends, rates = get_slim_mutation_rate_map(contig)
+        events += np.sum(rates * np.diff(ends, prepend=-1))
+        events *= Q  # per genome per tick
+        cost = SLiMCost(
+            scaling_factor=Q,
+            burn_in=burn_in,
+            ticks=float(ticks),
+            individual_ticks=float(individual_ticks),
+            genome_events=float(2 * individual_ticks * events),
+            peak_individuals=float(peak_individuals),
+            peak_load=float(peak_individuals**2 * events),
+        )
+        if self.runtime_coefficients is not None:
+            cost.runtime = float(cost._runtime_features() @ self.runtime_coefficients)
+        if self.memory_coefficients is not None:
+            cost.memory = float(cost._memory_features() @ self.memory_coefficients)
+        return cost
+
+    @classmethod
+    def fit(cls, costs, runtimes, memories):
+        """
+        Fits the coefficients of the model to benchmark runs, minimising the
+        relative error of the predictions. The coefficients are constrained
+        to be non-negative.
+
+        .. code-block:: python
+
+            model = stdgrimmsim.SLiMCostModel()
+            costs = [
+                model.predict(demographic_model, contig, scaling_factor=Q)
+                for Q in scaling_factors
+            ]
+            # Run the simulations, measuring runtimes and memories, then:
+            model = stdgrimmsim.SLiMCostModel.fit(costs, runtimes, memories)
+
+        :param costs: The costs predicted for each benchmark run, by any
+            :class:`.SLiMCostModel`. Only the quantities the predictions are
+            based on are used.
+        :type costs: list of :class:`.SLiMCost`
+        :param runtimes: The measured runtimes, in seconds.
+        :type runtimes: list of float
+        :param memories: The measured peak memory use, in bytes.
+        :type memories: list of float
+        :rtype: :class:`.SLiMCostModel`
+        """
+        if not len(costs) == len(runtimes) == len(memories):
+            raise ValueError("costs, runtimes and memories must have the same length")
+        if len(costs) == 0:
+            raise ValueError("At least one benchmark run is needed")
+        coefficients = []
+        for features, y in [
+            ([c._runtime_features() for c in costs], runtimes),
+            ([c._memory_features() for c in costs], memories),
+        ]:
+            y = np.array(y, dtype=float)
+            if np.any(y <= 0):
+                raise ValueError("Runtimes and memories must be positive")
+            X = np.array(features) / y[:, np.newaxis]
+            coefficients.append(list(_nonnegative_lstsq(X, np.ones(len(y)))))
+        return cls(
+            runtime_coefficients=coefficients[0], memory_coefficients=coefficients[1]
+        )
+
+    def choose_scaling_factor(
+        self,
+        demographic_model,
+        contig,
+        *,
+        burn_in=10,
+        max_runtime=None,
+        max_memory=None,
+        scaling_factors=None,
+    ):
+        """
+        Returns the predicted cost of the simulation with the smallest scaling
+        factor whose predicted runtime and memory use are within the specified
+        limits. Scaling factors that would leave fewer than 50 individuals in
+        a population are not considered, other than 1.
+
+        The model must have been fitted to benchmark runs on the machine that
+        runs the simulations. From a stdgrimmsim source checkout,
+        ``python -m maintenance fit-slim-cost-model cost_model.json`` runs
+        SLiM over a grid of contig lengths and scaling factors, fits the model
+        with :meth:`.fit` and writes its coefficients to ``cost_model.json``,
+        which is loaded with:
+
+        .. code-block:: python
+
+            with open("cost_model.json") as f:
+                cost_model = stdgrimmsim.SLiMCostModel(**json.load(f))
+
+        On the command line, the file is passed with ``--slim-cost-model``.
+
+        :param demographic_model: The demographic model.
+        :type demographic_model: :class:`.DemographicModel`
+        :param contig: The contig.
+        :type contig: :class:`.Contig`
+        :param float burn_in: The length of the burn-in, in units of N
+            generations.
+        :param float max_runtime: The maximum runtime, in seconds.
+        :param float max_memory: The maximum memory use, in bytes.
+        :param scaling_factors: The scaling factors to consider. Defaults to
+            1, 2, 5, 10, 20, 50, ..., 1000.
+        :type scaling_factors: list of float
+        :rtype: :class:`.SLiMCost`
+        """
+        if max_runtime is None and max_memory is None:
+            raise ValueError("At least one of max_runtime or max_memory is needed")
+        if max_runtime is not None and self.runtime_coefficients is None:
+            raise ValueError(
+                "The cost model has no runtime coefficients: fit it to benchmark "
+                "runs with SLiMCostModel.fit"
+            )
+        if max_memory is not None and self.memory_coefficients is None:
+            raise ValueError(
+                "The cost model has no memory coefficients: fit it to benchmark "
+                "runs with SLiMCostModel.fit"
+            )
+        if scaling_factors is None:
+            scaling_factors = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+        epochs, present = _slim_epochs(demographic_model)
+        sizes = np.array(
+            [[min(p.start_size, p.end_size) for p in e.populations] for e in epochs]
+        )
+        sizes = sizes[present & (sizes > 0)] * contig.ploidy / 2
+        min_size = np.min(sizes) if len(sizes) > 0 else np.inf
+        cost = None
+        for Q in sorted(scaling_factors):
+            if Q != 1 and min_size / Q < 50:
+                break
+            cost = self.predict(
+                demographic_model, contig, scaling_factor=Q, burn_in=burn_in
+            )
+            if (max_runtime is None or cost.runtime <= max_runtime) and (
+                max_memory is None or cost.memory <= max_memory
+            ):
+                return cost
+        message = "No scaling factor meets the runtime and memory limits"
+        if cost is not None:
+            message += (
+                f"; with a scaling factor of {cost.scaling_factor}, the "
+                f"predicted runtime is {cost.runtime:.3g} seconds and the "
+                f"predicted memory use is {cost.memory:.3g} bytes"
+            )
+        raise ValueError(message)
+
+
 class _SLiMEngine(stdgrimmsim.Engine):
     id = "slim"  #:
     description = "SLiM forward-time Wright-Fisher simulator"  #:
@@ -1558,8 +2531,7 @@ class _SLiMEngine(stdgrimmsim.Engine):
     def get_version(self, slim_path=None):
         if slim_path is None:
             slim_path = self.slim_path()
-        s = subprocess.check_output([slim_path, "-v"])
-        return s.split()[2].decode("ascii").rstrip(",")
+        return _slim_version(slim_path)
 
     def _assert_min_version(self, min_required_version, slim_path):
         def version_split(version):
@@ -1583,11 +2555,17 @@ class _SLiMEngine(stdgrimmsim.Engine):
         slim_path=None,
         slim_script=False,
         slim_scaling_factor=1.0,
+        slim_max_runtime=None,
+        slim_max_memory=None,
+        slim_cost_model=None,
         slim_burn_in=10.0,
+        slim_checkpoint_seed=None,
+        slim_msprime_burn_in=False,
         dry_run=False,
         verbosity=None,
         logfile=None,
         logfile_interval=100,
+        slim_telemetry_interval=None,
         keep_mutation_ids_as_alleles=False,
         _recap_and_rescale=True,
     ):
@@ -1620,28 +2598,185 @@ class _SLiMEngine(stdgrimmsim.Engine):
             rate, and growth rates are multiplied by the factor.
             See SLiM manual: `5.5 Rescaling population sizes to improve
             simulation performance.`
+            If "auto", the smallest scaling factor for which the predicted
+            runtime and memory use are within ``slim_max_runtime`` and
+            ``slim_max_memory`` is chosen (see
+            :meth:`.SLiMCostModel.choose_scaling_factor`), and the prediction
+            is logged before the simulation starts. This requires a fitted
+            ``slim_cost_model``.
         :type slim_scaling_factor: float
+        :param slim_max_runtime: The maximum predicted runtime, in seconds,
+            when the scaling factor is "auto".
+        :type slim_max_runtime: float
+        :param slim_max_memory: The maximum predicted memory use, in bytes,
+            when the scaling factor is "auto".
+        :type slim_max_memory: float
+        :param slim_cost_model: The model used to predict the runtime and
+            memory use when the scaling factor is "auto", whose coefficients
+            have been fitted to benchmark runs (see :meth:`.SLiMCostModel.fit`).
+            Required when the scaling factor is "auto".
+        :type slim_cost_model: :class:`.SLiMCostModel`
         :param slim_burn_in: Length of the burn-in phase, in units of N
             generations.
         :type slim_burn_in: float
+        :param slim_checkpoint_seed: If not None, the burn-in is shared
+            between simulations: it is run once, with this seed, and its final
+            state is saved in the cache directory (see
+            :func:`.get_cache_dir`). Simulations with the same model, contig,
+            samples, extended events, scaling factor, burn-in and
+            ``slim_checkpoint_seed`` then start from the saved state, and
+            ``seed`` only affects the simulation after the burn-in. Note that
+            such simulations share their ancestry from before the end of the
+            burn-in, so they are not independent replicates. The least
+            recently used checkpoints are removed when their total size
+            exceeds a limit (see :func:`.set_slim_checkpoint_max_size` and
+            :func:`.clear_slim_checkpoints`).
+        :type slim_checkpoint_seed: int
+        :param slim_msprime_burn_in: If True, the burn-in is replaced by a
+            coalescent simulation with msprime of the first epoch of the
+            demographic model. SLiM starts from the resulting population,
+            in which the mutations of the non-neutral mutation types of the
+            DFEs have been added, with selection coefficients drawn from their
+            distributions. This is much faster than a forward-time burn-in,
+            but the initial population is not at mutation-selection balance:
+            non-neutral mutations are at the frequencies of neutral ones.
+            It is therefore most suited to contigs where selection only
+            matters in recent epochs, e.g. through extended events.
+            The value of ``slim_burn_in`` is ignored, and the distribution
+            types of the non-neutral mutation types must be
+            one of "f", "e", "g", "n" or "w".
+        :type slim_msprime_burn_in: bool
         :param dry_run: If True, run the setup and then end the simulation.
         :type dry_run: bool
         :param logfile: Name of file to write a log of summary statistics
             (currently, only mean and SD of fitness values per population).
             Defaults to None, meaning "do not log".
         :param logfile_interval: How often to write to the log file, in generations.
+        :param slim_telemetry_interval: If not None, SLiM records the wall
+            time, population sizes, number of segregating mutations and memory
+            usage every ``slim_telemetry_interval`` ticks, which are returned
+            in the top-level metadata of the tree sequence. See
+            :func:`.get_slim_telemetry`.
+        :type slim_telemetry_interval: int
         :param keep_mutation_ids_as_alleles: If true, alleles will be coded by integer
             mutation ids (assigned by SLiM) rather than by randomly-generated
             nucleotides.
         :type keep_mutation_ids_as_alleles: bool
         """
 
-        if slim_scaling_factor <= 0:
-            raise ValueError("slim_scaling_factor must be positive")
+        async def runner(script_file, **kwargs):
+            self._run_slim(script_file, **kwargs)
+
+        # The coroutine never suspends, so no event loop is needed.
+        return _run_until_complete(
+            self._simulate(
+                runner,
+                demographic_model,
+                contig,
+                samples,
+                seed=seed,
+                extended_events=extended_events,
+                slim_path=slim_path,
+                slim_script=slim_script,
+                slim_scaling_factor=slim_scaling_factor,
+                slim_max_runtime=slim_max_runtime,
+                slim_max_memory=slim_max_memory,
+                slim_cost_model=slim_cost_model,
+                slim_burn_in=slim_burn_in,
+                slim_checkpoint_seed=slim_checkpoint_seed,
+                slim_msprime_burn_in=slim_msprime_burn_in,
+                dry_run=dry_run,
+                verbosity=verbosity,
+                logfile=logfile,
+                logfile_interval=logfile_interval,
+                slim_telemetry_interval=slim_telemetry_interval,
+                keep_mutation_ids_as_alleles=keep_mutation_ids_as_alleles,
+                _recap_and_rescale=_recap_and_rescale,
+            )
+        )
+
+    async def simulate_async(
+        self, demographic_model, contig, samples, *, semaphore=None, **kwargs
+    ):
+        """
+        A coroutine that simulates the demographic model using SLiM, like
+        :meth:`.simulate`, but without blocking the event loop while SLiM runs.
+        SLiM's output is passed to the logging and warnings modules as it
+        arrives. The generation of the SLiM script and the processing of the
+        tree sequence output by SLiM are done in the event loop's thread.
+        See also :class:`.SLiMRunner`.
+
+        :param semaphore: If not None, the semaphore is held while SLiM runs,
+            bounding the number of SLiM processes running at once.
+        :type semaphore: :class:`asyncio.Semaphore`
+        :param \\**kwargs: Further arguments, as for :meth:`.simulate`.
+        """
+        if not kwargs.get("slim_script", False):
+            # The version of SLiM is needed to run it, and finding it runs
+            # SLiM, so this is done in a thread rather than in the event loop.
+            await asyncio.to_thread(self.get_version, kwargs.get("slim_path"))
+        runner = functools.partial(self._run_slim_async, semaphore=semaphore)
+        return await self._simulate(runner, demographic_model, contig, samples, **kwargs)
+
+    async def _simulate(
+        self,
+        runner,
+        demographic_model,
+        contig,
+        samples,
+        *,
+        seed=None,
+        extended_events=None,
+        slim_path=None,
+        slim_script=False,
+        slim_scaling_factor=1.0,
+        slim_max_runtime=None,
+        slim_max_memory=None,
+        slim_cost_model=None,
+        slim_burn_in=10.0,
+        slim_checkpoint_seed=None,
+        slim_msprime_burn_in=False,
+        dry_run=False,
+        verbosity=None,
+        logfile=None,
+        logfile_interval=100,
+        slim_telemetry_interval=None,
+        keep_mutation_ids_as_alleles=False,
+        _recap_and_rescale=True,
+    ):
+
         if slim_burn_in < 0:
             raise ValueError("slim_burn_in must be non-negative")
+        if slim_telemetry_interval is not None and slim_telemetry_interval < 1:
+            raise ValueError("slim_telemetry_interval must be at least 1")
         if len(contig.dfe_list) == 0:
             raise ValueError("SLiM requires at least one DFE.")
+        if slim_scaling_factor == "auto":
+            if slim_cost_model is None:
+                raise ValueError(
+                    'slim_scaling_factor="auto" requires a slim_cost_model fitted '
+                    "to benchmark runs (see SLiMCostModel.fit)"
+                )
+            cost = slim_cost_model.choose_scaling_factor(
+                demographic_model,
+                contig,
+                burn_in=0 if slim_msprime_burn_in else slim_burn_in,
+                max_runtime=slim_max_runtime,
+                max_memory=slim_max_memory,
+            )
+            logger.info(
+                f"Using a scaling factor of {cost.scaling_factor}, with a "
+                f"predicted runtime of {cost.runtime:.3g} seconds and a "
+                f"predicted memory use of {cost.memory:.3g} bytes"
+            )
+            slim_scaling_factor = cost.scaling_factor
+        if slim_scaling_factor <= 0:
+            raise ValueError("slim_scaling_factor must be positive")
+        if slim_msprime_burn_in and slim_checkpoint_seed is not None:
+            raise ValueError(
+                "slim_checkpoint_seed cannot be used with slim_msprime_burn_in, "
+                "as there is no burn-in to share."
+            )
 
         if slim_scaling_factor != 1:
             warnings.warn(
@@ -1675,30 +2810,46 @@ class _SLiMEngine(stdgrimmsim.Engine):
 
         run_slim = not slim_script
 
-        @contextlib.contextmanager
-        def _slim_tempdir():
-            tempdir = tempfile.TemporaryDirectory(
-                prefix="stdgrimmsim_", ignore_cleanup_errors=True
+        cache, cache_key = None, None
+        if (
+            run_slim
+            and not dry_run
+            and logfile is None
+            and slim_telemetry_interval is None
+        ):
+            cache, cache_key = self._get_cache_key(
+                demographic_model,
+                contig,
+                samples,
+                seed,
+                dict(
+                    extended_events=extended_events,
+                    slim_scaling_factor=slim_scaling_factor,
+                    slim_burn_in=slim_burn_in,
+                    slim_checkpoint_seed=slim_checkpoint_seed,
+                    slim_msprime_burn_in=slim_msprime_burn_in,
+                    keep_mutation_ids_as_alleles=keep_mutation_ids_as_alleles,
+                    recap_and_rescale=_recap_and_rescale,
+                ),
+                slim_path=slim_path,
             )
-            ts_filename = os.path.join(tempdir.name, f"{os.urandom(3).hex()}.trees")
-
-            if run_slim:
-                script_filename = os.path.join(
-                    tempdir.name, f"{os.urandom(3).hex()}.slim"
-                )
-                script_file = open(script_filename, "w", encoding="utf-8")
-            else:
-                script_filename = "stdout"
-                script_file = sys.stdout
-            yield script_file, script_filename, ts_filename
-            if run_slim:
-                script_file.close()
-            tempdir.cleanup()
+            ts = cache.get(cache_key) if cache is not None else None
+            if ts is not None:
+                return ts
 
-        with _slim_tempdir() as st:
-            script_file, script_filename, ts_filename = st
+        @contextlib.contextmanager
+        def _slim_tempdir():
+            # The files are removed as soon as SLiM's output has been loaded,
+            # or if the simulation fails, so they don't hold on to space in a
+            # memory-backed scratch directory.
+            tempdir = _scratch_tempdir("stdgrimmsim_")
+            try:
+                yield os.path.join(tempdir.name, f"{os.urandom(3).hex()}.trees")
+            finally:
+                tempdir.cleanup()
 
-            recap_epoch = slim_makescript(
+        def _make_script(script_file, ts_filename):
+            return slim_makescript(
                 script_file,
                 ts_filename,
                 demographic_model,
@@ -1710,64 +2861,201 @@ class _SLiMEngine(stdgrimmsim.Engine):
                 slim_rate_map,
                 logfile=logfile,
                 logfile_interval=logfile_interval,
+                telemetry_interval=slim_telemetry_interval,
             )
 
-            script_file.flush()
-
+        with _slim_tempdir() as ts_filename:
             if not run_slim:
+                _make_script(sys.stdout, ts_filename)
                 return None
 
-            self._run_slim(
-                script_filename,
-                slim_path=slim_path,
-                seed=seed,
-                dry_run=dry_run,
-                verbosity=verbosity,
+            # Scripts are reused by simulations that differ only in the values
+            # passed to SLiM as defines.
+            script_key = _slim_script_key(
+                demographic_model,
+                contig,
+                sample_sets,
+                extended_events,
+                slim_scaling_factor,
+                logfile,
+                logfile_interval,
+                slim_telemetry_interval,
             )
+            scratch_io = 0.0
+            with contextlib.ExitStack() as stack:
+                start = time.perf_counter()
+                if script_key is None:
+                    script_filename = os.path.join(
+                        os.path.dirname(ts_filename), f"{os.urandom(3).hex()}.slim"
+                    )
+                    with open(script_filename, "w", encoding="utf-8") as script_file:
+                        recap_epoch = _make_script(script_file, ts_filename)
+                else:
+                    script_filename, recap_epoch = stack.enter_context(
+                        _script_cache.use(
+                            script_key,
+                            functools.partial(_make_script, ts_filename=ts_filename),
+                        )
+                    )
+                scratch_io += time.perf_counter() - start
+
+                defines = {
+                    "burn_in": float(slim_burn_in),
+                    "trees_file": _escape_eidos(ts_filename),
+                }
+                if slim_checkpoint_seed is not None and not dry_run:
+                    checkpoint_file = None
+                    if script_key is None:
+                        logger.warning(
+                            "Cannot share the burn-in, as the simulation "
+                            "parameters can't be hashed"
+                        )
+                    else:
+                        checkpoint_file = await self._burn_in_checkpoint(
+                            runner,
+                            script_filename,
+                            script_key,
+                            slim_path=slim_path,
+                            burn_in=slim_burn_in,
+                            seed=slim_checkpoint_seed,
+                            verbosity=verbosity,
+                        )
+                    if checkpoint_file is not None:
+                        defines["checkpoint"] = "load"
+                        defines["checkpoint_file"] = _escape_eidos(checkpoint_file)
+                if slim_msprime_burn_in and not dry_run:
+                    initial_state_file = os.path.join(
+                        os.path.dirname(ts_filename), f"{os.urandom(3).hex()}.trees"
+                    )
+                    initial_state = _msprime_initial_state(
+                        demographic_model, contig, slim_scaling_factor, seed
+                    )
+                    start = time.perf_counter()
+                    initial_state.dump(initial_state_file)
+                    scratch_io += time.perf_counter() - start
+                    defines["burn_in"] = 0.0
+                    defines["checkpoint"] = "seed"
+                    defines["checkpoint_file"] = _escape_eidos(initial_state_file)
+                telemetry_file = None
+                if slim_telemetry_interval is not None and not dry_run:
+                    telemetry_file = os.path.join(
+                        os.path.dirname(ts_filename), f"{os.urandom(3).hex()}.csv"
+                    )
+                    defines["telemetry_file"] = _escape_eidos(telemetry_file)
+
+                start = time.perf_counter()
+                await runner(
+                    script_filename,
+                    slim_path=slim_path,
+                    seed=seed,
+                    dry_run=dry_run,
+                    verbosity=verbosity,
+                    defines=defines,
+                )
+                slim_time = time.perf_counter() - start
 
             if dry_run:
                 return None
 
+            start = time.perf_counter()
             ts = tskit.load(ts_filename)
+            telemetry = None
+            if telemetry_file is not None:
+                telemetry = _read_slim_telemetry(telemetry_file)
+            scratch_io += time.perf_counter() - start
+            logger.info(
+                f"SLiM ran in {slim_time:.3f} seconds; reading and writing "
+                f"scratch files in {os.path.dirname(ts_filename)} took "
+                f"{scratch_io:.3f} seconds"
+            )
 
-            ts = _add_dfes_to_metadata(ts, contig)
-            if _recap_and_rescale:
-                ts = self._recap_and_rescale(
-                    ts,
-                    seed,
-                    recap_epoch,
-                    contig,
-                    slim_scaling_factor,
-                    keep_mutation_ids_as_alleles,
-                    extended_events,
-                )
+        ts = _add_dfes_to_metadata(ts, contig, telemetry)
+        if _recap_and_rescale:
+            ts = self._recap_and_rescale(
+                ts,
+                seed,
+                recap_epoch,
+                contig,
+                slim_scaling_factor,
+                keep_mutation_ids_as_alleles,
+                extended_events,
+                msprime_burn_in=slim_msprime_burn_in,
+            )
 
-            if contig.inclusion_mask is not None:
-                ts = stdgrimmsim.utils.mask_tree_sequence(
-                    ts, contig.inclusion_mask, False
-                )
-            if contig.exclusion_mask is not None:
-                ts = stdgrimmsim.utils.mask_tree_sequence(
-                    ts, contig.exclusion_mask, True
-                )
+        if contig.inclusion_mask is not None:
+            ts = stdgrimmsim.utils.mask_tree_sequence(ts, contig.inclusion_mask, False)
+        if contig.exclusion_mask is not None:
+            ts = stdgrimmsim.utils.mask_tree_sequence(ts, contig.exclusion_mask, True)
 
+        if cache is not None:
+            cache.put(cache_key, ts)
         return ts
 
-    def _run_slim(
-        self, script_file, slim_path=None, seed=None, dry_run=False, verbosity=None
+    async def _burn_in_checkpoint(
+        self, runner, script_filename, script_key, *, slim_path, burn_in, seed, verbosity
     ):
         """
-        Run SLiM.
+        Returns the filename of the state of the simulation at the end of the
+        shared burn-in, running the burn-in with ``runner`` if it has not
+        been saved already. Returns None if the script has no burn-in to
+        share, because events start in the first tick.
+        """
+        if slim_path is None:
+            slim_path = self.slim_path()
+        key = stdgrimmsim.cache._stable_hash(
+            [script_key, float(burn_in), int(seed), self.get_version(slim_path)]
+        )
+        checkpoints = _checkpoint_cache()
+        checkpoint_file = checkpoints.get_file(key)
+        if checkpoint_file is None:
+            checkpoints.path.mkdir(parents=True, exist_ok=True)
+            # Several processes may be saving the same checkpoint, so it is
+            # written to a temporary file and then moved into place.
+            tmp_file = (
+                checkpoints.path / f".{key}.{os.getpid()}.{os.urandom(3).hex()}.trees"
+            )
+            logger.info(f"Running the burn-in to save in {checkpoints.path}")
+            try:
+                await runner(
+                    script_filename,
+                    slim_path=slim_path,
+                    seed=seed,
+                    verbosity=verbosity,
+                    defines={
+                        "burn_in": float(burn_in),
+                        "trees_file": _escape_eidos(str(tmp_file)),
+                        "checkpoint": "save",
+                        "checkpoint_file": _escape_eidos(str(tmp_file)),
+                    },
+                )
+                if not tmp_file.exists():
+                    return None
+                checkpoint_file = checkpoints.put_file(key, tmp_file)
+            finally:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+            if checkpoint_file is None:
+                logger.warning(
+                    "Cannot share the burn-in, as the checkpoint is larger than "
+                    "the maximum size of the saved checkpoints (see "
+                    "set_slim_checkpoint_max_size)"
+                )
+                return None
+        return str(checkpoint_file)
 
-        We capture the output using Popen's line-oriented text buffering
-        (bufsize=1, universal_newlines=True) and redirect all messages to
-        Python's logging module.
-        By convention, messages from SLiM prefixed with "ERROR: " or
-        "WARNING: " are treated as ERROR or WARN loglevels respectively.
-        All other output on stdout is given the DEBUG loglevel.
-        ERROR messages will raise a SLiMException here too, because
-        they are always generated by the `stop()` eidos function which
-        makes SLiM exit with a non-zero return code.
+    def _slim_command(
+        self,
+        script_file,
+        slim_path=None,
+        seed=None,
+        dry_run=False,
+        verbosity=None,
+        defines=None,
+    ):
+        """
+        Returns the command line to run SLiM with the specified script.
+        The ``defines`` are a dictionary of constants to define in the
+        script, whose values are numbers or strings.
         """
         if slim_path is None:
             slim_path = self.slim_path()
@@ -1781,8 +3069,49 @@ class _SLiMEngine(stdgrimmsim.Engine):
             slim_cmd.extend(["-d", "dry_run=T"])
         if verbosity is not None:
             slim_cmd.extend(["-d", f"verbosity={verbosity}"])
+        for name, value in ({} if defines is None else defines).items():
+            if isinstance(value, str):
+                value = "'" + value.replace("'", "\\'") + "'"
+            slim_cmd.extend(["-d", f"{name}={value}"])
         slim_cmd.append(script_file)
+        return slim_cmd
+
+    def _handle_slim_output(self, line):
+        """
+        Passes a line of SLiM's stdout to the warnings or logging module.
+        """
+        line = line.rstrip()
+        if line.startswith("WARNING: "):
+            warnings.warn(stdgrimmsim.UnspecifiedSLiMWarning(line[len("WARNING: ") :]))
+        else:
+            # filter `dbg` function calls that generate output
+            line = line.replace("dbg(self.source); ", "")
+            logger.debug(line)
+
+    def _handle_slim_error(self, line):
+        """
+        Passes a line of SLiM's stderr to the logging module.
+        """
+        if line.startswith("ERROR: "):
+            logger.error(line[len("ERROR: ") :].rstrip())
+
+    def _run_slim(self, script_file, **kwargs):
+        """
+        Run SLiM.
+
+        SLiM's output is read line by line as it is produced and redirected
+        to Python's logging module, so that it is never held in memory.
+        By convention, messages from SLiM prefixed with "ERROR: " or
+        "WARNING: " are treated as ERROR or WARN loglevels respectively.
+        All other output on stdout is given the DEBUG loglevel.
+        ERROR messages will raise a SLiMException here too, because
+        they are always generated by the `stop()` eidos function which
+        makes SLiM exit with a non-zero return code.
 
+        The keyword arguments are as for :meth:`._slim_command`.
+        """
+        slim_cmd = self._slim_command(script_file, **kwargs)
+        errs = []
         with subprocess.Popen(
             slim_cmd,
             bufsize=1,
@@ -1790,36 +3119,63 @@ class _SLiMEngine(stdgrimmsim.Engine):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         ) as proc:
-            procout = proc.communicate()
+            # SLiM's stderr is read in another thread, so that neither pipe
+            # can fill up and block SLiM while we wait on the other.
+            stderr_reader = threading.Thread(
+                target=lambda: errs.extend(proc.stderr), daemon=True
+            )
+            stderr_reader.start()
+            for line in proc.stdout:
+                self._handle_slim_output(line)
+            stderr_reader.join()
+            proc.wait()
+        for line in errs:
+            self._handle_slim_error(line)
+
+        if proc.returncode != 0:
+            raise SLiMException(
+                f"{slim_cmd[0]} exited with code {proc.returncode}.\n{''.join(errs)}"
+            )
+
+    async def _run_slim_async(self, script_file, *, semaphore=None, **kwargs):
+        """
+        A coroutine that runs SLiM like :meth:`._run_slim`, without blocking
+        the event loop. If a ``semaphore`` is given, it is held while SLiM
+        runs. The SLiM process is killed if the coroutine is cancelled.
+        """
+        slim_cmd = self._slim_command(script_file, **kwargs)
+        errs = []
+
+        async def read_lines(stream, handle):
+            async for line in stream:
+                handle(line.decode())
+
+        def handle_error(line):
+            errs.append(line)
+            self._handle_slim_error(line)
+
+        async with contextlib.nullcontext() if semaphore is None else semaphore:
+            proc = await asyncio.create_subprocess_exec(
+                *slim_cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_SLIM_OUTPUT_LINE_LIMIT,
+            )
             try:
-                # we get procout == None with the patching of suprocess.Popen
-                # that we do in test_slim_engine.py::TestCLI::test_dry_run
-                outs, errs = procout
-            except ValueError:
-                warnings.warn(
-                    stdgrimmsim.UnspecifiedSLiMWarning(
-                        "Cannot get output from SLiM " "for unknown reasons."
-                    )
+                await asyncio.gather(
+                    read_lines(proc.stdout, self._handle_slim_output),
+                    read_lines(proc.stderr, handle_error),
                 )
-                outs, errs = "", ""
-            for line in outs.splitlines():
-                line = line.rstrip()
-                if line.startswith("WARNING: "):
-                    warnings.warn(
-                        stdgrimmsim.UnspecifiedSLiMWarning(line[len("WARNING: ") :])
-                    )
-                else:
-                    # filter `dbg` function calls that generate output
-                    line = line.replace("dbg(self.source); ", "")
-                    logger.debug(line)
-
-            for line in errs.splitlines():
-                if line.startswith("ERROR: "):
-                    logger.error(line[len("ERROR: ") :])
+                await proc.wait()
+            except BaseException:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
 
         if proc.returncode != 0:
             raise SLiMException(
-                f"{slim_path} exited with code {proc.returncode}.\n{errs}"
+                f"{slim_cmd[0]} exited with code {proc.returncode}.\n{''.join(errs)}"
             )
 
     def _simplify_remembered(self, ts):
@@ -1841,11 +3197,17 @@ class _SLiMEngine(stdgrimmsim.Engine):
         slim_scaling_factor,
         keep_mutation_ids_as_alleles,
         extended_events=None,
+        msprime_burn_in=False,
     ):
         """
         Apply post-SLiM transformations to ``ts``. This rescales node times,
         does recapitation, simplification, adds neutral mutations, converts
         alleles to nucleotides, and rebuilds the individual table for haploids.
+        If ``msprime_burn_in`` is True, SLiM started from the population made
+        by :func:`_msprime_initial_state`, which holds the non-neutral
+        mutations from before the start of the SLiM simulation, so the
+        neutral mutations are added over the whole tree sequence, in the same
+        way as in the SLiM period, rather than as recapitation mutations.
         """
         # Times come from SLiM generation numbers, which may have been
         # divided by a scaling factor for computational tractability.
@@ -1924,62 +3286,43 @@ class _SLiMEngine(stdgrimmsim.Engine):
         )
         ts = self._simplify_remembered(ts)
 
-        # Adding neutral mutations to simulation and recapitation periods
+        # Adding neutral mutations to simulation and recapitation periods.
+        # The neutral mutation types of all DFEs are added in one pass over
+        # the SLiM period, and the recapitated period gets a second pass.
         breaks, dfe_labels = contig.dfe_breakpoints()  # beware -1 labels
-        for i, dfe in enumerate(ts.metadata["stdgrimmsim"]["DFEs"]):
+        neutral_types = []
+        for dfe in ts.metadata["stdgrimmsim"]["DFEs"]:
             assert len(dfe["proportions"]) == len(dfe["mutation_types"])
+            if dfe["id"] == "recapitation":
+                continue
+            ids, rates = [], []
             for prop, mt in zip(dfe["proportions"], dfe["mutation_types"]):
                 if mt["is_neutral"]:
-                    mut_seed = rng.randrange(1, 2**32)
-                    # Figuring out SLiM mutation id metadata
-
-                    def _get_next_id(ts):
-                        max_id = -1
-                        for mut in ts.mutations():
-                            for d in mut.derived_state.split(","):
-                                max_id = max(max_id, int(d))
-                        return max_id + 1
-
-                    def _get_msp_rate_map(breaks, is_this_dfe, rate):
-                        rates = np.zeros(shape=is_this_dfe.shape)
-                        rates[is_this_dfe] = rate
-                        return msprime.RateMap(position=breaks, rate=rates)
-
-                    # Use msprime.SLiMMutationModel rather than msprime.JC69
-                    # for neutral DFEs.  This ensures that there will be a
-                    # 'selection_coef' key in the mutation metadata (so the
-                    # mutation metadata structure will be consistent across the
-                    # tree sequence).
-                    # TODO: set stacking policy to "l" when supported
-                    model = msprime.SLiMMutationModel(
-                        type=mt["slim_mutation_type_id"][0],
-                        next_id=_get_next_id(ts),
-                    )
-
-                    # Add mutations to recapitated part of trees.
-                    start_time = None
-                    end_time = None
-                    if dfe["id"] == "recapitation":
-                        start_time = metadata["SLiM"]["tick"]
-                        msp_rate_map = _get_msp_rate_map(
-                            np.array([0, contig.length]),
-                            np.array([True]),
-                            contig.mutation_rate,
-                        )
-                    else:
-                        msp_rate_map = _get_msp_rate_map(
-                            breaks, dfe_labels == i, prop * contig.mutation_rate
-                        )
-                        end_time = metadata["SLiM"]["tick"]
-                    ts = msprime.sim_mutations(
-                        ts,
-                        rate=msp_rate_map,
-                        model=model,
-                        start_time=start_time,
-                        end_time=end_time,
-                        keep=True,
-                        random_seed=mut_seed,
-                    )
+                    ids.append(mt["slim_mutation_type_id"][0])
+                    rates.append(prop * contig.mutation_rate)
+            neutral_types.append((ids, rates))
+        next_id = _max_slim_mutation_id(ts.tables) + 1
+        ts, next_id = _add_neutral_mutations(
+            ts,
+            breaks,
+            dfe_labels,
+            neutral_types,
+            next_id,
+            seed=rng.randrange(1, 2**32),
+            end_time=None if msprime_burn_in else metadata["SLiM"]["tick"],
+        )
+        recap_seed = rng.randrange(1, 2**32)
+        if not msprime_burn_in:
+            recap_type = recap_dfe["mutation_types"][0]["slim_mutation_type_id"]
+            ts, next_id = _add_neutral_mutations(
+                ts,
+                np.array([0, contig.length]),
+                np.array([0]),
+                [(recap_type, [contig.mutation_rate])],
+                next_id,
+                seed=recap_seed,
+                start_time=metadata["SLiM"]["tick"],
+            )
 
         if not keep_mutation_ids_as_alleles:
             nuc_seed = rng.randrange(1, 2**32)
@@ -2072,3 +3415,90 @@ class _SLiMEngine(stdgrimmsim.Engine):
 
 
 stdgrimmsim.register_engine(_SLiMEngine())
+
+
+class SLiMRunner:
+    """
+    Runs SLiM simulations concurrently from :mod:`asyncio` code, with at most
+    ``max_concurrent`` SLiM processes running at once. Each simulation is run
+    with :meth:`_SLiMEngine.simulate_async`, so SLiM's output is logged as
+    it arrives and the event loop is free while SLiM runs.
+
+    .. code-block:: python
+
+        runner = stdgrimmsim.SLiMRunner(max_concurrent=4)
+
+        async def main():
+            tasks = [
+                runner.submit(model, contig, samples, seed=seed)
+                for seed in range(1, 21)
+            ]
+            return await asyncio.gather(*tasks)
+
+        ts_list = asyncio.run(main())
+
+    :param int max_concurrent: The maximum number of SLiM processes to run
+        at once. Defaults to the number of CPUs.
+    """
+
+    def __init__(self, max_concurrent=None):
+        if max_concurrent is None:
+            max_concurrent = os.cpu_count() or 1
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self._loop = None
+        self._semaphore = None
+
+    def _get_semaphore(self):
+        # A semaphore can only be used from one event loop.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def simulate(self, demographic_model, contig, samples, **kwargs):
+        """
+        A coroutine that runs a simulation and returns the simulated tree
+        sequence. The arguments are as for :meth:`_SLiMEngine.simulate`.
+
+        :rtype: :class:`tskit.TreeSequence`
+        """
+        engine = stdgrimmsim.get_engine("slim")
+        return await engine.simulate_async(
+            demographic_model,
+            contig,
+            samples,
+            semaphore=self._get_semaphore(),
+            **kwargs,
+        )
+
+    def submit(self, demographic_model, contig, samples, **kwargs):
+        """
+        Schedules a simulation in the running event loop and returns an
+        :class:`asyncio.Task`, a future whose result is the simulated tree
+        sequence. The arguments are as for :meth:`_SLiMEngine.simulate`.
+
+        :rtype: :class:`asyncio.Task`
+        """
+        return asyncio.ensure_future(
+            self.simulate(demographic_model, contig, samples, **kwargs)
+        )
+
+    def run(self, simulations):
+        """
+        Runs the specified simulations concurrently in a new event loop and
+        returns the simulated tree sequences, in the same order. Each
+        simulation is a dictionary of the arguments to
+        :meth:`_SLiMEngine.simulate`. This cannot be called from a running
+        event loop; use :meth:`.submit` instead.
+
+        :param list simulations: The simulations to run.
+        :rtype: list of :class:`tskit.TreeSequence`
+        """
+
+        async def run_all():
+            return await asyncio.gather(*(self.simulate(**sim) for sim in simulations))
+
+        return asyncio.run(run_all())
@@ -9,6 +9,7 @@ import warnings
 import attr
 
 import stdgrimmsim
+import stdgrimmsim.catalog
 import stdgrimmsim.utils
 
 logger = logging.getLogger(__name__)
@@ -44,20 +45,48 @@ def register_species(species):
     registered_species[species.id] = species
 
 
+def _species_ids():
+    """
+    Returns the sorted IDs of all species, including the species in the
+    catalog that have not been loaded yet.
+    """
+    return sorted(set(registered_species) | set(stdgrimmsim.catalog.__all__))
+
+
+def _species_names():
+    """
+    Returns a dict mapping the ID of each species to its name, sorted by ID.
+    Species in the catalog are not loaded unless their name cannot be found
+    in the catalog index.
+    """
+    names = dict(stdgrimmsim.catalog._species_index())
+    for species in registered_species.values():
+        names[species.id] = species.name
+    for species_id in _species_ids():
+        if species_id not in names:
+            names[species_id] = get_species(species_id).name
+    return dict(sorted(names.items()))
+
+
 def get_species(id):
     """
     Returns a :class:`Species` object for the specified ``id``.
 
+    Species in the catalog are loaded the first time they are requested,
+    so only the definitions of the species that are used are imported.
+
     :param str id: The string identifier for the requested species. E.g. "HomSap".
         A complete list of species, and their IDs, can be found in the
         :ref:`sec_catalog`.
     :return: An object containing the species definition.
     :rtype: :class:`Species`
     """
+    if id not in registered_species and id in stdgrimmsim.catalog.__all__:
+        stdgrimmsim.catalog._load_species(id)
     if id not in registered_species:
         # TODO we should probably have a custom exception here and standardise
         # on using these for all the catalog search functions.
-        raise ValueError(_missing_from_catalog("Species", id, registered_species))
+        raise ValueError(_missing_from_catalog("Species", id, _species_ids()))
     return registered_species[id]
 
 
@@ -68,9 +97,11 @@ def get_species(id):
 def all_species():
     """
     Returns an iterator over all species in the catalog sorted by ID.
+    Species that have not been loaded yet are loaded as the iterator
+    reaches them.
     """
-    for species in sorted(registered_species.keys()):
-        yield registered_species[species]
+    for species_id in _species_ids():
+        yield get_species(species_id)
 
 
 def all_genetic_maps():
@@ -186,6 +217,7 @@ class Species:
         exclusion_mask=None,
         left=None,
         right=None,
+        regions=None,
     ):
         """
         Returns a :class:`.Contig` instance describing a section of genome that
@@ -245,6 +277,19 @@ class Species:
         :param float right: The right coordinate (exclusive) of the region to
             keep on the chromosome. Defaults to the length of the chromosome.
             Remaining regions will have missing data when simulated.
+        :param regions: If specified, the disjoint target regions of the
+            chromosome to simulate, given by the path and file name of a bed
+            file or as a list or array of intervals given by the left and right
+            end points of the intervals, in ascending order. The simulated
+            genomes are subset to the regions (and to the ``inclusion_mask``, if
+            it is also given), and ``left`` and ``right`` default to the ends of
+            the first and last region. The recombination rates between the
+            regions are those of the chromosome, so the regions are linked as
+            they are on the chromosome; but the msprime engine only simulates
+            the ancestry of the regions, so many small regions of a long
+            chromosome can be simulated in one run. Use
+            :meth:`.Contig.split_regions` to obtain a tree sequence for each
+            region.
         :rtype: :class:`.Contig`
         :return: A :class:`.Contig` describing the section of the genome.
         """
@@ -261,6 +306,7 @@ class Species:
             exclusion_mask=exclusion_mask,
             left=left,
             right=right,
+            regions=regions,
         )
 
     def _warn_browning(self, model_id):
@@ -9,11 +9,14 @@ import os
 import re
 import shutil
 import tarfile
+import tempfile
 import urllib.request
 import warnings
 
 import numpy as np
 
+from . import bed
+
 
 def is_valid_demographic_model_id(model_id):
     """
@@ -111,6 +114,57 @@ def sha256(filename):
     return m.hexdigest()
 
 
+def save_parsed(path, arrays, checksum):
+    """
+    Stores the numpy ``arrays`` (a dict mapping file names to arrays) parsed
+    from a downloaded file in the directory ``path``, along with the
+    ``checksum`` of the download, so that :func:`.load_parsed` only loads
+    them for the same download. The previous checksum is removed first, each
+    file is written to a temporary file that is then renamed, and the
+    checksum is written last, so that other processes never load a mix of
+    old and new arrays, or partially written data.
+    """
+    os.makedirs(path, exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(os.path.join(path, "sha256"))
+    for name, data in list(arrays.items()) + [("sha256", checksum)]:
+        fd, tmp_path = tempfile.mkstemp(dir=path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if name == "sha256":
+                    f.write(data.encode())
+                else:
+                    np.save(f, data)
+            os.replace(tmp_path, os.path.join(path, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def load_parsed(path, names, checksum):
+    """
+    Returns the arrays with the specified file ``names`` stored by
+    :func:`.save_parsed` in the directory ``path``, memory-mapped, if they
+    were stored with the specified ``checksum``; or None otherwise.
+    """
+
+    def stored_checksum():
+        try:
+            with open(os.path.join(path, "sha256")) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    if stored_checksum() != checksum:
+        return None
+    arrays = [np.load(os.path.join(path, name), mmap_mode="r") for name in names]
+    # The arrays may have been replaced while we loaded them, in which case
+    # the checksum was removed first.
+    if stored_checksum() != checksum:
+        return None
+    return arrays
+
+
 @contextlib.contextmanager
 def cd(path):
     """
@@ -144,22 +198,16 @@ def untar(filename, path):
 def read_bed(mask_fpath, chrom):
     """
     Returns intervals to keep based on a bed file specified by the mask_fpath.
-    The mask must be in bed format (columns specify chrom, left, right) and
-    additional columns are ignored. Intervals must be non-overlapping.
+    The mask must be in bed format (columns specify chrom, left, right,
+    separated by tabs or spaces) and additional columns are ignored.
+    Intervals must be non-overlapping. The bed file may be gzip-compressed.
+    Only the lines of the chromosome are parsed, using an index of the file
+    that is built the first time it is read (see :func:`stdgrimmsim.bed.get_bed_index`).
 
     Note that the chromosome name must match exactly (i.e. "22" is not equivalent
     to "chr22").
     """
-    lines = np.loadtxt(
-        mask_fpath,
-        dtype={"names": ("chrom", "left", "right"), "formats": (object, int, int)},
-        delimiter="\t",
-        usecols=(0, 1, 2),
-    )
-    in_chrom = lines["chrom"] == f"{chrom}"
-    lines = lines.compress(in_chrom)
-    intervals = np.array([lines["left"], lines["right"]]).T
-    return intervals
+    return bed.read_bed(mask_fpath, f"{chrom}")
 
 
 def mask_tree_sequence(ts, mask_intervals, exclude):
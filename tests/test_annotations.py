@@ -4,6 +4,7 @@ Tests for the annotations management.
 
 from unittest import mock
 import gzip
+import tarfile
 import tempfile
 import os.path
 import shutil
@@ -266,3 +267,111 @@ class TestIntervalMerge:
                 ends = starts + rng.integers(1, 100, size=len(starts))
                 merged_intervals = maint.merged(zip(starts, ends), closed=closed)
                 assert merged_intervals == maint.merged(merged_intervals, closed=closed)
+
+
+class TestAnnotationIntervals(tests.CacheWritingTest):
+    """
+    Tests that annotations are parsed once and queried by binary search.
+    """
+
+    intervals = np.array([[10, 20], [30, 45], [50, 51], [70, 100], [120, 150]])
+
+    def setup_method(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tmp_path = pathlib.Path(self.tmp_dir.name)
+        # The intervals are written out of order.
+        np.savetxt(tmp_path / "yolo_1.txt", self.intervals[::-1], fmt="%d")
+        tarball = tmp_path / "annotation.tar.gz"
+        with utils.cd(tmp_path):
+            with tarfile.open(tarball, mode="w:gz") as tar_file:
+                tar_file.add("yolo_1.txt")
+        genome = stdgrimmsim.Genome(
+            chromosomes=[
+                stdgrimmsim.Chromosome(
+                    id="1", length=200, recombination_rate=1e-8, mutation_rate=1e-8
+                )
+            ]
+        )
+        species = stdgrimmsim.Species(
+            id="TesSpe",
+            ensembl_id="test_species",
+            name="Test species",
+            common_name="Testy McTestface",
+            genome=genome,
+            separate_sexes=False,
+        )
+        self.an = stdgrimmsim.Annotation(
+            species=species,
+            id="test_annotation",
+            url="http://example.com/annotation.gff.gz",
+            intervals_url=tarball.resolve().as_uri(),
+            intervals_sha256=utils.sha256(tarball),
+            gff_sha256="6789",
+            description="test annotation",
+            file_pattern="yolo_{id}.txt",
+            annotation_source="test",
+            annotation_type="test",
+        )
+
+    def teardown_method(self):
+        self.tmp_dir.cleanup()
+
+    def test_chromosome_annotations(self):
+        cm = self.an.get_chromosome_annotations("1")
+        np.testing.assert_array_equal(cm, self.intervals)
+        parsed_dir = self.an._parsed_annotation_dir(
+            self.an.species.genome.get_chromosome("1")
+        )
+        assert (parsed_dir / "left.npy").exists()
+        assert (parsed_dir / "right.npy").exists()
+        assert (parsed_dir / "sha256").exists()
+        with mock.patch("numpy.loadtxt", autospec=True) as loadtxt:
+            cm = self.an.get_chromosome_annotations("1")
+        loadtxt.assert_not_called()
+        np.testing.assert_array_equal(cm, self.intervals)
+
+    def test_checksum_mismatch(self):
+        self.an.get_chromosome_annotations("1")
+        chrom = self.an.species.genome.get_chromosome("1")
+        sha256_file = self.an._parsed_annotation_dir(chrom) / "sha256"
+        sha256_file.write_text("1234")
+        with mock.patch("numpy.loadtxt", wraps=np.loadtxt) as loadtxt:
+            cm = self.an.get_chromosome_annotations("1")
+        loadtxt.assert_called_once()
+        np.testing.assert_array_equal(cm, self.intervals)
+        assert sha256_file.read_text() == self.an.intervals_sha256
+
+    @pytest.mark.parametrize(
+        "left, right, expected",
+        [
+            (None, None, [[10, 20], [30, 45], [50, 51], [70, 100], [120, 150]]),
+            (0, 10, []),
+            (20, 30, []),
+            (15, 35, [[15, 20], [30, 35]]),
+            (30, 51, [[30, 45], [50, 51]]),
+            (50, 51, [[50, 51]]),
+            (80, 90, [[80, 90]]),
+            (100, None, [[120, 150]]),
+            (160, 200, []),
+        ],
+    )
+    def test_get_intervals(self, left, right, expected):
+        intervals = self.an.get_intervals("1", left, right)
+        assert intervals.shape == (len(expected), 2)
+        np.testing.assert_array_equal(intervals, np.reshape(expected, (-1, 2)))
+
+    @pytest.mark.filterwarnings("ignore:No intervals remain")
+    def test_get_intervals_random(self):
+        rng = np.random.default_rng(5)
+        for _ in range(100):
+            left, right = np.sort(rng.choice(201, size=2, replace=False))
+            expected = stdgrimmsim.utils.clip_intervals(self.intervals, left, right)
+            np.testing.assert_array_equal(
+                self.an.get_intervals("1", left, right), expected
+            )
+
+    def test_bad_region(self):
+        with pytest.raises(ValueError, match="Invalid region"):
+            self.an.get_intervals("1", 50, 50)
+        with pytest.raises(ValueError, match="Invalid region"):
+            self.an.get_intervals("1", -1, 50)
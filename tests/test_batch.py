@@ -0,0 +1,444 @@
+"""
+Tests for the parallel batch runner.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+import tskit
+
+import stdgrimmsim
+
+
+def _jobs(n, **kwargs):
+    return [
+        stdgrimmsim.SimulationJob(
+            species="ZweBerg",
+            demographic_model="BlackForest_1D12",
+            contig={"chromosome": "1", "right": 1e5},
+            samples={"BlackForest": 4},
+            **kwargs,
+        )
+        for _ in range(n)
+    ]
+
+
+def _sleep(index, seconds):
+    time.sleep(seconds)
+    return index
+
+
+class TestRunPool:
+    def counted(self, args, consumed):
+        for a in args:
+            consumed.append(a)
+            yield a
+
+    def test_ordered_bounded(self):
+        # The first call is slow, so the others complete before it. Only
+        # max_pending calls are submitted until it has been yielded.
+        args = [(0, 0.5)] + [(j, 0) for j in range(1, 8)]
+        consumed = []
+        results = stdgrimmsim.batch._run_pool(
+            _sleep,
+            self.counted(args, consumed),
+            workers=2,
+            max_pending=3,
+            ordered=True,
+        )
+        assert next(results) == 0
+        assert len(consumed) == 3
+        assert list(results) == list(range(1, 8))
+
+
+class TestDeriveSeeds:
+    def test_reproducible(self):
+        seeds1 = stdgrimmsim.derive_seeds(1234, 10)
+        seeds2 = stdgrimmsim.derive_seeds(1234, 10)
+        assert seeds1 == seeds2
+        assert len(set(seeds1)) == 10
+        assert all(1 <= seed < 2**31 for seed in seeds1)
+
+    def test_prefix_stable(self):
+        assert stdgrimmsim.derive_seeds(5, 3) == stdgrimmsim.derive_seeds(5, 6)[:3]
+
+    def test_matches_run_batch(self):
+        results = stdgrimmsim.run_batch(_jobs(3), workers=1, seed=17)
+        seeds = [result.seed for result in sorted(results, key=lambda r: r.index)]
+        assert seeds == stdgrimmsim.derive_seeds(17, 3)
+
+
+class TestRunBatch:
+    def test_sequential(self):
+        results = list(stdgrimmsim.run_batch(_jobs(3), workers=1, seed=1))
+        assert [result.index for result in results] == [0, 1, 2]
+        for result in results:
+            assert isinstance(result.ts, tskit.TreeSequence)
+            assert result.ts.num_samples == 8
+
+    def test_independent_of_workers(self):
+        results1 = {
+            r.index: r for r in stdgrimmsim.run_batch(_jobs(4), workers=1, seed=2)
+        }
+        results2 = {
+            r.index: r
+            for r in stdgrimmsim.run_batch(_jobs(4), workers=2, seed=2, max_pending=3)
+        }
+        assert sorted(results1.keys()) == sorted(results2.keys()) == [0, 1, 2, 3]
+        for index, result in results1.items():
+            assert result.seed == results2[index].seed
+            result.ts.tables.assert_equals(
+                results2[index].ts.tables, ignore_provenance=True
+            )
+
+    def test_matches_simulate(self):
+        job = _jobs(1)[0]
+        result = next(stdgrimmsim.run_batch([job], workers=1, seed=3))
+        species = stdgrimmsim.get_species("ZweBerg")
+        engine = stdgrimmsim.get_engine("msprime")
+        ts = engine.simulate(
+            species.get_demographic_model("BlackForest_1D12"),
+            species.get_contig("1", right=1e5),
+            {"BlackForest": 4},
+            seed=result.seed,
+        )
+        ts.tables.assert_equals(result.ts.tables, ignore_provenance=True)
+
+    def test_explicit_seed(self):
+        jobs = _jobs(2, seed=10)
+        results = list(stdgrimmsim.run_batch(jobs, workers=1, seed=3))
+        assert [result.seed for result in results] == [10, 10]
+        results[0].ts.tables.assert_equals(results[1].ts.tables, ignore_provenance=True)
+
+    def test_dict_jobs_and_generic_model(self):
+        jobs = (
+            dict(species="ZweBerg", contig={"length": 1000}, samples={"pop_0": 2})
+            for _ in range(2)
+        )
+        results = list(stdgrimmsim.run_batch(jobs, workers=1, seed=4))
+        assert len(results) == 2
+        assert results[0].ts.sequence_length == 1000
+
+    def test_output(self, tmp_path):
+        jobs = []
+        for j, job in enumerate(_jobs(2)):
+            job.output = str(tmp_path / f"{j}.trees")
+            jobs.append(job)
+        results = list(stdgrimmsim.run_batch(jobs, workers=2, seed=5))
+        for result in results:
+            assert result.ts is None
+            ts = tskit.load(result.job.output)
+            assert ts.num_samples == 8
+        assert sorted(os.listdir(tmp_path)) == ["0.trees", "1.trees"]
+
+    def test_lazy_jobs(self):
+        # Only a bounded number of jobs should be consumed ahead of the results.
+        consumed = []
+
+        def jobs():
+            for j, job in enumerate(_jobs(5)):
+                consumed.append(j)
+                yield job
+
+        results = stdgrimmsim.run_batch(jobs(), workers=1, seed=6)
+        next(results)
+        assert consumed == [0]
+        assert len(list(results)) == 4
+
+    @pytest.mark.parametrize("workers", [0, -1])
+    def test_bad_workers(self, workers):
+        with pytest.raises(ValueError, match="workers"):
+            stdgrimmsim.run_batch(_jobs(1), workers=workers)
+
+    def test_error_propagates(self):
+        jobs = [
+            stdgrimmsim.SimulationJob(
+                species="ZweBerg", contig={"length": 100}, samples={"nonexistent": 2}
+            )
+        ]
+        with pytest.raises(ValueError, match="nonexistent"):
+            list(stdgrimmsim.run_batch(jobs, workers=2))
+
+
+def test_seeds_are_distinct_across_roots():
+    seeds = np.array([stdgrimmsim.derive_seeds(root, 5) for root in range(5)])
+    assert len(np.unique(seeds)) == seeds.size
+
+
+class TestSimulateGenome:
+    species = stdgrimmsim.get_species("ZweBerg")
+    # A tiny population size keeps whole-chromosome simulations fast.
+    model = stdgrimmsim.PiecewiseConstantSize(10)
+    samples = {"pop_0": 2}
+
+    def test_autosomes(self):
+        genome = dict(
+            stdgrimmsim.simulate_genome(
+                self.species, self.model, self.samples, seed=1, workers=1
+            )
+        )
+        autosomes = [chrom.id for chrom in self.species.genome.autosomes]
+        assert sorted(genome.keys()) == sorted(autosomes)
+        for chrom_id, ts in genome.items():
+            chrom = self.species.genome.get_chromosome(chrom_id)
+            assert ts.sequence_length == chrom.length
+            assert ts.num_samples == 4
+
+    def test_seed_independent_of_selection_and_workers(self):
+        genome1 = dict(
+            stdgrimmsim.simulate_genome(
+                "ZweBerg",
+                self.model,
+                self.samples,
+                chromosomes=["4", "5"],
+                seed=2,
+                workers=1,
+            )
+        )
+        genome2 = dict(
+            stdgrimmsim.simulate_genome(
+                "ZweBerg",
+                self.model,
+                self.samples,
+                chromosomes=["5"],
+                seed=2,
+                workers=2,
+            )
+        )
+        genome1["5"].tables.assert_equals(genome2["5"].tables, ignore_provenance=True)
+        assert genome1["4"].tables.edges != genome1["5"].tables.edges
+
+    def test_output(self, tmp_path):
+        output = tmp_path / "sim_{chromosome}.trees"
+        results = dict(
+            stdgrimmsim.simulate_genome(
+                self.species,
+                self.model,
+                self.samples,
+                chromosomes=["4", "5"],
+                seed=3,
+                workers=2,
+                output=output,
+                provenance={"software": "test"},
+            )
+        )
+        assert results == {
+            "4": str(tmp_path / "sim_4.trees"),
+            "5": str(tmp_path / "sim_5.trees"),
+        }
+        for chrom_id, path in results.items():
+            ts = tskit.load(path)
+            assert (
+                ts.sequence_length == self.species.genome.get_chromosome(chrom_id).length
+            )
+            provenance = ts.provenance(ts.num_provenances - 1).record
+            assert json.loads(provenance) == {"software": "test"}
+
+    def test_model_id(self):
+        # A dry run initialises the simulation, so this is quick.
+        results = list(
+            stdgrimmsim.simulate_genome(
+                self.species,
+                "BlackForest_1D12",
+                {"BlackForest": 2},
+                chromosomes=["5"],
+                workers=1,
+                engine_kwargs={"dry_run": True},
+            )
+        )
+        assert results == [("5", None)]
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match="more than once"):
+            stdgrimmsim.simulate_genome(
+                self.species, self.model, self.samples, chromosomes=["1", "1"]
+            )
+        with pytest.raises(ValueError, match="Chromosome not found"):
+            stdgrimmsim.simulate_genome(
+                self.species, self.model, self.samples, chromosomes=["nope"]
+            )
+        with pytest.raises(ValueError, match="left"):
+            stdgrimmsim.simulate_genome(
+                self.species, self.model, self.samples, contig_kwargs={"left": 0}
+            )
+
+
+class TestChromosomeOutputPath:
+    @pytest.mark.parametrize(
+        ["output", "expected"],
+        [
+            ("sim.trees", "sim_1.trees"),
+            ("out/sim_{chromosome}.trees", "out/sim_1.trees"),
+            ("sim", "sim_1"),
+            ("{chromosome}/sim.trees", "1/sim.trees"),
+        ],
+    )
+    def test_paths(self, output, expected):
+        assert stdgrimmsim.chromosome_output_path(output, "1") == expected
+
+
+class TestReadManifest:
+    def test_jsonl(self, tmp_path):
+        manifest = tmp_path / "manifest.jsonl"
+        rows = [
+            {
+                "species": "ZweBerg",
+                "model": "BlackForest_1D12",
+                "contig": {"chromosome": "1", "right": 1e5},
+                "samples": {"BlackForest": 2},
+                "seed": 3,
+                "output": "a.trees",
+            },
+            {
+                "species": "ZweBerg",
+                "contig": "length=1000",
+                "samples": "pop_0:2",
+                "engine_kwargs": {"msprime_model": "dtwf"},
+            },
+        ]
+        with open(manifest, "w") as f:
+            f.write("# a comment\n")
+            for row in rows:
+                f.write(json.dumps(row) + "\n\n")
+        jobs = stdgrimmsim.read_manifest(manifest)
+        assert jobs[0] == stdgrimmsim.SimulationJob(
+            species="ZweBerg",
+            demographic_model="BlackForest_1D12",
+            contig={"chromosome": "1", "right": 1e5},
+            samples={"BlackForest": 2},
+            seed=3,
+            output="a.trees",
+        )
+        assert jobs[1] == stdgrimmsim.SimulationJob(
+            species="ZweBerg",
+            contig={"length": 1000},
+            samples={"pop_0": 2},
+            engine_kwargs={"msprime_model": "dtwf"},
+        )
+
+    def test_tsv(self, tmp_path):
+        manifest = tmp_path / "manifest.tsv"
+        with open(manifest, "w") as f:
+            f.write("species\tmodel\tcontig\tsamples\tseed\toutput\n")
+            f.write("ZweBerg\tBlackForest_1D12\tchromosome=1,right=1e5\t")
+            f.write("BlackForest:2,Harz:0\t5\tb.trees\n")
+            f.write("ZweBerg\t\tlength=100\tpop_0:1\t\tc.trees\n")
+        jobs = stdgrimmsim.read_manifest(manifest, engine="slim")
+        assert jobs[0] == stdgrimmsim.SimulationJob(
+            species="ZweBerg",
+            demographic_model="BlackForest_1D12",
+            contig={"chromosome": "1", "right": 1e5},
+            samples={"BlackForest": 2, "Harz": 0},
+            engine="slim",
+            seed=5,
+            output="b.trees",
+        )
+        assert jobs[1].demographic_model is None
+        assert jobs[1].seed is None
+        assert jobs[1].contig == {"length": 100}
+
+    @pytest.mark.parametrize(
+        "row",
+        [
+            {"samples": "pop_0:2"},
+            {"species": "ZweBerg"},
+            {"species": "ZweBerg", "samples": "2"},
+            {"species": "ZweBerg", "samples": "pop_0:2", "contig": "length"},
+            {"species": "ZweBerg", "samples": "pop_0:2", "colour": "red"},
+        ],
+    )
+    def test_bad_rows(self, tmp_path, row):
+        manifest = tmp_path / "manifest.jsonl"
+        with open(manifest, "w") as f:
+            f.write(json.dumps(row) + "\n")
+        with pytest.raises(ValueError, match="Invalid row 0"):
+            stdgrimmsim.read_manifest(manifest)
+
+
+class TestRunManifest:
+    def write_manifest(self, tmp_path, num_rows, **kwargs):
+        manifest = tmp_path / "manifest.jsonl"
+        with open(manifest, "w") as f:
+            for j in range(num_rows):
+                row = dict(
+                    species="ZweBerg",
+                    contig="length=1e4",
+                    samples="pop_0:3",
+                    output=str(tmp_path / f"{j}.trees"),
+                    **kwargs,
+                )
+                f.write(json.dumps(row) + "\n")
+        return manifest
+
+    def test_run(self, tmp_path):
+        manifest = self.write_manifest(tmp_path, 3)
+        results = list(stdgrimmsim.run_manifest(manifest, workers=2, seed=1))
+        assert sorted(result.index for result in results) == [0, 1, 2]
+        seeds = stdgrimmsim.derive_seeds(1, 3)
+        for result in results:
+            assert result.seed == seeds[result.index]
+            ts = tskit.load(tmp_path / f"{result.index}.trees")
+            assert ts.num_samples == 6
+        with open(f"{manifest}.journal") as f:
+            records = [json.loads(line) for line in f]
+        assert records[0] == {"root_seed": 1}
+        assert sorted(record["row"] for record in records[1:]) == [0, 1, 2]
+
+    def test_provenance(self, tmp_path):
+        manifest = self.write_manifest(tmp_path, 1)
+        list(stdgrimmsim.run_manifest(manifest, workers=1, provenance={"x": 1}))
+        ts = tskit.load(tmp_path / "0.trees")
+        assert json.loads(ts.provenance(ts.num_provenances - 1).record) == {"x": 1}
+
+    def test_resume(self, tmp_path):
+        manifest = self.write_manifest(tmp_path, 4)
+        results = stdgrimmsim.run_manifest(manifest, workers=1, seed=2)
+        first = [next(results), next(results)]
+        results.close()
+        ts_before = tskit.load(tmp_path / "0.trees")
+        assert not os.path.exists(tmp_path / "3.trees")
+        # Resuming without a seed uses the seed stored in the journal, and
+        # only runs the remaining rows.
+        rest = list(stdgrimmsim.run_manifest(manifest, workers=1))
+        assert [r.index for r in first] == [0, 1]
+        assert [r.index for r in rest] == [2, 3]
+        ts_after = tskit.load(tmp_path / "0.trees")
+        ts_before.tables.assert_equals(ts_after.tables)
+        # The resumed rows get the same seeds as in an uninterrupted run.
+        seeds = stdgrimmsim.derive_seeds(2, 4)
+        assert [r.seed for r in rest] == seeds[2:]
+        assert list(stdgrimmsim.run_manifest(manifest, workers=1)) == []
+
+    def test_rerun_missing_or_modified(self, tmp_path):
+        manifest = self.write_manifest(tmp_path, 2)
+        list(stdgrimmsim.run_manifest(manifest, workers=1, seed=3))
+        os.remove(tmp_path / "0.trees")
+        assert [r.index for r in stdgrimmsim.run_manifest(manifest, workers=1)] == [0]
+        self.write_manifest(tmp_path, 2, engine_kwargs={"msprime_model": "smc"})
+        results = list(stdgrimmsim.run_manifest(manifest, workers=1))
+        assert sorted(r.index for r in results) == [0, 1]
+
+    def test_conflicting_seed(self, tmp_path):
+        manifest = self.write_manifest(tmp_path, 1)
+        list(stdgrimmsim.run_manifest(manifest, workers=1, seed=3))
+        with pytest.raises(ValueError, match="journal"):
+            stdgrimmsim.run_manifest(manifest, workers=1, seed=4)
+
+    def test_missing_output(self, tmp_path):
+        manifest = tmp_path / "manifest.jsonl"
+        with open(manifest, "w") as f:
+            f.write(json.dumps(dict(species="ZweBerg", samples="pop_0:2")) + "\n")
+        with pytest.raises(ValueError, match="no output"):
+            stdgrimmsim.run_manifest(manifest)
+
+    def test_duplicate_output(self, tmp_path):
+        manifest = tmp_path / "manifest.jsonl"
+        with open(manifest, "w") as f:
+            for _ in range(2):
+                row = dict(species="ZweBerg", samples="pop_0:2", output="x.trees")
+                f.write(json.dumps(row) + "\n")
+        with pytest.raises(ValueError, match="duplicate"):
+            stdgrimmsim.run_manifest(manifest)
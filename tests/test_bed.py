@@ -0,0 +1,157 @@
+"""
+Tests for reading BED files.
+"""
+
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+import stdgrimmsim
+from stdgrimmsim import bed
+
+
+def write_bed(path, lines, compress=False):
+    data = "".join(lines).encode()
+    if compress:
+        data = gzip.compress(data)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+class TestReadBed:
+    lines = [
+        "track name=mask\n",
+        "# a comment\n",
+        "chr1\t10\t20\tname\t0\t+\n",
+        "\n",
+        "chr1\t30\t40\r\n",
+        "chr2\t5\t6\n",
+        "browser position chr1\n",
+        "chr1\t50\t60\n",
+        "chr3\t1\t2",
+    ]
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_read_bed(self, tmp_path, compress):
+        path = write_bed(tmp_path / "mask.bed", self.lines, compress)
+        index = bed.get_bed_index(path)
+        assert index.chromosomes == ["chr1", "chr2", "chr3"]
+        intervals = bed.read_bed(path, "chr1")
+        assert intervals.dtype == np.int64
+        np.testing.assert_array_equal(intervals, [[10, 20], [30, 40], [50, 60]])
+        np.testing.assert_array_equal(bed.read_bed(path, "chr2"), [[5, 6]])
+        np.testing.assert_array_equal(bed.read_bed(path, "chr3"), [[1, 2]])
+        assert bed.read_bed(path, "chr4").shape == (0, 2)
+        np.testing.assert_array_equal(
+            index.get_intervals(),
+            [[10, 20], [30, 40], [5, 6], [50, 60], [1, 2]],
+        )
+
+    def test_blocks(self, tmp_path):
+        path = write_bed(tmp_path / "mask.bed", self.lines)
+        index = bed.get_bed_index(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        for chrom, blocks in index.blocks.items():
+            for start, end in blocks:
+                for line in data[start:end].decode().splitlines():
+                    assert line == "" or line.startswith((chrom, "#", "browser"))
+
+    def test_chunks(self, tmp_path, monkeypatch):
+        # Runs of lines of a chromosome span several chunks.
+        monkeypatch.setattr(bed, "_CHUNK_SIZE", 7)
+        rng = np.random.default_rng(1)
+        chroms = np.repeat(["1", "2", "1", "10"], [50, 20, 30, 40])
+        left = rng.integers(0, 10**9, size=len(chroms))
+        right = left + rng.integers(1, 1000, size=len(chroms))
+        lines = [f"{c}\t{a}\t{b}\n" for c, a, b in zip(chroms, left, right)]
+        path = write_bed(tmp_path / "mask.bed", lines)
+        index = bed.get_bed_index(path)
+        assert index.chromosomes == ["1", "2", "10"]
+        assert len(index.blocks["1"]) == 2
+        for chrom in ["1", "2", "10"]:
+            np.testing.assert_array_equal(
+                bed.read_bed(path, chrom),
+                np.column_stack([left, right])[chroms == chrom],
+            )
+
+    def test_cached(self, tmp_path, monkeypatch):
+        path = write_bed(tmp_path / "mask.bed", self.lines)
+        index = bed.get_bed_index(path)
+        assert bed.get_bed_index(path) is index
+        intervals = index.get_intervals("chr1")
+        intervals[0, 0] = 15
+        monkeypatch.setattr(bed, "_parse_intervals", None)
+        np.testing.assert_array_equal(
+            index.get_intervals("chr1"), [[10, 20], [30, 40], [50, 60]]
+        )
+
+    def test_compressed_parsed_once(self, tmp_path, monkeypatch):
+        # The intervals of all chromosomes of a compressed file are parsed
+        # while indexing, as the file cannot be read one chromosome at a time.
+        path = write_bed(tmp_path / "mask.bed.gz", self.lines, compress=True)
+        index = bed.get_bed_index(path)
+        assert index.compressed
+        monkeypatch.setattr(bed, "_open", None)
+        np.testing.assert_array_equal(
+            index.get_intervals("chr1"), [[10, 20], [30, 40], [50, 60]]
+        )
+        np.testing.assert_array_equal(index.get_intervals("chr3"), [[1, 2]])
+        assert index.get_intervals("chr4").shape == (0, 2)
+
+    def test_cached_chromosomes_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bed, "_MAX_CACHED_CHROMOSOMES", 2)
+        path = write_bed(tmp_path / "mask.bed", self.lines)
+        index = bed.get_bed_index(path)
+        for chrom in ["chr1", "chr2", "chr1", "chr3"]:
+            index.get_intervals(chrom)
+        assert list(index._intervals.keys()) == ["chr1", "chr3"]
+
+    def test_indexes_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bed, "_MAX_BED_INDEXES", 2)
+        bed.clear_bed_cache()
+        paths = [write_bed(tmp_path / f"mask{j}.bed", self.lines) for j in range(3)]
+        index = bed.get_bed_index(paths[0])
+        bed.get_bed_index(paths[1])
+        assert bed.get_bed_index(paths[0]) is index
+        bed.get_bed_index(paths[2])
+        assert list(bed._bed_indexes.keys()) == [paths[0], paths[2]]
+        bed.clear_bed_cache()
+        assert len(bed._bed_indexes) == 0
+        assert bed.get_bed_index(paths[0]) is not index
+
+    def test_file_changed(self, tmp_path):
+        path = write_bed(tmp_path / "mask.bed", self.lines)
+        np.testing.assert_array_equal(bed.read_bed(path, "chr2"), [[5, 6]])
+        write_bed(tmp_path / "mask.bed", ["chr2\t100\t200\n"])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        np.testing.assert_array_equal(bed.read_bed(path, "chr2"), [[100, 200]])
+
+    @pytest.mark.parametrize(
+        "line", ["chr1\t10\n", "chr1\t10\tx\n", "chr1\t-5\t10\n", "chr1\t\t10\n"]
+    )
+    def test_bad_lines(self, tmp_path, line):
+        path = write_bed(tmp_path / "mask.bed", ["chr1\t1\t2\n", line])
+        with pytest.raises(ValueError):
+            bed.read_bed(path, "chr1")
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_spaces(self, tmp_path, compress):
+        # Columns may also be separated by (runs of) spaces, or spaces and tabs.
+        lines = ["chr1 10 20 name\n", "chr1  30 \t40\r\n", "chr2\t5 6\n", "chr1 50 60"]
+        path = write_bed(tmp_path / "mask.bed", lines, compress)
+        assert bed.get_bed_index(path).chromosomes == ["chr1", "chr2"]
+        np.testing.assert_array_equal(
+            bed.read_bed(path, "chr1"), [[10, 20], [30, 40], [50, 60]]
+        )
+        np.testing.assert_array_equal(bed.read_bed(path, "chr2"), [[5, 6]])
+
+    def test_utils_read_bed(self, tmp_path):
+        path = write_bed(tmp_path / "mask.bed", self.lines, compress=True)
+        np.testing.assert_array_equal(
+            stdgrimmsim.utils.read_bed(path, "chr1"), [[10, 20], [30, 40], [50, 60]]
+        )
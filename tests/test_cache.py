@@ -2,12 +2,18 @@
 Tests for the cache management code.
 """
 
+import concurrent.futures
 import os
 import pathlib
+import subprocess
+import sys
 import tempfile
 import tarfile
+from unittest import mock
 
 import appdirs
+import msprime
+import numpy as np
 import pytest
 
 import stdgrimmsim
@@ -44,6 +50,47 @@ class TestSetCacheDir(tests.CacheWritingTest):
             os.environ.pop("STDPOPSIM_CACHE")
 
 
+class TestSetScratchDir:
+    """
+    Tests the set_scratch_dir function.
+    """
+
+    paths = ["/somefile", "/some/other/file/", "relative/path", "relative/path/"]
+
+    @pytest.fixture(autouse=True)
+    def restore_scratch_dir(self):
+        saved_scratch_dir = stdgrimmsim.get_scratch_dir()
+        yield
+        stdgrimmsim.set_scratch_dir(saved_scratch_dir)
+
+    def test_paths(self):
+        for test in self.paths:
+            stdgrimmsim.set_scratch_dir(test)
+            assert stdgrimmsim.get_scratch_dir() == pathlib.Path(test)
+            stdgrimmsim.set_scratch_dir(pathlib.Path(test))
+            assert stdgrimmsim.get_scratch_dir() == pathlib.Path(test)
+
+    def test_environment_var(self, monkeypatch):
+        for test in self.paths:
+            monkeypatch.setenv("STDPOPSIM_SCRATCH", test)
+            stdgrimmsim.set_scratch_dir()
+            assert stdgrimmsim.get_scratch_dir() == pathlib.Path(test)
+
+    def test_none(self, monkeypatch):
+        monkeypatch.delenv("STDPOPSIM_SCRATCH", raising=False)
+        stdgrimmsim.set_scratch_dir(None)
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK | os.X_OK):
+            assert stdgrimmsim.get_scratch_dir() == pathlib.Path("/dev/shm")
+        else:
+            assert stdgrimmsim.get_scratch_dir() == pathlib.Path(tempfile.gettempdir())
+
+    def test_no_shm(self, monkeypatch):
+        monkeypatch.delenv("STDPOPSIM_SCRATCH", raising=False)
+        with mock.patch("os.path.isdir", return_value=False):
+            stdgrimmsim.set_scratch_dir(None)
+        assert stdgrimmsim.get_scratch_dir() == pathlib.Path(tempfile.gettempdir())
+
+
 class TestCachedData(tests.CacheWritingTest):
     def test_caching(self):
         for extract in (True, False):
@@ -109,3 +156,200 @@ class TestCachedData(tests.CacheWritingTest):
             cache.is_cached = lambda: False
             with pytest.warns(UserWarning, match="multiple processes downloading"):
                 cache.download()
+
+
+def _simulate_with_cache(args):
+    # Module level, so that it can be run in a worker process.
+    cache_dir, seed = args
+    stdgrimmsim.enable_result_cache(cache_dir)
+    species = stdgrimmsim.get_species("ZweBerg")
+    ts = stdgrimmsim.get_engine("msprime").simulate(
+        stdgrimmsim.PiecewiseConstantSize(100),
+        species.get_contig(length=1e4),
+        {"pop_0": 5},
+        seed=seed,
+    )
+    return ts.tables.nodes.time.tolist()
+
+
+class TestResultCache:
+    """
+    Tests for the simulation result cache.
+    """
+
+    @pytest.fixture
+    def result_cache(self, tmp_path):
+        cache = stdgrimmsim.enable_result_cache(tmp_path / "results")
+        yield cache
+        stdgrimmsim.disable_result_cache()
+
+    def inputs(self, **kwargs):
+        species = stdgrimmsim.get_species("ZweBerg")
+        inputs = dict(
+            engine="msprime",
+            version="1.0",
+            demographic_model=species.get_demographic_model("HarzBlackForest_2D12"),
+            contig=species.get_contig("1", right=1e5),
+            samples={"BlackForest": 2, "Harz": 3},
+            seed=1,
+            params={"msprime_model": "hudson"},
+        )
+        inputs.update(kwargs)
+        return inputs
+
+    def simulate(self, seed=1, **kwargs):
+        return stdgrimmsim.get_engine("msprime").simulate(
+            stdgrimmsim.PiecewiseConstantSize(100),
+            stdgrimmsim.get_species("ZweBerg").get_contig(length=1e4),
+            {"pop_0": 5},
+            seed=seed,
+            **kwargs,
+        )
+
+    def test_disabled_by_default(self):
+        assert stdgrimmsim.get_result_cache() is None
+
+    def test_enable_default_path(self):
+        cache = stdgrimmsim.enable_result_cache()
+        try:
+            assert stdgrimmsim.get_result_cache() is cache
+            assert cache.path == stdgrimmsim.get_cache_dir() / "results"
+        finally:
+            stdgrimmsim.disable_result_cache()
+        assert stdgrimmsim.get_result_cache() is None
+
+    def test_key_stable(self, result_cache):
+        # Equal, but distinct, inputs give the same key.
+        key = result_cache.key(**self.inputs())
+        assert len(key) == 64
+        assert result_cache.key(**self.inputs()) == key
+        code = (
+            "import stdgrimmsim\n"
+            "from tests.test_cache import TestResultCache\n"
+            "cache = stdgrimmsim.ResultCache(path='.')\n"
+            "print(cache.key(**TestResultCache().inputs()))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": "1234"},
+        )
+        assert result.stdout.strip() == key
+
+    def test_key_depends_on_inputs(self, result_cache):
+        species = stdgrimmsim.get_species("ZweBerg")
+        contig = species.get_contig("1", right=1e5)
+        contig.mutation_rate *= 2
+        masked_contig = species.get_contig(
+            "1", right=1e5, inclusion_mask=np.array([[0, 1000]])
+        )
+        dfe_contig = species.get_contig("1", right=1e5)
+        dfe_contig.add_dfe(
+            intervals=np.array([[0, 1000]]), DFE=stdgrimmsim.dfe.neutral_dfe()
+        )
+        variants = [
+            dict(engine="slim"),
+            dict(version="1.1"),
+            dict(demographic_model=species.get_demographic_model("BlackForest_1D12")),
+            dict(contig=species.get_contig("1", right=2e5)),
+            dict(contig=contig),
+            dict(contig=masked_contig),
+            dict(contig=dfe_contig),
+            dict(samples={"BlackForest": 3, "Harz": 3}),
+            dict(seed=2),
+            dict(params={"msprime_model": "dtwf"}),
+        ]
+        keys = {result_cache.key(**self.inputs())}
+        for variant in variants:
+            keys.add(result_cache.key(**self.inputs(**variant)))
+        assert len(keys) == len(variants) + 1
+
+    def test_not_cached(self, result_cache):
+        assert result_cache.key(**self.inputs(seed=None)) is None
+        # Parameters that cannot be hashed stably are not cached.
+        params = {"callback": lambda x: x}
+        assert result_cache.key(**self.inputs(params=params)) is None
+
+    def test_simulate_hit(self, result_cache):
+        ts1 = self.simulate()
+        assert result_cache.size > 0
+        with mock.patch("msprime.sim_ancestry") as sim_ancestry:
+            ts2 = self.simulate()
+            sim_ancestry.assert_not_called()
+        ts1.tables.assert_equals(ts2.tables)
+        with mock.patch(
+            "msprime.sim_ancestry", wraps=msprime.sim_ancestry
+        ) as sim_ancestry:
+            self.simulate(seed=2)
+            self.simulate(seed=2, msprime_model="dtwf")
+            assert sim_ancestry.call_count == 2
+
+    def test_simulate_no_seed(self, result_cache):
+        self.simulate(seed=None)
+        self.simulate(seed=1, dry_run=True)
+        assert result_cache.size == 0
+
+    def test_corrupt_entry(self, result_cache):
+        ts = self.simulate()
+        key = result_cache.key(**self.inputs())
+        result_cache.put(key, ts)
+        with open(result_cache._path(key), "w") as f:
+            f.write("not a tree sequence")
+        assert result_cache.get(key) is None
+        assert not result_cache._path(key).exists()
+
+    def test_lru_eviction(self, tmp_path):
+        ts = self.simulate()
+        ts.dump(tmp_path / "x.trees")
+        size = os.path.getsize(tmp_path / "x.trees")
+        cache = stdgrimmsim.ResultCache(path=tmp_path / "results", max_size=3 * size)
+        keys = [cache.key(**self.inputs(seed=seed)) for seed in range(1, 5)]
+        for j, key in enumerate(keys[:3]):
+            cache.put(key, ts)
+            os.utime(cache._path(key), (j, j))
+        # Using the oldest result makes it the most recently used.
+        assert cache.get(keys[0]) is not None
+        cache.put(keys[3], ts)
+        assert cache.size <= cache.max_size
+        assert cache.get(keys[1]) is None
+        for key in [keys[0], keys[2], keys[3]]:
+            assert cache.get(key) is not None
+        cache.clear()
+        assert cache.size == 0
+
+    def test_files(self, tmp_path):
+        cache = stdgrimmsim.ResultCache(path=tmp_path / "results", max_size=10)
+        key = "ab" * 32
+        assert cache.get_file(key) is None
+        with open(tmp_path / "x", "w") as f:
+            f.write("x" * 6)
+        path = cache.put_file(key, tmp_path / "x")
+        assert not (tmp_path / "x").exists()
+        os.utime(path, (0, 0))
+        assert cache.get_file(key) == path
+        assert path.stat().st_mtime > 0
+        # Files larger than max_size are evicted straight away.
+        with open(tmp_path / "y", "w") as f:
+            f.write("y" * 11)
+        assert cache.put_file("cd" * 32, tmp_path / "y") is None
+        assert cache.get_file("cd" * 32) is None
+
+    def test_bad_max_size(self, tmp_path):
+        with pytest.raises(ValueError, match="max_size"):
+            stdgrimmsim.ResultCache(path=tmp_path, max_size=-1)
+
+    def test_multiple_processes(self, tmp_path):
+        cache_dir = tmp_path / "results"
+        args = [(cache_dir, seed) for seed in [1, 1, 2, 2, 1, 2]]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(_simulate_with_cache, args))
+        expected = {1: results[0], 2: results[2]}
+        assert expected[1] != expected[2]
+        for (_, seed), times in zip(args, results):
+            assert times == expected[seed]
+        cache = stdgrimmsim.ResultCache(path=cache_dir)
+        assert len(list(cache_dir.glob("*/*.trees"))) == 2
+        assert len(list(cache_dir.glob("*/.*"))) == 0
+        assert cache.size > 0
@@ -187,6 +187,35 @@ class TestHomoSapiensArgumentParser:
         assert args.samples == ["BlackForest:2"]
         assert args.cache_dir == "/some/cache_dir"
 
+    def test_scratch_dir(self):
+        parser = cli.stdgrimmsim_cli_parser()
+        cmd = "ZweBerg"
+        args = parser.parse_args(
+            ["--scratch-dir", "/some/scratch_dir", cmd, "BlackForest:2"]
+        )
+        assert args.samples == ["BlackForest:2"]
+        assert args.scratch_dir == "/some/scratch_dir"
+        args = parser.parse_args([cmd, "BlackForest:2"])
+        assert args.scratch_dir is None
+
+    def test_slim_telemetry_interval(self):
+        parser = cli.stdgrimmsim_cli_parser()
+        cmd = "ZweBerg"
+        args = parser.parse_args(
+            ["-e", "slim", "--slim-telemetry-interval", "50", cmd, "BlackForest:2"]
+        )
+        assert args.slim_telemetry_interval == 50
+        args = parser.parse_args(["-e", "slim", cmd, "BlackForest:2"])
+        assert args.slim_telemetry_interval is None
+
+    def test_msprime_skip_masked(self):
+        parser = cli.stdgrimmsim_cli_parser()
+        cmd = "ZweBerg"
+        args = parser.parse_args(["--msprime-skip-masked", cmd, "BlackForest:2"])
+        assert args.msprime_skip_masked is True
+        args = parser.parse_args([cmd, "BlackForest:2"])
+        assert args.msprime_skip_masked is False
+
     def test_bibtex(self):
         parser = cli.stdgrimmsim_cli_parser()
         cmd = "ZweBerg"
@@ -609,6 +638,102 @@ class TestHelp:
         self.run_stdgrimmsim("ZweBerg --help-annotations")
 
 
+class TestLazySpeciesParsers:
+    """
+    Tests that species parsers are only built for the species that are used.
+    """
+
+    def run_in_subprocess(self, args):
+        code = (
+            "import sys\n"
+            "import stdgrimmsim.cli as cli\n"
+            "cli.run = lambda args: None\n"
+            "try:\n"
+            f"    cli.stdgrimmsim_main({args!r})\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "loaded = {m.split('.')[2] for m in sys.modules "
+            "if m.startswith('stdgrimmsim.catalog.')}\n"
+            "print(' '.join(sorted(loaded)), file=sys.stderr)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        return result.stdout, result.stderr.splitlines()[-1].split()
+
+    def test_help_loads_no_species(self):
+        stdout, loaded = self.run_in_subprocess(["--help"])
+        assert loaded == []
+        for species in stdgrimmsim.all_species():
+            assert f"Run simulations for {species.name}." in stdout
+
+    def test_species_command_loads_one_species(self):
+        _, loaded = self.run_in_subprocess(["ZweBerg", "BlackForest:2", "-c", "1"])
+        assert loaded == ["ZweBerg"]
+
+    def test_version_loads_no_species(self):
+        _, loaded = self.run_in_subprocess(["--version"])
+        assert loaded == []
+
+    @pytest.mark.parametrize(
+        "args,subcommand",
+        [
+            (["ZweBerg", "BlackForest:2", "-c", "1"], "ZweBerg"),
+            (["-q", "-c", "FraHol", "ZweBerg", "BlackForest:2"], "ZweBerg"),
+            (["--msprime-change-model", "10", "dtwf", "FraHol"], "FraHol"),
+            (["batch", "manifest.tsv"], "batch"),
+            (["-q"], None),
+            (["--help"], None),
+            (["-e", "XXX", "ZweBerg"], None),
+        ],
+    )
+    def test_get_subcommand(self, args, subcommand):
+        assert cli._get_subcommand(args) == subcommand
+
+    def test_parsers_built_on_demand(self):
+        with mock.patch(
+            "stdgrimmsim.cli.add_simulate_species_parser",
+            wraps=cli.add_simulate_species_parser,
+        ) as add_parser:
+            parser = cli.stdgrimmsim_cli_parser(species_ids=["ZweBerg"])
+            assert add_parser.call_count == 1
+        args = parser.parse_args(["ZweBerg", "BlackForest:3"])
+        assert args.species == "ZweBerg"
+        assert args.samples == ["BlackForest:3"]
+        # All species are listed in the help.
+        with mock.patch("sys.stdout", new=io.StringIO()) as stdout:
+            with pytest.raises(SystemExit):
+                parser.parse_args(["--help"])
+        for species in stdgrimmsim.all_species():
+            assert f"Run simulations for {species.name}." in stdout.getvalue()
+
+    def test_main_builds_one_parser(self):
+        with (
+            mock.patch("stdgrimmsim.cli.run") as run,
+            mock.patch(
+                "stdgrimmsim.cli.add_simulate_species_parser",
+                wraps=cli.add_simulate_species_parser,
+            ) as add_parser,
+        ):
+            cli.stdgrimmsim_main(["-q", "ZweBerg", "BlackForest:2", "-c", "1"])
+        assert add_parser.call_count == 1
+        args = run.call_args[0][0]
+        assert args.species == "ZweBerg"
+        assert args.chromosome == "1"
+
+    def test_all_parsers(self):
+        # Tools such as sphinx-argparse walk the parsers of all subcommands.
+        parser = cli.stdgrimmsim_cli_parser()
+        for species in stdgrimmsim.all_species():
+            args = parser.parse_args([species.id, "pop_0:2"])
+            assert args.species == species.id
+
+    def test_bad_species(self):
+        with mock.patch("argparse.ArgumentParser.exit", side_effect=SystemExit):
+            with pytest.raises(SystemExit):
+                capture_output(cli.stdgrimmsim_main, ["XXX"])
+
+
 class TestWriteBibtex:
     """
     Test that citations are able to be converted to bibtex
@@ -836,7 +961,7 @@ class TestSearchWrappers:
     def test_bad_species(self):
         with mock.patch("stdgrimmsim.cli.exit", autospec=True) as mocked_exit:
             cli.get_species_wrapper("XXX")
-            available_species = ", ".join(stdgrimmsim.species.registered_species)
+            available_species = ", ".join(stdgrimmsim.species._species_ids())
             mocked_exit.assert_called_once_with(
                 f"Species 'XXX' not in catalog ({available_species})"
             )
@@ -912,6 +1037,159 @@ class TestDryRun:
             assert not os.path.isfile(filename)
 
 
+class TestBatch:
+    def test_batch(self, tmp_path):
+        manifest = tmp_path / "manifest.tsv"
+        with open(manifest, "w") as f:
+            f.write("species\tmodel\tcontig\tsamples\toutput\n")
+            for j in range(3):
+                f.write(f"ZweBerg\t\tlength=1e4\tpop_0:2\t{tmp_path}/{j}.trees\n")
+        cmd = f"-q batch {manifest} --workers 1 -s 5"
+        capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+        seeds = stdgrimmsim.derive_seeds(5, 3)
+        for j in range(3):
+            ts = tskit.load(tmp_path / f"{j}.trees")
+            assert ts.num_samples == 4
+            provenance = json.loads(ts.provenance(ts.num_provenances - 1).record)
+            assert provenance["software"]["name"] == "stdgrimmsim"
+        assert os.path.exists(f"{manifest}.journal")
+        # Running again does nothing as all rows are complete.
+        with mock.patch("stdgrimmsim.batch._run_job") as run_job:
+            capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+            run_job.assert_not_called()
+        ts = stdgrimmsim.get_engine("msprime").simulate(
+            stdgrimmsim.PiecewiseConstantSize(
+                stdgrimmsim.get_species("ZweBerg").population_size
+            ),
+            stdgrimmsim.get_species("ZweBerg").get_contig(length=1e4),
+            {"pop_0": 2},
+            seed=seeds[1],
+        )
+        ts.tables.assert_equals(
+            tskit.load(tmp_path / "1.trees").tables, ignore_provenance=True
+        )
+
+    def test_bad_manifest(self, tmp_path):
+        manifest = tmp_path / "manifest.jsonl"
+        with open(manifest, "w") as f:
+            f.write('{"species": "ZweBerg"}\n')
+        with pytest.raises(SystemExit):
+            capture_output(
+                stdgrimmsim.cli.stdgrimmsim_main, ["-q", "batch", str(manifest)]
+            )
+
+    def test_missing_manifest(self, tmp_path):
+        with pytest.raises(SystemExit):
+            capture_output(
+                stdgrimmsim.cli.stdgrimmsim_main,
+                ["-q", "batch", str(tmp_path / "nope.tsv")],
+            )
+
+
+class TestGenotypesFormat:
+    def test_genotypes(self, tmp_path):
+        output = tmp_path / "out"
+        cmd = f"-q ZweBerg -L 10000 -s 2 --format genotypes -o {output} pop_0:3"
+        capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+        genotypes = stdgrimmsim.load_genotypes(output)
+        assert genotypes.num_samples == 6
+        assert genotypes.metadata["population_names"] == ["pop_0"]
+        provenance = genotypes.metadata["provenance"]
+        assert provenance["software"]["name"] == "stdgrimmsim"
+
+    def test_matches_trees(self, tmp_path):
+        trees = tmp_path / "out.trees"
+        cmd = f"-q ZweBerg -L 10000 -s 2 -o {trees} pop_0:3"
+        capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+        cmd += " --format genotypes"
+        cmd = cmd.replace(str(trees), str(tmp_path / "out"))
+        capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+        ts = tskit.load(trees)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path / "out")
+        assert ts.num_sites > 0
+        assert (genotypes.genotype_matrix() == (ts.genotype_matrix() > 0)).all()
+
+    def test_no_output(self):
+        cmd = "-q ZweBerg -L 10000 --format genotypes pop_0:3"
+        with pytest.raises(SystemExit):
+            capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+
+
+class TestMultipleChromosomes:
+    """
+    Checks simulating several chromosomes with --chromosome all or a list.
+    """
+
+    def docmd(self, _cmd, tmpdir):
+        output = pathlib.Path(tmpdir) / "sim.trees"
+        cmd = f"-q ZweBerg {_cmd} --workers 1 -s 1 -o {output} pop_0:2"
+        species = stdgrimmsim.get_species("ZweBerg")
+        # A tiny population size keeps whole-chromosome simulations fast.
+        with mock.patch.object(species, "population_size", 10):
+            with mock.patch("stdgrimmsim.cli.setup_logging", autospec=True):
+                return capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+
+    def test_parse(self):
+        parser = cli.stdgrimmsim_cli_parser()
+        args = parser.parse_args(["ZweBerg", "-c", "all", "pop_0:2"])
+        assert args.chromosome == "all"
+        args = parser.parse_args(["ZweBerg", "-c", "1,2", "pop_0:2"])
+        assert args.chromosome == "1,2"
+        with pytest.raises(SystemExit):
+            with mock.patch("argparse.ArgumentParser._print_message"):
+                parser.parse_args(["ZweBerg", "-c", "1,nope", "pop_0:2"])
+
+    def test_list(self, tmp_path):
+        self.docmd("-c 4,5", tmp_path)
+        assert sorted(os.listdir(tmp_path)) == ["sim_4.trees", "sim_5.trees"]
+        ts = tskit.load(tmp_path / "sim_4.trees")
+        assert ts.num_samples == 4
+        assert ts.sequence_length == 16_000_000
+        provenance = json.loads(ts.provenance(ts.num_provenances - 1).record)
+        assert provenance["software"]["name"] == "stdgrimmsim"
+
+    def test_written_by_workers(self, tmp_path):
+        # The tree sequences are written by the workers, not by this process.
+        with mock.patch("stdgrimmsim.cli.write_output", autospec=True) as write:
+            self.docmd("-c 4,5", tmp_path)
+        assert write.call_count == 0
+        assert sorted(os.listdir(tmp_path)) == ["sim_4.trees", "sim_5.trees"]
+
+    def test_genotypes(self, tmp_path):
+        self.docmd("-c 4,5 --format genotypes", tmp_path)
+        assert sorted(os.listdir(tmp_path)) == ["sim_4.trees", "sim_5.trees"]
+        genotypes = stdgrimmsim.load_genotypes(tmp_path / "sim_4.trees")
+        assert genotypes.num_samples == 4
+
+    def test_all(self, tmp_path):
+        self.docmd("-c all", tmp_path)
+        assert sorted(os.listdir(tmp_path)) == [f"sim_{j}.trees" for j in range(1, 6)]
+
+    def test_matches_api(self, tmp_path):
+        self.docmd("-c 4,5", tmp_path)
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = stdgrimmsim.PiecewiseConstantSize(10)
+        genome = dict(
+            stdgrimmsim.simulate_genome(
+                species, model, {"pop_0": 2}, chromosomes=["5"], seed=1, workers=1
+            )
+        )
+        ts = tskit.load(tmp_path / "sim_5.trees")
+        ts.tables.assert_equals(genome["5"].tables, ignore_provenance=True)
+
+    @pytest.mark.parametrize(
+        "options", ["--right 1000", "-L 1000", "--dfe-interval 0,10"]
+    )
+    def test_unsupported_options(self, tmp_path, options):
+        with pytest.raises(SystemExit):
+            self.docmd(f"-c 4,5 {options}", tmp_path)
+
+    def test_no_output(self):
+        cmd = "-q ZweBerg -c 4,5 pop_0:2"
+        with pytest.raises(SystemExit):
+            capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd.split())
+
+
 class TestMsprimeEngine:
     def docmd(self, _cmd):
         with tempfile.TemporaryDirectory() as tmpdir:
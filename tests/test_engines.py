@@ -173,3 +173,458 @@ class TestBehaviour:
                 contig=contig,
                 samples=samples,
             )
+
+
+class TestSimulateReplicates:
+    def setup_class(cls):
+        cls.species = stdgrimmsim.get_species("ZweBerg")
+        cls.model = cls.species.get_demographic_model("BlackForest_1D12")
+        cls.contig = cls.species.get_contig("1", right=2e5)
+        cls.samples = {"BlackForest": 5}
+
+    def test_msprime_replicates(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        replicates = engine.simulate_replicates(
+            self.model, self.contig, self.samples, num_replicates=3, seed=2
+        )
+        ts_list = list(replicates)
+        assert len(ts_list) == 3
+        for ts in ts_list:
+            assert ts.num_samples == 10
+            assert ts.num_sites > 0
+        assert ts_list[0].tables.edges != ts_list[1].tables.edges
+        assert ts_list[0].tables.sites != ts_list[1].tables.sites
+
+    def test_msprime_first_replicate_matches_simulate(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        ts1 = engine.simulate(self.model, self.contig, self.samples, seed=5)
+        ts2 = next(
+            engine.simulate_replicates(
+                self.model, self.contig, self.samples, num_replicates=2, seed=5
+            )
+        )
+        ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+
+    def test_msprime_replicates_reproducible(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        ts_list1 = engine.simulate_replicates(
+            self.model, self.contig, self.samples, num_replicates=2, seed=7
+        )
+        ts_list2 = engine.simulate_replicates(
+            self.model, self.contig, self.samples, num_replicates=2, random_seed=7
+        )
+        for ts1, ts2 in zip(ts_list1, ts_list2):
+            ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+
+    def test_masks_applied(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        contig = self.species.get_contig("1", right=2e5, exclusion_mask=[(0, 1e5)])
+        for ts in engine.simulate_replicates(
+            self.model, contig, self.samples, num_replicates=2, seed=1
+        ):
+            assert np.all(ts.tables.sites.position >= 1e5)
+
+    def test_generic_replicates(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        replicates = stdgrimmsim.Engine.simulate_replicates(
+            engine, self.model, self.contig, self.samples, num_replicates=2, seed=3
+        )
+        ts_list = list(replicates)
+        assert len(ts_list) == 2
+        assert ts_list[0].tables.edges != ts_list[1].tables.edges
+
+    @pytest.mark.parametrize("num_replicates", [0, -1, 1.5])
+    def test_bad_num_replicates(self, num_replicates):
+        engine = stdgrimmsim.get_engine("msprime")
+        with pytest.raises(ValueError, match="num_replicates"):
+            engine.simulate_replicates(
+                self.model,
+                self.contig,
+                self.samples,
+                num_replicates=num_replicates,
+            )
+
+    def test_non_neutral_contig(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        contig = self.species.get_contig("1", right=1e4)
+        contig.add_dfe(
+            intervals=np.array([[0, 100]]),
+            DFE=stdgrimmsim.DFE(
+                id="0",
+                description="test",
+                long_description="test test",
+                proportions=[1],
+                mutation_types=[
+                    stdgrimmsim.MutationType(
+                        distribution_type="f", distribution_args=[1]
+                    )
+                ],
+            ),
+        )
+        with pytest.raises(ValueError, match="non neutral"):
+            engine.simulate_replicates(
+                self.model, contig, self.samples, num_replicates=2
+            )
+
+
+class TestMsprimeSweep:
+    def setup_class(cls):
+        cls.species = stdgrimmsim.get_species("ZweBerg")
+        cls.model = stdgrimmsim.PiecewiseConstantSize(10000)
+        cls.contig = cls.species.get_contig(
+            length=2e5, mutation_rate=1e-8, recombination_rate=1e-8
+        )
+        cls.contig.add_single_site(id="sweep", coordinate=1e5)
+        cls.samples = {"pop_0": 20}
+
+    def simulate(self, extended_events, model=None, **kwargs):
+        engine = stdgrimmsim.get_engine("msprime")
+        return engine.simulate(
+            self.model if model is None else model,
+            self.contig,
+            self.samples,
+            seed=1,
+            extended_events=extended_events,
+            **kwargs,
+        )
+
+    def test_sweep_reduces_diversity(self):
+        windows = [0, 9e4, 1.1e5, 2e5]
+        diversity = np.zeros((2, 3))
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, 0.05)
+        for seed in range(1, 6):
+            engine = stdgrimmsim.get_engine("msprime")
+            for j, ee in enumerate([None, sweep]):
+                ts = engine.simulate(
+                    self.model, self.contig, self.samples, seed=seed, extended_events=ee
+                )
+                diversity[j] += ts.diversity(windows=windows)
+        assert diversity[1, 1] < diversity[0, 1] / 2
+        assert diversity[1, 1] < diversity[1, 0]
+        assert diversity[1, 1] < diversity[1, 2]
+
+    def test_sweep_models(self):
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, 0.05)
+        models = stdgrimmsim.engines._sweep_ancestry_models(
+            self.model, self.contig, sweep
+        )
+        assert len(models) == 3
+        assert isinstance(models[1], msprime.SweepGenicSelection)
+        assert models[1].position == 1e5
+        assert models[1].s == 0.05
+        assert models[1].start_frequency == 1 / 20000
+        assert models[1].end_frequency == 1 - 1 / 20000
+        # The mutation fixes after the deterministic sweep duration.
+        duration = (4 / 0.05) * np.log(19999)
+        assert models[0].duration == pytest.approx(1000 - duration)
+
+    def test_partial_sweep(self):
+        sweep = stdgrimmsim.selective_sweep(
+            "sweep", "pop_0", 500, 0.05, end_generation_ago=10, min_freq_at_end=0.5
+        )
+        models = stdgrimmsim.engines._sweep_ancestry_models(
+            self.model, self.contig, sweep
+        )
+        assert models[0].duration == 10
+        # The sweep ends at the frequency expected 490 generations after the
+        # mutation arose, which is above min_freq_at_end.
+        x = np.log(1 / 19999) + 0.025 * 490
+        assert models[1].end_frequency == pytest.approx(1 / (1 + np.exp(-x)))
+        assert models[1].end_frequency > 0.5
+        ts = self.simulate(sweep)
+        assert ts.num_samples == 40
+
+    def test_partial_sweep_complete(self):
+        # The sweep is expected to be complete before the end time.
+        sweep = stdgrimmsim.selective_sweep(
+            "sweep", "pop_0", 1000, 0.05, end_generation_ago=10, min_freq_at_end=0.5
+        )
+        models = stdgrimmsim.engines._sweep_ancestry_models(
+            self.model, self.contig, sweep
+        )
+        assert models[0].duration == pytest.approx(1000 - 80 * np.log(19999))
+        assert models[1].end_frequency == 1 - 1 / 20000
+
+    def test_partial_sweep_too_short(self):
+        # The mutation arises too late to reach min_freq_at_end.
+        sweep = stdgrimmsim.selective_sweep(
+            "sweep", "pop_0", 100, 0.05, end_generation_ago=10, min_freq_at_end=0.5
+        )
+        with pytest.raises(ValueError, match="min_freq_at_end=0.5"):
+            self.simulate(sweep)
+
+    def test_replicates(self):
+        engine = stdgrimmsim.get_engine("msprime")
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, 0.05)
+        ts1 = self.simulate(sweep)
+        ts_list = list(
+            engine.simulate_replicates(
+                self.model,
+                self.contig,
+                self.samples,
+                num_replicates=2,
+                seed=1,
+                extended_events=sweep,
+            )
+        )
+        ts1.tables.assert_equals(ts_list[0].tables, ignore_provenance=True)
+
+    def test_incomplete_sweep(self):
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 100, 0.05)
+        with pytest.raises(ValueError, match="min_freq_at_end"):
+            self.simulate(sweep)
+
+    @pytest.mark.parametrize(
+        "kwargs,match",
+        [
+            (dict(start_generation_ago=500), "hard sweeps"),
+            (dict(dominance_coeff=1.0), "dominance"),
+            (dict(selection_coeff=0.0), "positive"),
+        ],
+    )
+    def test_unsupported_sweeps(self, kwargs, match):
+        kwargs = {"selection_coeff": 0.05, **kwargs}
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, **kwargs)
+        with pytest.raises(ValueError, match=match):
+            self.simulate(sweep)
+
+    def test_size_change_during_sweep(self):
+        model = stdgrimmsim.PiecewiseConstantSize(10000, (500, 20000))
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, 0.05)
+        with pytest.raises(ValueError, match="constant"):
+            self.simulate(sweep, model=model)
+        # A size change before the mutation arises, or after the mutation
+        # fixes, is fine.
+        model = stdgrimmsim.PiecewiseConstantSize(10000, (2000, 20000))
+        self.simulate(sweep, model=model)
+        model = stdgrimmsim.PiecewiseConstantSize(20000, (100, 10000))
+        models = stdgrimmsim.engines._sweep_ancestry_models(model, self.contig, sweep)
+        assert models[1].start_frequency == 1 / 20000
+        self.simulate(sweep, model=model)
+
+    def test_multiple_populations(self):
+        model = self.species.get_demographic_model("HarzBlackForest_2D12")
+        sweep = stdgrimmsim.selective_sweep("sweep", "BlackForest", 1000, 0.05)
+        engine = stdgrimmsim.get_engine("msprime")
+        with pytest.raises(ValueError, match="single population"):
+            engine.simulate(
+                model, self.contig, {"BlackForest": 5}, extended_events=sweep
+            )
+
+    def test_other_extended_events(self):
+        events = [
+            stdgrimmsim.DrawMutation(
+                time=1000, single_site_id="sweep", population="pop_0"
+            )
+        ]
+        with pytest.raises(ValueError, match="single selective sweep"):
+            self.simulate(events)
+
+    def test_msprime_model(self):
+        sweep = stdgrimmsim.selective_sweep("sweep", "pop_0", 1000, 0.05)
+        with pytest.raises(ValueError, match="hudson"):
+            self.simulate(sweep, msprime_model="dtwf")
+
+
+class TestMsprimeSkipMasked:
+    def setup_class(cls):
+        cls.species = stdgrimmsim.get_species("ZweBerg")
+        cls.model = stdgrimmsim.PiecewiseConstantSize(1000)
+        cls.mask = np.array([[1000, 20000], [25000, 26000], [40000, 50000]])
+        cls.samples = {"pop_0": 5}
+
+    def contig(self, **kwargs):
+        # The recombination rate of chromosome 1 is 5e-8, and the rate map
+        # is missing to the right of the contig.
+        return self.species.get_contig("1", right=50000, mutation_rate=1e-7, **kwargs)
+
+    def test_collapsed_map(self):
+        contig = self.contig(exclusion_mask=self.mask)
+        collapsed = stdgrimmsim.engines._CollapsedMasks.from_contig(contig)
+        np.testing.assert_array_equal(
+            collapsed.intervals, [[0, 1000], [20000, 25000], [26000, 40000]]
+        )
+        np.testing.assert_array_equal(
+            collapsed.collapsed, [[0, 1000], [1001, 6001], [6002, 20002]]
+        )
+        rm = collapsed.recombination_map(contig.recombination_map)
+        assert rm.sequence_length == 20002
+        # The masked gaps keep their recombination rate mass; the masked
+        # right flank is removed.
+        assert rm.total_mass == pytest.approx(40000 * 5e-8)
+        assert rm.get_rate(1000) == pytest.approx(19000 * 5e-8)
+        assert rm.get_rate(6001) == pytest.approx(1000 * 5e-8)
+        x = np.array([0, 500, 1000, 1001, 6001, 6002, 20002])
+        np.testing.assert_array_equal(
+            collapsed.from_collapsed(x), [0, 500, 1000, 20000, 25000, 26000, 40000]
+        )
+        np.testing.assert_array_equal(
+            collapsed.to_collapsed(collapsed.from_collapsed(x)), x
+        )
+
+    def test_inclusion_mask(self):
+        contig = self.contig(inclusion_mask=self.mask)
+        collapsed = stdgrimmsim.engines._CollapsedMasks.from_contig(contig)
+        np.testing.assert_array_equal(collapsed.intervals, self.mask)
+
+    @pytest.mark.parametrize("mask_type", ["inclusion_mask", "exclusion_mask"])
+    def test_simulate(self, mask_type):
+        contig = self.contig(**{mask_type: self.mask})
+        engine = stdgrimmsim.get_engine("msprime")
+        ts = engine.simulate(
+            self.model, contig, self.samples, seed=1, msprime_skip_masked=True
+        )
+        assert ts.sequence_length == contig.length
+        assert ts.num_sites > 0
+        in_mask = np.zeros(ts.num_sites, dtype=bool)
+        for left, right in self.mask:
+            in_mask |= (ts.sites_position >= left) & (ts.sites_position < right)
+        assert np.all(in_mask == (mask_type == "inclusion_mask"))
+        for tree in ts.trees():
+            left, right = tree.interval
+            j = np.searchsorted(self.mask[:, 0], left, side="right") - 1
+            masked = j >= 0 and left < self.mask[j, 1]
+            assert (tree.num_edges == 0) == (masked != (mask_type == "inclusion_mask"))
+
+    def test_replicates(self):
+        contig = self.contig(exclusion_mask=self.mask)
+        engine = stdgrimmsim.get_engine("msprime")
+        ts = engine.simulate(
+            self.model, contig, self.samples, seed=1, msprime_skip_masked=True
+        )
+        replicates = engine.simulate_replicates(
+            self.model,
+            contig,
+            self.samples,
+            num_replicates=2,
+            seed=1,
+            msprime_skip_masked=True,
+        )
+        ts.tables.assert_equals(next(replicates).tables, ignore_provenance=True)
+
+    def test_no_mask(self):
+        contig = self.contig()
+        engine = stdgrimmsim.get_engine("msprime")
+        ts1 = engine.simulate(self.model, contig, self.samples, seed=1)
+        ts2 = engine.simulate(
+            self.model, contig, self.samples, seed=1, msprime_skip_masked=True
+        )
+        ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+
+    def test_dtwf(self):
+        contig = self.contig(exclusion_mask=self.mask)
+        engine = stdgrimmsim.get_engine("msprime")
+        with pytest.raises(ValueError, match="dtwf"):
+            engine.simulate(
+                self.model,
+                contig,
+                self.samples,
+                msprime_model="dtwf",
+                msprime_skip_masked=True,
+            )
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            dict(msprime_model=msprime.DiscreteTimeWrightFisher()),
+            dict(msprime_change_model=[(10, msprime.DiscreteTimeWrightFisher())]),
+            dict(msprime_change_model=[(10, "dtwf")]),
+        ],
+    )
+    def test_dtwf_instance(self, kwargs):
+        contig = self.contig(exclusion_mask=self.mask)
+        engine = stdgrimmsim.get_engine("msprime")
+        with pytest.raises(ValueError, match="dtwf"):
+            engine.simulate(
+                self.model, contig, self.samples, msprime_skip_masked=True, **kwargs
+            )
+
+    def test_model_instance(self):
+        contig = self.contig(exclusion_mask=self.mask)
+        engine = stdgrimmsim.get_engine("msprime")
+        ts1 = engine.simulate(
+            self.model,
+            contig,
+            self.samples,
+            seed=1,
+            msprime_model="smc",
+            msprime_skip_masked=True,
+        )
+        ts2 = engine.simulate(
+            self.model,
+            contig,
+            self.samples,
+            seed=1,
+            msprime_model=msprime.SmcApproxCoalescent(),
+            msprime_skip_masked=True,
+        )
+        ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+
+    def test_gene_conversion(self):
+        contig = self.contig(exclusion_mask=self.mask)
+        contig.gene_conversion_fraction = 0.5
+        contig.gene_conversion_length = 100
+        engine = stdgrimmsim.get_engine("msprime")
+        with pytest.raises(ValueError, match="gene conversion"):
+            engine.simulate(self.model, contig, self.samples, msprime_skip_masked=True)
+
+
+class TestMsprimeRegions:
+    def setup_class(cls):
+        cls.species = stdgrimmsim.get_species("ZweBerg")
+        cls.model = stdgrimmsim.PiecewiseConstantSize(1000)
+        cls.regions = np.array([[1000, 5000], [20000, 21000], [40000, 50000]])
+        cls.samples = {"pop_0": 5}
+
+    def test_skips_masked(self):
+        contig = self.species.get_contig("1", regions=self.regions, mutation_rate=1e-7)
+        engine = stdgrimmsim.get_engine("msprime")
+        ts1 = engine.simulate(self.model, contig, self.samples, seed=1)
+        ts2 = engine.simulate(
+            self.model, contig, self.samples, seed=1, msprime_skip_masked=True
+        )
+        ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+        assert ts1.num_sites > 0
+        parts = list(contig.split_regions(ts1))
+        assert len(parts) == len(self.regions)
+        assert sum(part.num_sites for part in parts) == ts1.num_sites
+        for part, (left, right) in zip(parts, self.regions):
+            assert np.all(part.sites_position >= left)
+            assert np.all(part.sites_position < right)
+
+    def test_dtwf(self):
+        # The ancestry between the regions is simulated with the dtwf model.
+        contig = self.species.get_contig("1", regions=self.regions, mutation_rate=1e-7)
+        engine = stdgrimmsim.get_engine("msprime")
+        ts = engine.simulate(
+            self.model, contig, self.samples, seed=1, msprime_model="dtwf"
+        )
+        assert ts.num_sites > 0
+        assert len(list(contig.split_regions(ts))) == len(self.regions)
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            dict(msprime_model=msprime.DiscreteTimeWrightFisher()),
+            dict(msprime_change_model=[(10, msprime.DiscreteTimeWrightFisher())]),
+        ],
+    )
+    def test_dtwf_instance(self, kwargs):
+        contig = self.species.get_contig("1", regions=self.regions, mutation_rate=1e-7)
+        engine = stdgrimmsim.get_engine("msprime")
+        args = dict(
+            msprime_model=None,
+            msprime_change_model=None,
+            extended_events=None,
+            msprime_skip_masked=False,
+            kwargs={},
+        )
+        # The ancestry between the regions is only skipped without dtwf.
+        _, _, collapsed = engine._setup_simulation(
+            self.model, contig, self.samples, 1, **args
+        )
+        assert collapsed is not None
+        _, _, collapsed = engine._setup_simulation(
+            self.model, contig, self.samples, 1, **{**args, **kwargs}
+        )
+        assert collapsed is None
@@ -0,0 +1,86 @@
+"""
+Tests for exporting genotypes to compact arrays.
+"""
+
+import json
+import os
+
+import msprime
+import numpy as np
+import pytest
+
+import stdgrimmsim
+
+
+def simulate(num_samples=5, seed=1, **kwargs):
+    ts = msprime.sim_ancestry(
+        {"pop_0": num_samples, "pop_1": 2},
+        demography=msprime.Demography.island_model([1000, 1000], 1e-3),
+        sequence_length=1e5,
+        recombination_rate=1e-8,
+        random_seed=seed,
+    )
+    return msprime.sim_mutations(ts, rate=1e-7, random_seed=seed, **kwargs)
+
+
+class TestWriteGenotypes:
+    @pytest.mark.parametrize("num_samples", [3, 4, 5])
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10000])
+    def test_round_trip(self, tmp_path, num_samples, chunk_size):
+        ts = simulate(num_samples=num_samples)
+        assert ts.num_sites > 10
+        stdgrimmsim.write_genotypes(ts, tmp_path, chunk_size=chunk_size)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path)
+        assert genotypes.num_sites == ts.num_sites
+        assert genotypes.num_samples == ts.num_samples
+        assert genotypes.haplotypes.shape == (
+            ts.num_sites,
+            (ts.num_samples + 7) // 8,
+        )
+        assert isinstance(genotypes.haplotypes, np.memmap)
+        G = ts.genotype_matrix()
+        np.testing.assert_array_equal(genotypes.genotype_matrix(), G > 0)
+        np.testing.assert_array_equal(genotypes.genotype_matrix(3, 5), G[3:5] > 0)
+        np.testing.assert_array_equal(genotypes.positions, ts.sites_position)
+        assert genotypes.positions.dtype == np.int64
+
+    def test_populations(self, tmp_path):
+        ts = simulate()
+        stdgrimmsim.write_genotypes(ts, tmp_path)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path)
+        np.testing.assert_array_equal(
+            genotypes.populations, ts.nodes_population[ts.samples()]
+        )
+        assert genotypes.metadata["population_names"] == ["pop_0", "pop_1"]
+        assert genotypes.metadata["sequence_length"] == ts.sequence_length
+
+    def test_multiallelic(self, tmp_path):
+        ts = simulate(model=msprime.JC69())
+        stdgrimmsim.write_genotypes(ts, tmp_path, chunk_size=3)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path)
+        np.testing.assert_array_equal(
+            genotypes.genotype_matrix(), ts.genotype_matrix() > 0
+        )
+
+    def test_continuous_genome(self, tmp_path):
+        ts = simulate(discrete_genome=False)
+        stdgrimmsim.write_genotypes(ts, tmp_path)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path)
+        assert genotypes.positions.dtype == np.float64
+        np.testing.assert_array_equal(genotypes.positions, ts.sites_position)
+
+    def test_no_sites(self, tmp_path):
+        ts = simulate().delete_sites(np.arange(simulate().num_sites))
+        stdgrimmsim.write_genotypes(ts, tmp_path)
+        genotypes = stdgrimmsim.load_genotypes(tmp_path)
+        assert genotypes.num_sites == 0
+        assert genotypes.genotype_matrix().shape == (0, ts.num_samples)
+
+    def test_provenance(self, tmp_path):
+        stdgrimmsim.write_genotypes(simulate(), tmp_path, provenance={"a": 1})
+        with open(os.path.join(tmp_path, "metadata.json")) as f:
+            assert json.load(f)["provenance"] == {"a": 1}
+
+    def test_bad_chunk_size(self, tmp_path):
+        with pytest.raises(ValueError, match="chunk_size"):
+            stdgrimmsim.write_genotypes(simulate(), tmp_path, chunk_size=0)
@@ -9,6 +9,7 @@ import os.path
 import pathlib
 
 import msprime
+import numpy as np
 import pytest
 
 import stdgrimmsim
@@ -250,3 +251,115 @@ class TestGetChromosomeMap(tests.CacheReadingTest):
             species = gm.species
             chrom = species.genome.chromosomes[0]
             gm.get_chromosome_map(chrom.id)
+
+
+class TestParsedChromosomeMap(tests.CacheWritingTest):
+    """
+    Tests that chromosome maps are parsed once and then memory-mapped.
+    """
+
+    def setup_method(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tarball = pathlib.Path(self.tmp_dir.name) / "genetic_map.tar.gz"
+        tarball.write_bytes(get_genetic_map_tarball())
+        genome = stdgrimmsim.Genome(
+            chromosomes=[
+                stdgrimmsim.Chromosome(
+                    id=f"chr{j}",
+                    length=100000,
+                    recombination_rate=1e-8,
+                    mutation_rate=1e-8,
+                )
+                for j in range(1, 11)
+            ]
+        )
+        species = stdgrimmsim.Species(
+            id="TesSpe",
+            ensembl_id="test_species",
+            name="Test species",
+            common_name="Testy McTestface",
+            genome=genome,
+            separate_sexes=True,
+        )
+        self.gm = stdgrimmsim.GeneticMap(
+            species=species,
+            id="test_map",
+            url=tarball.resolve().as_uri(),
+            sha256=utils.sha256(tarball),
+            file_pattern="prefix_{id}.txt",
+        )
+
+    def teardown_method(self):
+        self.tmp_dir.cleanup()
+
+    def expected_map(self):
+        rm = msprime.RateMap.read_hapmap(
+            self.gm.map_cache_dir / "prefix_chr1.txt", rate_col=2
+        )
+        return msprime.RateMap(
+            position=np.append(rm.position, 100000), rate=np.append(rm.rate, 0)
+        )
+
+    def test_parsed_once(self):
+        self.gm.download()
+        expected = self.expected_map()
+        cm = self.gm.get_chromosome_map("chr1")
+        assert cm == expected
+        parsed_dir = self.gm._parsed_map_dir(
+            self.gm.species.genome.get_chromosome("chr1")
+        )
+        assert (parsed_dir / "position.npy").exists()
+        assert (parsed_dir / "rate.npy").exists()
+        assert (parsed_dir / "sha256").exists()
+        with mock.patch("msprime.RateMap.read_hapmap", autospec=True) as read_hapmap:
+            cm = self.gm.get_chromosome_map("chr1")
+        read_hapmap.assert_not_called()
+        assert cm == expected
+        position, rate = self.gm._read_chromosome_map(
+            self.gm.species.genome.get_chromosome("chr1"), None
+        )
+        assert isinstance(position, np.memmap)
+        assert isinstance(rate, np.memmap)
+
+    def test_checksum_mismatch(self):
+        self.gm.get_chromosome_map("chr1")
+        chrom = self.gm.species.genome.get_chromosome("chr1")
+        sha256_file = self.gm._parsed_map_dir(chrom) / "sha256"
+        sha256_file.write_text("1234 100000")
+        with mock.patch(
+            "msprime.RateMap.read_hapmap", wraps=msprime.RateMap.read_hapmap
+        ) as read_hapmap:
+            cm = self.gm.get_chromosome_map("chr1")
+        read_hapmap.assert_called_once()
+        assert cm == self.expected_map()
+        assert sha256_file.read_text() == f"{self.gm.sha256} 100000"
+
+    @pytest.mark.parametrize(
+        "left, right",
+        [
+            (0, 100000),
+            (0, 60000),
+            (55550, 82571),
+            (60000, 85000),
+            (82571, 100000),
+            (90000, 95000),
+            (None, 70000),
+            (70000, None),
+        ],
+    )
+    def test_slice(self, left, right):
+        expected = self.gm.get_chromosome_map("chr1").slice(left=left, right=right)
+        cm = self.gm.get_chromosome_map("chr1", left=left, right=right)
+        assert cm == expected
+
+    def test_bad_slice(self):
+        with pytest.raises(KeyError, match="Invalid slice"):
+            self.gm.get_chromosome_map("chr1", left=50, right=50)
+        with pytest.raises(KeyError, match="Invalid slice"):
+            self.gm.get_chromosome_map("chr1", left=0, right=200000)
+
+    def test_missing_chromosome(self):
+        with pytest.warns(UserWarning, match="Genetic map not found"):
+            cm = self.gm.get_chromosome_map("chr10", left=100, right=200)
+        expected = msprime.RateMap.uniform(100000, 1e-8).slice(left=100, right=200)
+        assert cm == expected
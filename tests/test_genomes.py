@@ -517,3 +517,99 @@ class TestGeneConversion(object):
             _ = species.get_contig(
                 "chr22", genetic_map="HapMapII_GRCh38", recombination_rate=1e-8
             )
+
+
+class TestAutosomes:
+    def test_excludes_mitogenome(self):
+        genome = stdgrimmsim.get_species("ZweBerg").genome
+        ids = [chrom.id for chrom in genome.autosomes]
+        assert ids == ["1", "2", "3", "4", "5"]
+
+    def test_excludes_sex_chromosomes(self):
+        genome = stdgrimmsim.Genome(
+            chromosomes=[
+                stdgrimmsim.Chromosome(
+                    id=chrom_id,
+                    length=100,
+                    recombination_rate=1e-8,
+                    mutation_rate=1e-8,
+                )
+                for chrom_id in ["1", "X", "chrY", "MT", "2"]
+            ]
+        )
+        assert [chrom.id for chrom in genome.autosomes] == ["1", "2"]
+
+
+class TestContigRegions:
+    species = stdgrimmsim.get_species("ZweBerg")
+    regions = np.array([[1000, 2000], [5000, 8000], [20000, 30000]])
+
+    def test_regions(self):
+        contig = self.species.get_contig("1", regions=self.regions)
+        np.testing.assert_array_equal(contig.regions, self.regions)
+        np.testing.assert_array_equal(contig.inclusion_mask, self.regions)
+        assert contig.coordinates == ("1", 1000, 30000)
+        rm = contig.recombination_map
+        assert np.isnan(rm.get_rate(500))
+        assert rm.get_rate(3000) == 5e-8
+        assert np.isnan(rm.get_rate(30000))
+
+    def test_left_right(self):
+        contig = self.species.get_contig("1", regions=self.regions, left=0, right=6000)
+        assert contig.coordinates == ("1", 0, 6000)
+        np.testing.assert_array_equal(contig.regions, [[1000, 2000], [5000, 6000]])
+
+    def test_inclusion_mask(self):
+        contig = self.species.get_contig(
+            "1", regions=self.regions, inclusion_mask=[[1500, 6000], [25000, 40000]]
+        )
+        np.testing.assert_array_equal(contig.regions, self.regions)
+        np.testing.assert_array_equal(
+            contig.inclusion_mask, [[1500, 2000], [5000, 6000], [25000, 30000]]
+        )
+
+    def test_bed_file(self, tmp_path):
+        bed = tmp_path / "regions.bed"
+        with open(bed, "w") as f:
+            for left, right in self.regions:
+                print(f"1\t{left}\t{right}", file=f)
+            print("2\t0\t100", file=f)
+        contig = self.species.get_contig("1", regions=str(bed))
+        np.testing.assert_array_equal(contig.regions, self.regions)
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match="Cannot use regions"):
+            self.species.get_contig(length=1e4, regions=self.regions)
+        with pytest.raises(ValueError, match="at least one region"):
+            self.species.get_contig("1", regions=[])
+        with pytest.raises(ValueError, match="non-overlapping"):
+            self.species.get_contig("1", regions=[[0, 100], [50, 200]])
+        with pytest.raises(ValueError, match="within"):
+            self.species.get_contig("1", regions=[[0, 100], [50, 30e6]])
+
+    def test_no_regions(self):
+        contig = self.species.get_contig("1", right=1000)
+        assert contig.regions is None
+        ts = msprime.sim_ancestry(2, sequence_length=1000, random_seed=1)
+        with pytest.raises(ValueError, match="no regions"):
+            next(contig.split_regions(ts))
+
+    @pytest.mark.parametrize("trim", [False, True])
+    def test_split_regions(self, trim):
+        contig = self.species.get_contig("1", regions=self.regions)
+        ts = msprime.sim_ancestry(
+            5,
+            population_size=1000,
+            recombination_rate=1e-7,
+            sequence_length=contig.length,
+            random_seed=1,
+        )
+        ts = msprime.sim_mutations(ts, rate=1e-7, random_seed=1)
+        assert ts.num_mutations > ts.num_sites > 0
+        parts = list(contig.split_regions(ts, trim=trim))
+        assert len(parts) == len(self.regions)
+        for part, (left, right) in zip(parts, self.regions):
+            expected = ts.keep_intervals([[left, right]])
+            if trim:
+                expected = expected.trim()
+            part.tables.assert_equals(expected.tables, ignore_provenance=True)
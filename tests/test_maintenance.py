@@ -7,7 +7,11 @@ import json
 import urllib
 import urllib.request
 
+import pytest
+
 import maintenance as maint
+import stdgrimmsim
+from .test_slim_engine import fake_slim  # noqa: F401
 
 
 class MockedResponse:
@@ -96,3 +100,32 @@ class TestEnsemblClient:
             assert mocked_sleep.call_count == 0
             client._sleep_if_needed()
             assert mocked_sleep.call_count == 1
+
+
+@pytest.mark.usefixtures("fake_slim")
+@pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+class TestFitSLiMCostModel:
+    """
+    Tests fitting the SLiM cost model, with a fake SLiM executable that
+    outputs a tree sequence of length 10000 made with msprime.
+    """
+
+    def test_benchmark(self):
+        costs, runtimes, memories = maint.benchmark_slim(
+            population_size=1000, lengths=[10000], scaling_factors=[1, 2]
+        )
+        assert [cost.scaling_factor for cost in costs] == [1, 2]
+        assert all(runtime > 0 for runtime in runtimes)
+        # The peak memory use reported by the fake SLiM's telemetry.
+        assert memories == [12.5 * 2**20] * 2
+
+    def test_fit(self, tmp_path):
+        output = tmp_path / "cost_model.json"
+        model = maint.fit_slim_cost_model(
+            output, population_size=1000, lengths=[10000], scaling_factors=[1, 2]
+        )
+        with open(output) as f:
+            loaded = stdgrimmsim.SLiMCostModel(**json.load(f))
+        assert loaded == model
+        assert len(loaded.runtime_coefficients) == 4
+        assert len(loaded.memory_coefficients) == 3
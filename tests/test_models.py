@@ -9,6 +9,8 @@ import csv
 import pathlib
 import os
 import fractions
+import pickle
+from unittest import mock
 
 import numpy as np
 import msprime
@@ -377,6 +379,91 @@ class TestPopulationSampling:
             assert sum(allow_sample_status[num_sampling:]) == 0
 
 
+class TestDeferredModel:
+    def make_model(self):
+        populations = [
+            stdgrimmsim.Population("A", "Test pop. A"),
+            stdgrimmsim.Population("qc_B", "Test pop. B", sampling_time=10),
+            stdgrimmsim.Population("C", "Test pop. C", sampling_time=None),
+        ]
+        return models.DemographicModel(
+            id="x",
+            description="y",
+            long_description="z",
+            populations=populations,
+            population_configurations=[
+                msprime.PopulationConfiguration(initial_size=1),
+                msprime.PopulationConfiguration(initial_size=2),
+                msprime.PopulationConfiguration(initial_size=3),
+            ],
+            migration_matrix=[[0, 0.1, 0], [0.1, 0, 0], [0, 0, 0]],
+        )
+
+    def test_metadata_without_building(self):
+        model = self.make_model()
+        with mock.patch("msprime.Demography.from_old_style") as from_old_style:
+            assert model.id == "x"
+            assert model.num_populations == 3
+            assert model.num_sampling_populations == 2
+            metadata = model.population_metadata
+            from_old_style.assert_not_called()
+        assert [pop.id for pop in metadata] == ["A", "pop_1", "C"]
+        assert [pop.allow_samples for pop in metadata] == [True, True, False]
+        assert [pop.sampling_time for pop in metadata] == [0, 10, None]
+
+    def test_metadata_matches_model(self):
+        for model in stdgrimmsim.all_demographic_models():
+            metadata = model.population_metadata
+            assert len(metadata) == model.num_populations
+            for pop, msp_pop in zip(metadata, model.populations):
+                assert pop.id == msp_pop.name
+                assert pop.description == msp_pop.description
+                assert pop.allow_samples == msp_pop.allow_samples
+                if pop.allow_samples:
+                    assert pop.sampling_time == (msp_pop.default_sampling_time or 0)
+
+    def test_built_once(self):
+        model = self.make_model()
+        with mock.patch(
+            "msprime.Demography.from_old_style",
+            wraps=msprime.Demography.from_old_style,
+        ) as from_old_style:
+            demography = model.model
+            assert model.model is demography
+            assert len(model.populations) == 3
+            from_old_style.assert_called_once()
+        assert [pop.initial_size for pop in demography.populations] == [1, 2, 3]
+        assert demography.migration_matrix[0, 1] == 0.1
+
+    def test_set_model(self):
+        model = self.make_model()
+        demography = msprime.Demography.isolated_model([1, 1])
+        for pop in demography.populations:
+            pop.allow_samples = True
+        model.model = demography
+        assert model.model is demography
+        assert model.num_populations == 2
+        assert [pop.id for pop in model.population_metadata] == ["pop_0", "pop_1"]
+
+    def test_generic_models(self):
+        # The populations of models built from an msprime Demography can all
+        # be sampled, at time 0 unless otherwise specified.
+        model = models.PiecewiseConstantSize(1000)
+        assert model.num_populations == 1
+        assert model.num_sampling_populations == 1
+        assert [pop.sampling_time for pop in model.population_metadata] == [0]
+        model = models.IsolationWithMigration(100, 200, 300, 50, 0, 0)
+        assert model.num_populations == 3
+        assert model.num_sampling_populations == 3
+        # The ancestral population is sampled at the split time by default.
+        assert [pop.sampling_time for pop in model.population_metadata] == [0, 0, 50]
+
+    def test_pickle_unbuilt(self):
+        model = self.make_model()
+        copied = pickle.loads(pickle.dumps(model))
+        assert copied.model == model.model
+
+
 class TestBrowningWarning:
     @pytest.mark.skip(reason="Catalog has no Browning model alias")
     def test_browning_produces_warning(self):
@@ -0,0 +1,114 @@
+"""
+Tests for the training data pipeline.
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+import stdgrimmsim
+
+
+def num_sites(ts):
+    return np.array([ts.num_sites])
+
+
+class TestTrainingExamples:
+    kwargs = dict(contig={"length": 1e4}, seed=12)
+
+    def test_basic(self):
+        examples = list(stdgrimmsim.training_examples("ZweBerg", 3, 4, **self.kwargs))
+        assert [ex.index for ex in examples] == [0, 1, 2]
+        for ex in examples:
+            assert ex.features.shape == (9,)
+            assert set(ex.params.keys()) == set(stdgrimmsim.PRIOR_PARAMETERS)
+        assert examples[0].params != examples[1].params
+        assert examples[0].seed != examples[1].seed
+
+    def test_reproducible_and_worker_independent(self):
+        examples1 = list(
+            stdgrimmsim.training_examples("ZweBerg", 4, 3, workers=1, **self.kwargs)
+        )
+        examples2 = list(
+            stdgrimmsim.training_examples(
+                "ZweBerg", 4, 3, workers=2, max_pending=3, **self.kwargs
+            )
+        )
+        assert [ex.index for ex in examples2] == [0, 1, 2, 3]
+        for ex1, ex2 in zip(examples1, examples2):
+            assert ex1.seed == ex2.seed
+            assert ex1.params == ex2.params
+            np.testing.assert_array_equal(ex1.features, ex2.features)
+
+    def test_params_follow_prior(self):
+        prior = stdgrimmsim.get_prior("ZweBerg")
+        example = next(
+            stdgrimmsim.training_examples(
+                "ZweBerg", 1, 2, prior=prior, feature=num_sites, **self.kwargs
+            )
+        )
+        params = example.params
+        assert params["population_size"] > 0
+        assert params["mutation_rate"] > 0
+        # Check that the simulation actually uses the drawn parameters.
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = stdgrimmsim.PiecewiseConstantSize(params["population_size"])
+        contig = species.get_contig(
+            length=1e4,
+            mutation_rate=params["mutation_rate"],
+            recombination_rate=params["recombination_rate"],
+        )
+        ts = stdgrimmsim.get_engine("msprime").simulate(
+            model, contig, {"pop_0": 2}, seed=example.seed
+        )
+        assert example.features[0] == ts.num_sites
+
+    def test_custom_feature(self):
+        examples = stdgrimmsim.training_examples(
+            "ZweBerg", 2, 2, feature=num_sites, **self.kwargs
+        )
+        for ex in examples:
+            assert ex.features.shape == (1,)
+
+    def test_rates_from_prior_only(self):
+        with pytest.raises(ValueError, match="mutation_rate"):
+            stdgrimmsim.training_examples(
+                "ZweBerg", 1, 2, contig={"length": 100, "mutation_rate": 1e-8}
+            )
+
+    def test_bad_num_examples(self):
+        with pytest.raises(ValueError, match="num_examples"):
+            stdgrimmsim.training_examples("ZweBerg", -1, 2)
+
+
+class TestWriteTrainingShards:
+    def test_shards(self, tmp_path):
+        shards = stdgrimmsim.write_training_shards(
+            tmp_path, "ZweBerg", 5, 3, shard_size=2, contig={"length": 1e4}, seed=3
+        )
+        assert len(shards) == 3
+        examples = list(
+            stdgrimmsim.training_examples(
+                "ZweBerg", 5, 3, contig={"length": 1e4}, seed=3
+            )
+        )
+        all_index = []
+        for features_path, params_path in shards:
+            data = np.load(features_path)
+            with open(params_path) as f:
+                rows = list(csv.DictReader(f, delimiter="\t"))
+            assert len(rows) == len(data["index"]) == len(data["features"])
+            for index, features, row in zip(data["index"], data["features"], rows):
+                assert int(row["index"]) == index
+                ex = examples[index]
+                assert int(row["seed"]) == ex.seed
+                for key in stdgrimmsim.PRIOR_PARAMETERS:
+                    assert float(row[key]) == ex.params[key]
+                np.testing.assert_array_equal(features, ex.features)
+            all_index.extend(data["index"])
+        assert all_index == list(range(5))
+
+    def test_bad_shard_size(self, tmp_path):
+        with pytest.raises(ValueError, match="shard_size"):
+            stdgrimmsim.write_training_shards(tmp_path, "ZweBerg", 1, 2, shard_size=0)
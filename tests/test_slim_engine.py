@@ -2,7 +2,9 @@
 Tests for SLiM simulation engine.
 """
 
+import gzip
 import os
+import json
 import io
 import math
 from unittest import mock
@@ -11,9 +13,15 @@ from numpy.testing import assert_array_equal
 import collections
 import re
 import logging
+import warnings
+import asyncio
+import subprocess
+import sys
+import threading
 
 import pytest
 import tskit
+import pyslim
 import msprime
 
 import stdgrimmsim
@@ -439,6 +447,34 @@ class TestCLI:
         out, _ = self.docmd("--slim-script ZweBerg -d BlackForest_1D12 BlackForest:5")
         assert "community.registerLateEvent" in out
 
+    def test_auto_scaling_factor(self, fake_slim, tmp_path):
+        cost_model = tmp_path / "cost_model.json"
+        with open(cost_model, "w") as f:
+            json.dump(
+                {
+                    "runtime_coefficients": [0.5, 1e-6, 2e-7, 1e-6],
+                    "memory_coefficients": [50e6, 2e3, 10],
+                },
+                f,
+            )
+        out, _ = self.docmd(
+            "--slim-script --slim-scaling-factor auto --slim-max-memory 1T "
+            f"--slim-cost-model {cost_model} "
+            "ZweBerg -d BlackForest_1D12 BlackForest:5"
+        )
+        assert 'defineConstant("Q", 1);' in out
+        with pytest.raises(ValueError, match="No scaling factor"):
+            self.docmd(
+                "--slim-script --slim-scaling-factor auto --slim-max-memory 1K "
+                f"--slim-cost-model {cost_model} "
+                "ZweBerg -d BlackForest_1D12 BlackForest:5"
+            )
+        with pytest.raises(ValueError, match="requires a slim_cost_model"):
+            self.docmd(
+                "--slim-script --slim-scaling-factor auto --slim-max-memory 1T "
+                "ZweBerg -d BlackForest_1D12 BlackForest:5"
+            )
+
     @pytest.mark.filterwarnings("ignore::stdgrimmsim.SLiMScalingFactorWarning")
     @pytest.mark.filterwarnings("ignore:.*has only.*individuals alive")
     @pytest.mark.usefixtures("tmp_path")
@@ -576,6 +612,44 @@ class TestCLI:
         ts = tskit.load(fname)
         self.verify_slim_sim(ts, num_samples=10)
 
+    def test_dfe_bed_file_chromosomes(self, tmp_path, fake_slim, monkeypatch):
+        # Only the lines of the simulated chromosome are used.
+        species = stdgrimmsim.get_species("ZweBerg")
+        dfe = stdgrimmsim.DFE(
+            id="bed_test",
+            description="bed test",
+            long_description="a single deleterious mutation type",
+            mutation_types=[
+                stdgrimmsim.MutationType(
+                    distribution_type="f", distribution_args=[-0.01]
+                )
+            ],
+        )
+        monkeypatch.setattr(species, "dfes", species.dfes + [dfe])
+        lines = [
+            "\t".join(["1", "100000", "145000"]),
+            "\t".join(["2", "0", "1000000"]),
+            "\t".join(["1", "150000", "160000"]),
+        ]
+        with gzip.open(tmp_path / "ex.bed.gz", "wt") as bedfile:
+            for lin in lines:
+                bedfile.write(lin + "\n")
+        cmd = (
+            "-q -e slim --slim-script --slim-scaling-factor 20 "
+            "ZweBerg -c 1 --right 200000 --dfe bed_test "
+            f"--dfe-bed-file {tmp_path / 'ex.bed.gz'} pop_0:5"
+        ).split()
+        out, _ = capture_output(stdgrimmsim.cli.stdgrimmsim_main, cmd)
+        script = "".join(out.split())
+        # The lines of chromosome 2, which cover the whole contig, are not used.
+        assert (
+            "initializeGenomicElement(1,c(100000,150000),c(144999,159999));" in script
+        )
+        assert (
+            "initializeGenomicElement(0,c(0,145000,160000),c(99999,149999,199999));"
+            in script
+        )
+
     @pytest.mark.filterwarnings("ignore::stdgrimmsim.SLiMScalingFactorWarning")
     @pytest.mark.usefixtures("tmp_path")
     def test_chromosomal_segment(self, tmp_path):
@@ -3385,3 +3459,997 @@ class TestSpeciesProperties:
         contig2 = stdgrimmsim.Contig.basic_contig(length=1000, ploidy=2)
         ts = engine.simulate(model, contig2, samples={"pop_0": 3}, seed=7)
         assert ts.metadata["SLiM"]["separate_sexes"] is False
+
+
+class TestMaxSlimMutationId:
+    def max_id(self, ts):
+        max_id = -1
+        for mut in ts.mutations():
+            for d in mut.derived_state.split(","):
+                max_id = max(max_id, int(d))
+        return max_id
+
+    def test_no_mutations(self):
+        ts = msprime.sim_ancestry(5, sequence_length=100, random_seed=1)
+        assert stdgrimmsim.slim_engine._max_slim_mutation_id(ts.tables) == -1
+
+    def test_stacked(self):
+        ts = msprime.sim_ancestry(
+            10,
+            population_size=1e4,
+            sequence_length=1e5,
+            recombination_rate=1e-8,
+            random_seed=1,
+        )
+        for mut_type, next_id in enumerate([0, 95, 100000]):
+            ts = msprime.sim_mutations(
+                ts,
+                rate=1e-7,
+                model=msprime.SLiMMutationModel(type=mut_type, next_id=next_id),
+                keep=True,
+                random_seed=mut_type + 1,
+            )
+            assert ts.num_mutations > 0
+            max_id = stdgrimmsim.slim_engine._max_slim_mutation_id(ts.tables)
+            assert max_id == self.max_id(ts)
+        assert any("," in mut.derived_state for mut in ts.mutations())
+
+    def test_empty_derived_states(self):
+        tables = tskit.TableCollection(sequence_length=10)
+        tables.sites.add_row(position=1, ancestral_state="")
+        for derived_state in ["", "12,7", "", "3", "1034", ""]:
+            tables.mutations.add_row(site=0, node=0, derived_state=derived_state)
+        assert stdgrimmsim.slim_engine._max_slim_mutation_id(tables) == 1034
+
+
+class TestAddNeutralMutations:
+    def slim_types(self, ts):
+        # The SLiM mutation type of each SLiM mutation id in ts.
+        types = {}
+        for mut in ts.mutations():
+            slim_ids = [int(d) for d in mut.derived_state.split(",")]
+            assert len(slim_ids) == len(mut.metadata["mutation_list"])
+            for slim_id, md in zip(slim_ids, mut.metadata["mutation_list"]):
+                assert types.setdefault(slim_id, md["mutation_type"]) == (
+                    md["mutation_type"]
+                )
+        return types
+
+    def test_types_by_interval(self):
+        ts = msprime.sim_ancestry(
+            20,
+            population_size=1e4,
+            sequence_length=1e5,
+            recombination_rate=1e-8,
+            random_seed=1,
+        )
+        ts = pyslim.annotate(ts, model_type="nonWF", tick=1)
+        ts = msprime.sim_mutations(
+            ts, rate=1e-8, model=msprime.SLiMMutationModel(type=0), random_seed=2
+        )
+        breaks = np.array([0, 2e4, 5e4, 1e5])
+        labels = np.array([0, -1, 1])
+        mutation_types = [([1, 2], [2e-8, 1e-8]), ([3], [3e-8])]
+        next_id = stdgrimmsim.slim_engine._max_slim_mutation_id(ts.tables) + 1
+        new_ts, new_next_id = stdgrimmsim.slim_engine._add_neutral_mutations(
+            ts, breaks, labels, mutation_types, next_id, seed=5, end_time=1000
+        )
+        assert new_next_id == next_id + new_ts.num_mutations - ts.num_mutations
+        types = self.slim_types(new_ts)
+        assert max(types) == new_next_id - 1
+        positions = new_ts.sites_position[new_ts.mutations_site]
+        new_types = set()
+        for mut in new_ts.mutations():
+            slim_id = int(mut.derived_state.split(",")[-1])
+            if slim_id < next_id:
+                continue
+            assert mut.time < 1000
+            label = labels[np.searchsorted(breaks, positions[mut.id], "right") - 1]
+            assert types[slim_id] in mutation_types[label][0]
+            new_types.add(types[slim_id])
+        assert new_types == {1, 2, 3}
+
+    def test_no_neutral_types(self):
+        ts = msprime.sim_ancestry(5, sequence_length=100, random_seed=1)
+        new_ts, next_id = stdgrimmsim.slim_engine._add_neutral_mutations(
+            ts, np.array([0, 100]), np.array([0]), [([], [])], 7, seed=1
+        )
+        assert new_ts is ts
+        assert next_id == 7
+
+    def test_recap_and_rescale(self):
+        # A SLiM-like tree sequence made with msprime, so that SLiM is not needed.
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = stdgrimmsim.PiecewiseConstantSize(1000)
+        contig = species.get_contig(length=100000, mutation_rate=1e-7)
+        dfe = stdgrimmsim.DFE(
+            id="test",
+            description="",
+            long_description="",
+            mutation_types=[
+                stdgrimmsim.MutationType(),
+                stdgrimmsim.MutationType(
+                    distribution_type="f", distribution_args=[-0.01]
+                ),
+                stdgrimmsim.MutationType(),
+            ],
+            proportions=[0.3, 0.3, 0.4],
+        )
+        contig.add_dfe(np.array([[10000, 60000]]), dfe)
+        ts = msprime.sim_ancestry(
+            50,
+            population_size=1000,
+            sequence_length=contig.length,
+            recombination_rate=1e-8,
+            model="dtwf",
+            end_time=200,
+            random_seed=3,
+        )
+        tables = pyslim.annotate(ts, model_type="WF", tick=200).dump_tables()
+        tables.individuals.flags |= pyslim.INDIVIDUAL_REMEMBERED
+        ts = stdgrimmsim.slim_engine._add_dfes_to_metadata(
+            tables.tree_sequence(), contig
+        )
+        engine = stdgrimmsim.get_engine("slim")
+        ts = engine.recap_and_rescale(
+            ts, model, contig, {"pop_0": 10}, seed=4, keep_mutation_ids_as_alleles=True
+        )
+        types = self.slim_types(ts)
+        # Neutral types are 0 (neutral DFE), 1 and 3 ("test" DFE) and
+        # 4 (recapitation); type 2 is deleterious and was never simulated.
+        assert set(types.values()) == {0, 1, 3, 4}
+        for mut in ts.mutations():
+            mutation_type = types[int(mut.derived_state.split(",")[-1])]
+            assert (mutation_type == 4) == (mut.time >= 200)
+            if mutation_type != 4:
+                in_dfe = 10000 <= ts.site(mut.site).position < 60000
+                assert in_dfe == (mutation_type in (1, 3))
+
+
+class TestScriptCache:
+    species = stdgrimmsim.get_species("ZweBerg")
+    model = stdgrimmsim.PiecewiseConstantSize(100)
+    samples = {"pop_0": 5}
+
+    @pytest.fixture(autouse=True)
+    def script_cache(self):
+        stdgrimmsim.slim_engine._script_cache.clear()
+        yield stdgrimmsim.slim_engine._script_cache
+        stdgrimmsim.slim_engine._script_cache.clear()
+
+    def run_slim_calls(self, simulations):
+        engine = stdgrimmsim.get_engine("slim")
+        with mock.patch(
+            "stdgrimmsim.slim_engine.slim_makescript",
+            wraps=stdgrimmsim.slim_engine.slim_makescript,
+        ) as makescript, mock.patch.object(
+            stdgrimmsim.slim_engine._SLiMEngine, "_run_slim"
+        ) as run_slim:
+            for contig, kwargs in simulations:
+                engine.simulate(
+                    self.model, contig, self.samples, dry_run=True, **kwargs
+                )
+        return makescript.call_count, run_slim.call_args_list
+
+    def test_script_reused(self):
+        contig = self.species.get_contig(length=1000)
+        num_scripts, calls = self.run_slim_calls(
+            [
+                (contig, dict(seed=1)),
+                (contig, dict(seed=2, slim_burn_in=5)),
+                (self.species.get_contig(length=1000), dict(seed=3)),
+            ]
+        )
+        assert num_scripts == 1
+        script_filename = calls[0].args[0]
+        assert all(call.args[0] == script_filename for call in calls)
+        assert [call.kwargs["seed"] for call in calls] == [1, 2, 3]
+        defines = [call.kwargs["defines"] for call in calls]
+        assert [d["burn_in"] for d in defines] == [10, 5, 10]
+        assert len({d["trees_file"] for d in defines}) == 3
+        with open(script_filename) as f:
+            script = f.read()
+        assert 'if (!exists("burn_in"))' in script
+        assert 'if (!exists("trees_file"))' in script
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.SLiMScalingFactorWarning")
+    def test_script_not_reused(self):
+        contig = self.species.get_contig(length=1000)
+        num_scripts, calls = self.run_slim_calls(
+            [
+                (contig, dict(seed=1)),
+                (contig, dict(seed=1, slim_scaling_factor=2)),
+                (self.species.get_contig(length=2000), dict(seed=1)),
+                (
+                    self.species.get_contig(length=1000, mutation_rate=1e-9),
+                    dict(seed=1),
+                ),
+            ]
+        )
+        assert num_scripts == 4
+        assert len({call.args[0] for call in calls}) == 4
+
+    def test_warnings_replayed(self, script_cache):
+        def make_script(script_file):
+            warnings.warn(stdgrimmsim.SLiMOddSampleWarning("odd"))
+            print("script", file=script_file)
+            return "epoch"
+
+        make_script = mock.Mock(wraps=make_script)
+        for _ in range(2):
+            with pytest.warns(stdgrimmsim.SLiMOddSampleWarning, match="odd"):
+                script_filename, epoch = script_cache.get("key", make_script)
+            assert epoch == "epoch"
+        assert make_script.call_count == 1
+        with open(script_filename) as f:
+            assert f.read() == "script\n"
+
+    def test_eviction(self, script_cache):
+        script_cache.max_scripts = 2
+        filenames = [
+            script_cache.get(key, lambda f: None)[0] for key in ["a", "b", "a", "c"]
+        ]
+        assert not os.path.exists(filenames[1])
+        assert os.path.exists(filenames[0])
+        assert os.path.exists(filenames[3])
+        script_cache.max_scripts = 32
+
+    @mock.patch("stdgrimmsim.slim_engine._SLiMEngine.get_version", return_value="64.64")
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_defines(self, _mocked_get_version):
+        engine = stdgrimmsim.get_engine("slim")
+        with mock.patch("subprocess.Popen", autospec=True) as mocked_popen:
+            proc = mocked_popen.return_value.__enter__.return_value
+            proc.returncode = 0
+            engine._run_slim(
+                "script.slim",
+                seed=1,
+                defines={"burn_in": 2.5, "trees_file": "it's.trees"},
+            )
+        cmd = mocked_popen.call_args[0][0]
+        assert cmd[1:] == [
+            "-s",
+            "1",
+            "-d",
+            "burn_in=2.5",
+            "-d",
+            "trees_file='it\\'s.trees'",
+            "script.slim",
+        ]
+
+
+_FAKE_SLIM = """\
+import os
+import shutil
+import sys
+import time
+
+args = sys.argv[1:]
+if args == ["-v"]:
+    print("SLiM version 4.3, built Jan  1 2024")
+    sys.exit(0)
+defines = {}
+for flag, value in zip(args, args[1:]):
+    if flag == "-d":
+        name, value = value.split("=", 1)
+        defines[name] = value
+checkpoint = defines.get("checkpoint", "'run'")[1:-1]
+with open(os.environ["FAKE_SLIM_LOG"], "a") as f:
+    print("start", time.time(), checkpoint, file=f)
+print("dbg(self.source); starting")
+print("WARNING: something odd", flush=True)
+time.sleep(float(os.environ.get("FAKE_SLIM_SLEEP", "0")))
+if "FAKE_SLIM_FAIL" in os.environ:
+    print("ERROR: it failed", file=sys.stderr)
+    sys.exit(1)
+if checkpoint == "save":
+    output_file = defines["checkpoint_file"]
+else:
+    if checkpoint == "load":
+        assert os.path.exists(defines["checkpoint_file"][1:-1])
+    elif checkpoint == "seed":
+        import tskit
+
+        initial_state = tskit.load(defines["checkpoint_file"][1:-1])
+        assert initial_state.metadata["SLiM"]["tick"] == 1
+        assert float(defines["burn_in"]) == 0
+    output_file = defines["trees_file"]
+shutil.copy(os.environ["FAKE_SLIM_TREES"], output_file[1:-1])
+if "telemetry_file" in defines:
+    with open(defines["telemetry_file"][1:-1], "w") as f:
+        print("tick,elapsed,size_pop_0,num_mutations,memory_mb", file=f)
+        print("1,0.5,1000,0,10.5", file=f)
+        print("11,1.5,1000,4,12.25", file=f)
+        print("15,1.75,1000,5,12.5", file=f)
+with open(os.environ["FAKE_SLIM_LOG"], "a") as f:
+    print("end", time.time(), checkpoint, file=f)
+"""
+
+
+@pytest.fixture
+def fake_slim(tmp_path, monkeypatch):
+    """
+    Sets the SLiM executable to a fake, which outputs a tree sequence made
+    with msprime, and returns the file that it logs its runs to.
+    """
+    slim_path = tmp_path / "slim"
+    with open(slim_path, "w") as f:
+        print(f"#!{sys.executable}", file=f)
+        f.write(_FAKE_SLIM)
+    os.chmod(slim_path, 0o755)
+    ts = msprime.sim_ancestry(
+        50,
+        population_size=1000,
+        sequence_length=10000,
+        recombination_rate=1e-8,
+        model="dtwf",
+        end_time=200,
+        random_seed=3,
+    )
+    tables = pyslim.annotate(ts, model_type="WF", tick=200).dump_tables()
+    tables.individuals.flags |= pyslim.INDIVIDUAL_REMEMBERED
+    tables.dump(tmp_path / "slim.trees")
+    monkeypatch.setenv("SLIM", str(slim_path))
+    monkeypatch.setenv("FAKE_SLIM_TREES", str(tmp_path / "slim.trees"))
+    monkeypatch.setenv("FAKE_SLIM_LOG", str(tmp_path / "slim.log"))
+    stdgrimmsim.slim_engine._script_cache.clear()
+    yield tmp_path / "slim.log"
+    stdgrimmsim.slim_engine._script_cache.clear()
+
+
+def fake_slim_simulation(seed, **kwargs):
+    species = stdgrimmsim.get_species("ZweBerg")
+    contig = species.get_contig(length=10000, mutation_rate=1e-7)
+    return dict(
+        demographic_model=stdgrimmsim.PiecewiseConstantSize(1000),
+        contig=contig,
+        samples={"pop_0": 10},
+        seed=seed,
+        **kwargs,
+    )
+
+
+class TestSLiMRunner:
+    """
+    Tests for running SLiM asynchronously, using a fake SLiM executable that
+    outputs a tree sequence made with msprime.
+    """
+
+    def max_running(self, log):
+        with open(log) as f:
+            events = sorted((float(t), e == "start") for e, t, _ in map(str.split, f))
+        running = max_running = 0
+        for _, is_start in events:
+            running += 1 if is_start else -1
+            max_running = max(running, max_running)
+        return max_running
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_run(self, fake_slim, monkeypatch):
+        monkeypatch.setenv("FAKE_SLIM_SLEEP", "0.5")
+        runner = stdgrimmsim.SLiMRunner(max_concurrent=2)
+        ts_list = runner.run([fake_slim_simulation(seed) for seed in range(1, 6)])
+        assert len(ts_list) == 5
+        for ts in ts_list:
+            # All individuals in the fake SLiM output are remembered.
+            assert ts.num_samples == 100
+            assert ts.num_mutations > 0
+        assert self.max_running(fake_slim) == 2
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_same_as_simulate(self, fake_slim):
+        engine = stdgrimmsim.get_engine("slim")
+        ts1 = engine.simulate(**fake_slim_simulation(42))
+
+        async def main():
+            runner = stdgrimmsim.SLiMRunner()
+            task = runner.submit(**fake_slim_simulation(42))
+            assert isinstance(task, asyncio.Task)
+            return await task
+
+        ts2 = asyncio.run(main())
+        ts1.tables.assert_equals(ts2.tables, ignore_provenance=True)
+
+    def test_output_streamed(self, fake_slim, caplog):
+        engine = stdgrimmsim.get_engine("slim")
+        runner = stdgrimmsim.SLiMRunner()
+        for run in [
+            lambda sim: engine.simulate(**sim),
+            lambda sim: runner.run([sim]),
+        ]:
+            caplog.clear()
+            with caplog.at_level(logging.DEBUG, logger="stdgrimmsim.slim_engine"):
+                with pytest.warns(
+                    stdgrimmsim.UnspecifiedSLiMWarning, match="something odd"
+                ):
+                    run(fake_slim_simulation(1))
+            assert "starting" in caplog.messages
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_error(self, fake_slim, monkeypatch, caplog):
+        monkeypatch.setenv("FAKE_SLIM_FAIL", "1")
+        engine = stdgrimmsim.get_engine("slim")
+        runner = stdgrimmsim.SLiMRunner()
+        for run in [
+            lambda sim: engine.simulate(**sim),
+            lambda sim: runner.run([sim]),
+        ]:
+            caplog.clear()
+            with pytest.raises(stdgrimmsim.SLiMException, match="it failed"):
+                run(fake_slim_simulation(1))
+            assert "it failed" in caplog.messages
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_version_outside_event_loop(self, fake_slim, monkeypatch):
+        # SLiM is only run to find its version until the version is known,
+        # and not in the event loop's thread.
+        in_main_thread = []
+        check_output = subprocess.check_output
+
+        def recording_check_output(*args, **kwargs):
+            in_main_thread.append(threading.current_thread() is threading.main_thread())
+            return check_output(*args, **kwargs)
+
+        monkeypatch.setattr(subprocess, "check_output", recording_check_output)
+        stdgrimmsim.slim_engine._slim_version.cache_clear()
+        runner = stdgrimmsim.SLiMRunner(max_concurrent=2)
+        ts_list = runner.run([fake_slim_simulation(seed) for seed in range(1, 4)])
+        assert len(ts_list) == 3
+        assert len(in_main_thread) > 0
+        assert not any(in_main_thread)
+        num_calls = len(in_main_thread)
+        runner.run([fake_slim_simulation(4)])
+        engine = stdgrimmsim.get_engine("slim")
+        assert engine.get_version() == "4.3"
+        engine.simulate(**fake_slim_simulation(5))
+        assert len(in_main_thread) == num_calls
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_cancel(self, fake_slim, monkeypatch):
+        monkeypatch.setenv("FAKE_SLIM_SLEEP", "60")
+
+        async def main():
+            runner = stdgrimmsim.SLiMRunner()
+            task = runner.submit(**fake_slim_simulation(1))
+            while not os.path.exists(fake_slim):
+                await asyncio.sleep(0.01)
+            start = asyncio.get_running_loop().time()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The SLiM process was killed, rather than waited for.
+            assert asyncio.get_running_loop().time() - start < 30
+
+        asyncio.run(main())
+        with open(fake_slim) as f:
+            assert [line.split()[0] for line in f] == ["start"]
+
+    def test_bad_max_concurrent(self):
+        with pytest.raises(ValueError, match="max_concurrent"):
+            stdgrimmsim.SLiMRunner(max_concurrent=0)
+
+
+@pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+class TestScratchDir:
+    @pytest.fixture(autouse=True)
+    def scratch_dir(self, tmp_path):
+        saved_scratch_dir = stdgrimmsim.get_scratch_dir()
+        stdgrimmsim.set_scratch_dir(tmp_path / "scratch")
+        yield tmp_path / "scratch"
+        stdgrimmsim.set_scratch_dir(saved_scratch_dir)
+
+    def scratch_files(self, scratch_dir):
+        # Only the cached scripts are kept once a simulation has finished.
+        names = os.listdir(scratch_dir)
+        assert len(names) == 1
+        assert names[0].startswith("stdgrimmsim_scripts_")
+        return os.listdir(scratch_dir / names[0])
+
+    def test_scratch_dir_used(self, fake_slim, scratch_dir, caplog):
+        engine = stdgrimmsim.get_engine("slim")
+        with caplog.at_level(logging.INFO, logger="stdgrimmsim.slim_engine"):
+            ts = engine.simulate(**fake_slim_simulation(1))
+        assert ts.num_samples == 100
+        assert len(self.scratch_files(scratch_dir)) == 1
+        messages = [m for m in caplog.messages if "scratch files" in m]
+        assert len(messages) == 1
+        assert str(scratch_dir) in messages[0]
+
+    def test_cleanup_on_failure(self, fake_slim, scratch_dir, monkeypatch):
+        monkeypatch.setenv("FAKE_SLIM_FAIL", "1")
+        engine = stdgrimmsim.get_engine("slim")
+        with pytest.raises(stdgrimmsim.SLiMException):
+            engine.simulate(**fake_slim_simulation(1))
+        assert len(self.scratch_files(scratch_dir)) == 1
+
+    def test_cleanup_on_cancel(self, fake_slim, scratch_dir, monkeypatch):
+        monkeypatch.setenv("FAKE_SLIM_SLEEP", "60")
+
+        async def main():
+            runner = stdgrimmsim.SLiMRunner()
+            task = runner.submit(**fake_slim_simulation(1))
+            while not os.path.exists(fake_slim):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert len(self.scratch_files(scratch_dir)) == 1
+
+
+@pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+class TestTelemetry:
+    def test_telemetry(self, fake_slim):
+        engine = stdgrimmsim.get_engine("slim")
+        ts = engine.simulate(**fake_slim_simulation(1, slim_telemetry_interval=10))
+        telemetry = stdgrimmsim.get_slim_telemetry(ts)
+        assert isinstance(telemetry, np.recarray)
+        assert telemetry.dtype.names == (
+            "tick",
+            "elapsed",
+            "wall_time",
+            "size_pop_0",
+            "num_mutations",
+            "memory_mb",
+        )
+        np.testing.assert_array_equal(telemetry.tick, [1, 11, 15])
+        np.testing.assert_array_equal(telemetry.wall_time, [0.5, 1.0, 0.25])
+        np.testing.assert_array_equal(telemetry.size_pop_0, [1000] * 3)
+        np.testing.assert_array_equal(telemetry.num_mutations, [0, 4, 5])
+        np.testing.assert_array_equal(telemetry.memory_mb, [10.5, 12.25, 12.5])
+        assert telemetry.tick.dtype == np.int64
+
+    def test_telemetry_saved(self, fake_slim, tmp_path):
+        engine = stdgrimmsim.get_engine("slim")
+        ts = engine.simulate(**fake_slim_simulation(1, slim_telemetry_interval=10))
+        ts.dump(tmp_path / "out.trees")
+        telemetry = stdgrimmsim.get_slim_telemetry(tskit.load(tmp_path / "out.trees"))
+        np.testing.assert_array_equal(
+            telemetry, stdgrimmsim.get_slim_telemetry(ts)
+        )
+
+    def test_no_telemetry(self, fake_slim):
+        engine = stdgrimmsim.get_engine("slim")
+        ts = engine.simulate(**fake_slim_simulation(1))
+        assert stdgrimmsim.get_slim_telemetry(ts) is None
+        ts = msprime.sim_ancestry(2, random_seed=1)
+        assert stdgrimmsim.get_slim_telemetry(ts) is None
+
+    def test_bad_interval(self):
+        engine = stdgrimmsim.get_engine("slim")
+        with pytest.raises(ValueError, match="slim_telemetry_interval"):
+            engine.simulate(**fake_slim_simulation(1, slim_telemetry_interval=0))
+
+    def test_script(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        contig = species.get_contig(length=1000)
+        model = stdgrimmsim.PiecewiseConstantSize(100)
+        for interval in [None, 25]:
+            out = io.StringIO()
+            with mock.patch("sys.stdout", new=out):
+                stdgrimmsim.get_engine("slim").simulate(
+                    model,
+                    contig,
+                    {"pop_0": 5},
+                    slim_script=True,
+                    slim_telemetry_interval=interval,
+                )
+            script = out.getvalue()
+            if interval is None:
+                assert "telemetry_file" not in script
+            else:
+                assert 'defineConstant("telemetry_interval", 25);' in script
+                assert '"num_mutations"' in script
+
+
+@pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+class TestBurnInCheckpoint:
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path):
+        saved_cache_dir = stdgrimmsim.get_cache_dir()
+        stdgrimmsim.set_cache_dir(tmp_path / "cache")
+        yield tmp_path / "cache"
+        stdgrimmsim.set_cache_dir(saved_cache_dir)
+
+    def runs(self, log):
+        with open(log) as f:
+            return [line.split()[2] for line in f if line.startswith("start")]
+
+    def checkpoints(self, cache_dir):
+        return list((cache_dir / "slim_checkpoints").glob("*/*.trees"))
+
+    def test_shared_burn_in(self, fake_slim, cache_dir):
+        engine = stdgrimmsim.get_engine("slim")
+        for seed in range(1, 4):
+            engine.simulate(**fake_slim_simulation(seed, slim_checkpoint_seed=7))
+        assert self.runs(fake_slim) == ["save", "load", "load", "load"]
+        assert len(self.checkpoints(cache_dir)) == 1
+
+    def test_checkpoint_not_shared(self, fake_slim, cache_dir):
+        engine = stdgrimmsim.get_engine("slim")
+        for kwargs in [
+            dict(slim_checkpoint_seed=7),
+            dict(slim_checkpoint_seed=8),
+            dict(slim_checkpoint_seed=7, slim_burn_in=5),
+            dict(),
+        ]:
+            engine.simulate(**fake_slim_simulation(1, **kwargs))
+        assert self.runs(fake_slim) == [
+            "save",
+            "load",
+            "save",
+            "load",
+            "save",
+            "load",
+            "run",
+        ]
+        assert len(self.checkpoints(cache_dir)) == 3
+
+    def test_eviction(self, fake_slim, cache_dir, monkeypatch):
+        engine = stdgrimmsim.get_engine("slim")
+        engine.simulate(**fake_slim_simulation(1, slim_checkpoint_seed=7))
+        (checkpoint,) = self.checkpoints(cache_dir)
+        size = checkpoint.stat().st_size
+        # The maximum size is restored at the end of the test.
+        monkeypatch.setattr(
+            stdgrimmsim.slim_engine,
+            "_slim_checkpoint_max_size",
+            stdgrimmsim.slim_engine._slim_checkpoint_max_size,
+        )
+        stdgrimmsim.set_slim_checkpoint_max_size(2 * size)
+        # Make the first checkpoint the least recently used.
+        os.utime(checkpoint, (0, 0))
+        for checkpoint_seed in [8, 9]:
+            engine.simulate(
+                **fake_slim_simulation(1, slim_checkpoint_seed=checkpoint_seed)
+            )
+        checkpoints = self.checkpoints(cache_dir)
+        assert len(checkpoints) == 2
+        assert checkpoint not in checkpoints
+        with pytest.raises(ValueError, match="non-negative"):
+            stdgrimmsim.set_slim_checkpoint_max_size(-1)
+
+    def test_checkpoint_too_large(self, fake_slim, cache_dir, monkeypatch, caplog):
+        monkeypatch.setattr(stdgrimmsim.slim_engine, "_slim_checkpoint_max_size", 0)
+        engine = stdgrimmsim.get_engine("slim")
+        with caplog.at_level(logging.WARNING):
+            engine.simulate(**fake_slim_simulation(1, slim_checkpoint_seed=7))
+        assert "larger than the maximum size" in caplog.text
+        assert self.runs(fake_slim) == ["save", "run"]
+        assert self.checkpoints(cache_dir) == []
+
+    def test_clear(self, fake_slim, cache_dir):
+        engine = stdgrimmsim.get_engine("slim")
+        engine.simulate(**fake_slim_simulation(1, slim_checkpoint_seed=7))
+        stdgrimmsim.clear_slim_checkpoints()
+        assert self.checkpoints(cache_dir) == []
+        engine.simulate(**fake_slim_simulation(1, slim_checkpoint_seed=7))
+        assert self.runs(fake_slim) == ["save", "load", "save", "load"]
+
+    def test_async(self, fake_slim):
+        runner = stdgrimmsim.SLiMRunner()
+        runner.run([fake_slim_simulation(1, slim_checkpoint_seed=7)])
+        runner.run([fake_slim_simulation(2, slim_checkpoint_seed=7)])
+        assert self.runs(fake_slim) == ["save", "load", "load"]
+
+    def test_no_burn_in(self, fake_slim, cache_dir):
+        # SLiM doesn't save a checkpoint when events start in the first tick.
+        engine = stdgrimmsim.get_engine("slim")
+        runs = []
+
+        async def runner(script_file, **kwargs):
+            runs.append(kwargs["defines"].get("checkpoint"))
+
+        checkpoint_file = stdgrimmsim.slim_engine._run_until_complete(
+            engine._burn_in_checkpoint(
+                runner,
+                "script.slim",
+                "key",
+                slim_path=None,
+                burn_in=10,
+                seed=1,
+                verbosity=None,
+            )
+        )
+        assert checkpoint_file is None
+        assert runs == ["save"]
+        assert os.listdir(cache_dir / "slim_checkpoints") == []
+
+    def test_script(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        contig = species.get_contig(length=1000)
+        model = stdgrimmsim.PiecewiseConstantSize(100)
+        out = io.StringIO()
+        with mock.patch("sys.stdout", new=out):
+            stdgrimmsim.get_engine("slim").simulate(
+                model, contig, {"pop_0": 5}, slim_script=True
+            )
+        script = out.getvalue()
+        assert 'defineConstant("checkpoint", "")' in script
+        assert "save_checkpoint();" in script
+        assert "sim.readFromPopulationFile(checkpoint_file);" in script
+
+
+class TestMsprimeBurnIn:
+    def contig(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        contig = species.get_contig(length=100000, mutation_rate=1e-7)
+        dfe = stdgrimmsim.DFE(
+            id="test",
+            description="test",
+            long_description="test",
+            mutation_types=[
+                stdgrimmsim.MutationType(),
+                stdgrimmsim.MutationType(
+                    distribution_type="g", distribution_args=[-0.01, 0.2]
+                ),
+                stdgrimmsim.MutationType(
+                    distribution_type="e",
+                    distribution_args=[0.01],
+                    dominance_coeff_list=[0.1, 0.4],
+                    dominance_coeff_breaks=[0.005],
+                ),
+            ],
+            proportions=[0.5, 0.3, 0.2],
+        )
+        contig.add_dfe(np.array([[10000, 60000]]), dfe)
+        return contig
+
+    def selection_coeffs(self, ts):
+        s = collections.defaultdict(list)
+        for mut in ts.mutations():
+            for md in mut.metadata["mutation_list"]:
+                s[md["mutation_type"]].append(md["selection_coeff"])
+        return {k: np.array(v) for k, v in s.items()}
+
+    @pytest.mark.parametrize("Q", [4, 10])
+    def test_initial_state(self, Q):
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = species.get_demographic_model("IsolationMigration_2D12")
+        contig = self.contig()
+        ts = stdgrimmsim.slim_engine._msprime_initial_state(model, contig, Q, 1)
+        assert ts.metadata["SLiM"]["tick"] == 1
+        assert ts.metadata["SLiM"]["stage"] == "late"
+        assert ts.metadata["SLiM"]["separate_sexes"] == species.separate_sexes
+        # The second population is created by a split, so doesn't exist in
+        # the first epoch.
+        pop = model.model.populations[0]
+        assert ts.population(0).metadata["name"] == pop.name
+        assert ts.population(1).metadata is None
+        N = model.model.debug().epochs[-1].populations[0].end_size
+        assert ts.num_individuals == round(N / Q)
+        assert all(ts.nodes_population[ts.samples()] == 0)
+        assert max(tree.num_roots for tree in ts.trees()) == 1
+        sexes = [ind.metadata["sex"] for ind in ts.individuals()]
+        assert set(sexes) == {0, 1}
+
+        # Only the non-neutral mutation types, within the DFE's interval.
+        assert ts.num_mutations > 0
+        assert np.all(ts.sites_position >= 10000)
+        assert np.all(ts.sites_position < 60000)
+        s = self.selection_coeffs(ts)
+        assert set(s.keys()) == {2, 4, 5}
+        assert np.all(s[2] < 0)
+        assert np.mean(s[2]) == pytest.approx(-0.01 * Q, rel=0.5)
+        assert np.all(s[4] < 0.005) and np.all(s[4] >= 0)
+        assert np.all(s[5] >= 0.005)
+
+    def test_unsupported_distribution(self):
+        contig = stdgrimmsim.get_species("ZweBerg").get_contig(length=1000)
+        mt = stdgrimmsim.MutationType(
+            distribution_type="u", distribution_args=[-0.1, 0.1]
+        )
+        dfe = stdgrimmsim.DFE(
+            id="test",
+            description="test",
+            long_description="test",
+            mutation_types=[mt],
+        )
+        contig.add_dfe(np.array([[0, 500]]), dfe)
+        model = stdgrimmsim.PiecewiseConstantSize(100)
+        with pytest.raises(ValueError, match="distribution of type 's'"):
+            stdgrimmsim.slim_engine._msprime_initial_state(model, contig, 1, 1)
+
+    def test_checkpoint_seed(self):
+        with pytest.raises(ValueError, match="slim_checkpoint_seed cannot be used"):
+            stdgrimmsim.get_engine("slim").simulate(
+                **fake_slim_simulation(
+                    1, slim_msprime_burn_in=True, slim_checkpoint_seed=1
+                )
+            )
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    def test_no_recapitation_mutations(self, fake_slim):
+        engine = stdgrimmsim.get_engine("slim")
+        ts_burn_in = engine.simulate(**fake_slim_simulation(1))
+        ts_msprime = engine.simulate(
+            **fake_slim_simulation(1, slim_msprime_burn_in=True)
+        )
+        with open(fake_slim) as f:
+            runs = [line.split()[2] for line in f if line.startswith("start")]
+        assert runs == ["run", "seed"]
+        dfes = ts_msprime.metadata["stdgrimmsim"]["DFEs"]
+        assert dfes[-1]["id"] == "recapitation"
+        recap_type = dfes[-1]["mutation_types"][0]["slim_mutation_type_id"][0]
+        assert recap_type in self.selection_coeffs(ts_burn_in)
+        assert ts_msprime.num_mutations > 0
+        assert recap_type not in self.selection_coeffs(ts_msprime)
+
+    def test_script(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        contig = species.get_contig(length=1000)
+        model = stdgrimmsim.PiecewiseConstantSize(100)
+        out = io.StringIO()
+        with mock.patch("sys.stdout", new=out):
+            stdgrimmsim.get_engine("slim").simulate(
+                model, contig, {"pop_0": 5}, slim_script=True
+            )
+        assert 'if (checkpoint == "load" | checkpoint == "seed")' in out.getvalue()
+
+
+class TestSLiMCostModel:
+    def contig(self, length=1e6):
+        return stdgrimmsim.get_species("ZweBerg").get_contig(length=length)
+
+    def cost_model(self):
+        return stdgrimmsim.SLiMCostModel(
+            runtime_coefficients=[0.5, 1e-6, 2e-7, 1e-6],
+            memory_coefficients=[50e6, 2e3, 10],
+        )
+
+    @pytest.mark.parametrize("Q", [1, 10])
+    def test_constant_size(self, Q):
+        model = stdgrimmsim.PiecewiseConstantSize(1000)
+        contig = self.contig()
+        cost = stdgrimmsim.SLiMCostModel().predict(
+            model, contig, scaling_factor=Q, burn_in=10
+        )
+        assert cost.scaling_factor == Q
+        assert cost.ticks == 10 * 1000 / Q
+        assert cost.individual_ticks == pytest.approx(10 * 1000**2 / Q**2)
+        assert cost.peak_individuals == 1000 / Q
+        # The neutral DFE isn't simulated by SLiM, so only recombinations.
+        events = Q * contig.recombination_map.total_mass
+        assert cost.genome_events == pytest.approx(2 * cost.individual_ticks * events)
+        assert cost.peak_load == pytest.approx((1000 / Q) ** 2 * events)
+        assert cost.runtime is None
+        assert cost.memory is None
+        cost = self.cost_model().predict(model, contig, scaling_factor=Q, burn_in=10)
+        assert cost.runtime > 0
+        assert cost.memory > 0
+
+    def test_coefficients(self):
+        with pytest.raises(ValueError, match="runtime_coefficients"):
+            stdgrimmsim.SLiMCostModel(runtime_coefficients=[1, 2])
+        with pytest.raises(ValueError, match="memory_coefficients"):
+            stdgrimmsim.SLiMCostModel(memory_coefficients=[1, 2, 3, 4])
+
+    def test_epochs(self):
+        model = stdgrimmsim.PiecewiseConstantSize(1000, (200, 5000))
+        cost = stdgrimmsim.SLiMCostModel().predict(model, self.contig(), burn_in=2)
+        assert cost.ticks == 2 * 5000 + 200
+        assert cost.individual_ticks == pytest.approx(2 * 5000**2 + 200 * 1000)
+        assert cost.peak_individuals == 5000
+
+    def test_growth(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = species.get_demographic_model("PostGlacialExpansion_1D12")
+        cost = stdgrimmsim.SLiMCostModel().predict(model, self.contig(), burn_in=0)
+        # Sum the sizes over generations numerically.
+        dd = model.model.debug()
+        T = int(max(e.start_time for e in dd.epochs))
+        sizes = dd.population_size_trajectory(np.arange(T))
+        assert cost.ticks == T
+        assert cost.individual_ticks == pytest.approx(np.sum(sizes), rel=1e-3)
+
+    def test_dfe_mutations(self):
+        contig = self.contig()
+        model = stdgrimmsim.PiecewiseConstantSize(1000)
+        cost1 = stdgrimmsim.SLiMCostModel().predict(model, contig)
+        dfe = stdgrimmsim.DFE(
+            id="test",
+            description="test",
+            long_description="test",
+            mutation_types=[stdgrimmsim.MutationType(distribution_args=[-0.01])],
+        )
+        contig.add_dfe(np.array([[0, 1000]]), dfe)
+        cost2 = stdgrimmsim.SLiMCostModel().predict(model, contig)
+        events = 2 * cost1.individual_ticks * 1000 * contig.mutation_rate
+        assert cost2.genome_events - cost1.genome_events == pytest.approx(events)
+
+    def test_fit(self):
+        true_model = stdgrimmsim.SLiMCostModel(
+            runtime_coefficients=[2, 1e-5, 1e-7, 0],
+            memory_coefficients=[1e7, 1e3, 50],
+        )
+        costs = [
+            true_model.predict(
+                stdgrimmsim.PiecewiseConstantSize(N),
+                self.contig(length),
+                scaling_factor=Q,
+            )
+            for N in [100, 1000, 10000]
+            for length in [1e5, 1e6]
+            for Q in [1, 2]
+        ]
+        model = stdgrimmsim.SLiMCostModel.fit(
+            costs, [c.runtime for c in costs], [c.memory for c in costs]
+        )
+        np.testing.assert_allclose(
+            model.runtime_coefficients, true_model.runtime_coefficients, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            model.memory_coefficients, true_model.memory_coefficients, rtol=1e-6
+        )
+        assert all(c >= 0 for c in model.runtime_coefficients)
+
+    def test_fit_errors(self):
+        cost = stdgrimmsim.SLiMCostModel().predict(
+            stdgrimmsim.PiecewiseConstantSize(100), self.contig()
+        )
+        with pytest.raises(ValueError, match="same length"):
+            stdgrimmsim.SLiMCostModel.fit([cost], [1, 2], [1])
+        with pytest.raises(ValueError, match="At least one"):
+            stdgrimmsim.SLiMCostModel.fit([], [], [])
+        with pytest.raises(ValueError, match="must be positive"):
+            stdgrimmsim.SLiMCostModel.fit([cost], [0], [1])
+
+    def test_choose_scaling_factor(self):
+        model = stdgrimmsim.PiecewiseConstantSize(10000)
+        contig = self.contig()
+        cost_model = self.cost_model()
+        runtimes = {
+            Q: cost_model.predict(model, contig, scaling_factor=Q).runtime
+            for Q in [1, 2, 5, 10]
+        }
+        cost = cost_model.choose_scaling_factor(
+            model, contig, max_runtime=runtimes[5] * 1.01
+        )
+        assert cost.scaling_factor == 5
+        assert cost.runtime == runtimes[5]
+        cost = cost_model.choose_scaling_factor(model, contig, max_memory=1e15)
+        assert cost.scaling_factor == 1
+        cost = cost_model.choose_scaling_factor(
+            model, contig, max_runtime=1e15, scaling_factors=[10, 20]
+        )
+        assert cost.scaling_factor == 10
+
+    def test_choose_scaling_factor_errors(self):
+        # Scaling factors leaving fewer than 50 individuals aren't used.
+        model = stdgrimmsim.PiecewiseConstantSize(1000)
+        contig = self.contig()
+        cost_model = self.cost_model()
+        with pytest.raises(ValueError, match="scaling factor of 20"):
+            cost_model.choose_scaling_factor(model, contig, max_runtime=1e-9)
+        with pytest.raises(ValueError, match="At least one of"):
+            cost_model.choose_scaling_factor(model, contig)
+        # The default model has no coefficients to predict with.
+        with pytest.raises(ValueError, match="no runtime coefficients"):
+            stdgrimmsim.SLiMCostModel().choose_scaling_factor(
+                model, contig, max_runtime=1
+            )
+        cost_model = stdgrimmsim.SLiMCostModel(runtime_coefficients=[1, 0, 0, 0])
+        with pytest.raises(ValueError, match="no memory coefficients"):
+            cost_model.choose_scaling_factor(model, contig, max_memory=1)
+
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.UnspecifiedSLiMWarning")
+    @pytest.mark.filterwarnings("ignore::stdgrimmsim.SLiMScalingFactorWarning")
+    def test_simulate(self, fake_slim, caplog):
+        cost_model = self.cost_model()
+        kwargs = fake_slim_simulation(1)
+        runtime = cost_model.predict(
+            kwargs["demographic_model"], kwargs["contig"], scaling_factor=2
+        ).runtime
+        with caplog.at_level(logging.INFO, logger="stdgrimmsim.slim_engine"):
+            stdgrimmsim.get_engine("slim").simulate(
+                **kwargs,
+                slim_scaling_factor="auto",
+                slim_max_runtime=runtime,
+                slim_cost_model=cost_model,
+            )
+        assert "Using a scaling factor of 2" in caplog.text
+        with pytest.raises(ValueError, match="requires a slim_cost_model"):
+            stdgrimmsim.get_engine("slim").simulate(
+                **kwargs, slim_scaling_factor="auto", slim_max_runtime=runtime
+            )
@@ -3,6 +3,8 @@ Tests for the generic species interface.
 """
 
 import math
+import subprocess
+import sys
 import numpy as np
 
 import msprime
@@ -106,6 +108,84 @@ class TestSpecies:
             species.add_annotations(an)
 
 
+def _run_python(code, *args):
+    result = subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result
+
+
+def _import_times(code):
+    """
+    Returns a dict mapping the name of each of stdgrimmsim's own modules
+    imported when running the specified code to the time in seconds spent
+    importing it (excluding its imports), as reported by
+    ``python -X importtime``.
+    """
+    stderr = _run_python(code, "-X", "importtime").stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        if name.startswith("stdgrimmsim") and self_us.strip().isdigit():
+            times[name] = int(self_us) / 1e6
+    return times
+
+
+class TestLazyCatalog:
+    """
+    Tests that species in the catalog are only loaded when needed.
+    """
+
+    def loaded_species(self, code):
+        code += (
+            "\nimport sys"
+            "\nprint(' '.join(sorted({m.split('.')[2] for m in sys.modules"
+            " if m.startswith('stdgrimmsim.catalog.')})))"
+        )
+        return _run_python(code).stdout.split()
+
+    def test_import_loads_no_species(self):
+        assert self.loaded_species("import stdgrimmsim") == []
+
+    def test_get_species_loads_one_species(self):
+        loaded = self.loaded_species(
+            "import stdgrimmsim; stdgrimmsim.get_species('ZweBerg')"
+        )
+        assert loaded == ["ZweBerg"]
+
+    def test_import_time(self):
+        # Measured with python -X importtime, importing stdgrimmsim spends
+        # about 25 ms in its own modules, and about 70 ms if the catalog is
+        # imported too. The limit is generous so that the test isn't flaky on
+        # slow machines, while no catalog module may be imported at all.
+        runs = [_import_times("import stdgrimmsim") for _ in range(3)]
+        for times in runs:
+            assert "stdgrimmsim" in times
+            assert not any(name.startswith("stdgrimmsim.catalog.") for name in times)
+        assert min(sum(times.values()) for times in runs) < 0.25
+
+    def test_all_species_loads_all_species(self):
+        loaded = self.loaded_species(
+            "import stdgrimmsim; list(stdgrimmsim.all_species())"
+        )
+        assert loaded == stdgrimmsim.catalog.__all__
+
+    def test_models_registered_on_demand(self):
+        species = stdgrimmsim.get_species("ZweBerg")
+        model = species.get_demographic_model("BlackForest_1D12")
+        assert model.id == "BlackForest_1D12"
+
+    def test_unknown_species_lists_catalog(self):
+        with pytest.raises(ValueError, match="AlpNac, AscPut"):
+            stdgrimmsim.get_species("XXXX")
+
+
 class SpeciesTestBase:
     """
     Base class for testing individual species properties.
@@ -550,3 +550,45 @@ class TestGammaPdf:
             utils.gamma_pdf(x=x, a=a, loc=loc, scale=scale),
             scipy.stats.gamma.pdf(x=x, a=a, loc=loc, scale=scale),
         )
+
+
+class TestParsedArrays:
+    def test_save_load(self, tmp_path):
+        path = tmp_path / "parsed"
+        utils.save_parsed(path, {"x": np.arange(5), "y": np.ones(3)}, "abc")
+        x, y = utils.load_parsed(path, ["x", "y"], "abc")
+        np.testing.assert_array_equal(x, np.arange(5))
+        np.testing.assert_array_equal(y, np.ones(3))
+        assert utils.load_parsed(path, ["x", "y"], "def") is None
+        assert utils.load_parsed(tmp_path / "missing", ["x"], "abc") is None
+
+    def test_checksum_removed_first(self, tmp_path, monkeypatch):
+        # If replacing the arrays fails part way through, the old checksum
+        # is gone, so the mix of old and new arrays is never loaded.
+        path = tmp_path / "parsed"
+        utils.save_parsed(path, {"x": np.arange(5), "y": np.ones(3)}, "abc")
+        save = np.save
+
+        def failing_save(f, data):
+            if len(data) == 4:
+                raise OSError("disk full")
+            save(f, data)
+
+        monkeypatch.setattr(np, "save", failing_save)
+        with pytest.raises(OSError):
+            utils.save_parsed(path, {"x": np.arange(6), "y": np.ones(4)}, "abc")
+        assert utils.load_parsed(path, ["x", "y"], "abc") is None
+        assert sorted(os.listdir(path)) == ["x", "y"]
+
+    def test_replaced_while_loading(self, tmp_path, monkeypatch):
+        path = tmp_path / "parsed"
+        utils.save_parsed(path, {"x": np.arange(5)}, "abc")
+        load = np.load
+
+        def load_and_replace(*args, **kwargs):
+            array = load(*args, **kwargs)
+            os.unlink(path / "sha256")
+            return array
+
+        monkeypatch.setattr(np, "load", load_and_replace)
+        assert utils.load_parsed(path, ["x"], "abc") is None